@@ -0,0 +1,65 @@
+import base64
+import binascii
+import json
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from typing import List, Optional
+
+
+class SearchAfterPagination:
+    """
+    Cursor pagination for Elasticsearch queries using `search_after`.
+
+    The cursor is an opaque token holding the sort values of the last document of the
+    previous page, so the pages don't need to be counted or skipped over.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    page_size = 100
+    max_page_size = 1000
+
+    def is_requested(self, request) -> bool:
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(
+                request.query_params.get(self.page_size_query_param, self.page_size)
+            )
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "Must be an integer."})
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: "Must be positive."})
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request) -> Optional[List]:
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            search_after = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError):
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        if not isinstance(search_after, list):
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        return search_after
+
+    def encode_cursor(self, search_after: List) -> str:
+        return base64.urlsafe_b64encode(json.dumps(search_after).encode()).decode()
+
+    def get_paginated_response(
+        self, request, data, next_search_after: Optional[List]
+    ) -> Response:
+        next_url = None
+        if next_search_after is not None:
+            next_url = replace_query_param(
+                request.build_absolute_uri(),
+                self.cursor_query_param,
+                self.encode_cursor(next_search_after),
+            )
+        return Response({"next": next_url, "results": data})
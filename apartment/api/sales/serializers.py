@@ -1,9 +1,46 @@
+from collections import defaultdict
+from django.db.models import QuerySet
 from rest_framework import serializers
+from typing import Dict, Iterable, List
 
 from application_form.api.sales.serializers import ApartmentReservationSerializer
 from application_form.models import ApartmentReservation
 
 
+def get_reservations_for_apartments(apartment_uuids: Iterable) -> QuerySet:
+    """
+    Returns the reservations of the given apartments in the order they are shown, with
+    everything `ApartmentReservationSerializer` needs loaded by the same query or
+    prefetched.
+    """
+    return (
+        ApartmentReservation.objects.filter(apartment_uuid__in=apartment_uuids)
+        .select_related(
+            "application_apartment__application",
+            "application_apartment__lotteryeventresult",
+        )
+        .prefetch_related("application_apartment__application__applicants")
+        .order_by(
+            "application_apartment__lotteryeventresult__result_position",
+            "queue_position",
+        )
+    )
+
+
+def group_reservations_by_apartment(
+    apartment_uuids: Iterable,
+) -> Dict[str, List[ApartmentReservation]]:
+    """
+    Loads the reservations of all the given apartments at once and groups them by the
+    apartment UUID as a string, to be passed to `ApartmentSerializer` in the
+    `reservations_by_apartment` context variable.
+    """
+    reservations_by_apartment = defaultdict(list)
+    for reservation in get_reservations_for_apartments(apartment_uuids):
+        reservations_by_apartment[str(reservation.apartment_uuid)].append(reservation)
+    return reservations_by_apartment
+
+
 class ApartmentSerializer(serializers.Serializer):
     apartment_uuid = serializers.UUIDField(source="uuid")
     apartment_number = serializers.CharField()
@@ -13,10 +50,9 @@ class ApartmentSerializer(serializers.Serializer):
     url = serializers.CharField()
 
     def get_reservations(self, obj):
-        reservations = ApartmentReservation.objects.filter(
-            apartment_uuid=obj["uuid"]
-        ).order_by(
-            "application_apartment__lotteryeventresult__result_position",
-            "queue_position",
-        )
+        reservations_by_apartment = self.context.get("reservations_by_apartment")
+        if reservations_by_apartment is not None:
+            reservations = reservations_by_apartment.get(str(obj["uuid"]), [])
+        else:
+            reservations = get_reservations_for_apartments([obj["uuid"]])
         return ApartmentReservationSerializer(reservations, many=True).data
@@ -1,13 +1,20 @@
 from rest_framework import serializers
 
-from apartment.api.sales.serializers import ApartmentSerializer
-from apartment.elastic.queries import get_apartment_uuids, get_apartments
-from application_form.models import LotteryEvent
+from apartment.api.sales.serializers import (
+    ApartmentSerializer,
+    group_reservations_by_apartment,
+)
+from apartment.elastic.queries import get_apartments
+from application_form.services.lottery.utils import get_lottery_completed_project_uuids
 from invoicing.api.serializers import ProjectInstallmentTemplateSerializer
 from invoicing.models import ProjectInstallmentTemplate
 
 
 class ApartmentDocumentSerializer(serializers.Serializer):
+    """
+    If `fields` is given, only those fields are serialized.
+    """
+
     uuid = serializers.UUIDField()
     apartment_address = serializers.CharField()
     apartment_number = serializers.CharField()
@@ -53,6 +60,12 @@ class ApartmentDocumentSerializer(serializers.Serializer):
     apartment_state_of_sale = serializers.CharField()
     apartment_published = serializers.BooleanField()
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
 
 class ProjectDocumentSerializerBase(serializers.Serializer):
     id = serializers.IntegerField(source="project_id")
@@ -145,15 +158,29 @@ class ProjectDocumentSerializerBase(serializers.Serializer):
     lottery_completed = serializers.SerializerMethodField()
 
     def get_lottery_completed(self, obj):
-        apartment_uuids = get_apartment_uuids(obj["project_uuid"])
-        lottery_completed = LotteryEvent.objects.filter(
-            apartment_uuid__in=apartment_uuids
-        ).exists()
-        return lottery_completed
+        completed_project_uuids = self.context.get("lottery_completed_project_uuids")
+        if completed_project_uuids is not None:
+            return str(obj["project_uuid"]) in completed_project_uuids
+        return bool(get_lottery_completed_project_uuids([obj["project_uuid"]]))
+
+
+class LotteryStatusPrefetchListSerializer(serializers.ListSerializer):
+    """
+    Checks the lottery status of all the projects with a single query.
+    """
+
+    def to_representation(self, data):
+        projects = list(data)
+        completed_project_uuids = get_lottery_completed_project_uuids(
+            project["project_uuid"] for project in projects
+        )
+        self.context["lottery_completed_project_uuids"] = completed_project_uuids
+        return super().to_representation(projects)
 
 
 class ProjectDocumentListSerializer(ProjectDocumentSerializerBase):
-    pass
+    class Meta:
+        list_serializer_class = LotteryStatusPrefetchListSerializer
 
 
 class ProjectDocumentDetailSerializer(ProjectDocumentSerializerBase):
@@ -170,4 +197,11 @@ class ProjectDocumentDetailSerializer(ProjectDocumentSerializerBase):
 
     def get_apartments(self, obj):
         apartments = get_apartments(obj.project_uuid)
-        return ApartmentSerializer(apartments, many=True).data
+        reservations_by_apartment = group_reservations_by_apartment(
+            [apartment.uuid for apartment in apartments]
+        )
+        return ApartmentSerializer(
+            apartments,
+            many=True,
+            context={"reservations_by_apartment": reservations_by_apartment},
+        ).data
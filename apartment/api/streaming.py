@@ -0,0 +1,37 @@
+import json
+from django.http import StreamingHttpResponse
+from itertools import islice
+from rest_framework.utils.encoders import JSONEncoder
+from typing import Callable, Iterable, Iterator, List
+
+STREAM_CHUNK_SIZE = 500
+
+
+def is_stream_requested(request) -> bool:
+    return request.query_params.get("stream", "").lower() in ("1", "true")
+
+
+def streaming_json_response(
+    items: Iterable, serialize: Callable[[List], List[dict]]
+) -> StreamingHttpResponse:
+    """
+    Returns a response that renders the given items as a JSON array while iterating
+    over them. The items are serialized with `serialize` in chunks, so only one chunk
+    is held in memory at a time.
+    """
+    return StreamingHttpResponse(
+        _iter_json_array(items, serialize), content_type="application/json"
+    )
+
+
+def _iter_json_array(
+    items: Iterable, serialize: Callable[[List], List[dict]]
+) -> Iterator[str]:
+    yield "["
+    separator = ""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, STREAM_CHUNK_SIZE)):
+        for data in serialize(chunk):
+            yield separator + json.dumps(data, cls=JSONEncoder)
+            separator = ","
+    yield "]"
@@ -1,15 +1,23 @@
 from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import permissions
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apartment.api.pagination import SearchAfterPagination
 from apartment.api.serializers import (
     ApartmentDocumentSerializer,
     ProjectDocumentDetailSerializer,
     ProjectDocumentListSerializer,
 )
-from apartment.elastic.queries import get_apartments, get_projects
+from apartment.api.streaming import is_stream_requested, streaming_json_response
+from apartment.elastic.queries import (
+    get_apartments,
+    get_apartments_page,
+    get_projects,
+    scan_apartments,
+    scan_projects,
+)
 
 
 class ApartmentAPIView(APIView):
@@ -17,13 +25,63 @@ class ApartmentAPIView(APIView):
         permissions.AllowAny,
     ]
     http_method_names = ["get"]
+    pagination = SearchAfterPagination()
 
     def get(self, request):
+        """
+        Lists the apartments, optionally of a single project. The response is paginated
+        if `cursor` or `limit` is given, or streamed if `stream` is true. `fields`
+        limits the returned fields to the given comma-separated ones.
+        """
         project_uuid = request.GET.get("project_uuid", None)
-        apartments = get_apartments(project_uuid)
-        serializer = ApartmentDocumentSerializer(apartments, many=True)
+        fields = self._get_fields(request)
+
+        if is_stream_requested(request):
+            return streaming_json_response(
+                scan_apartments(project_uuid, fields=fields),
+                lambda apartments: ApartmentDocumentSerializer(
+                    apartments, many=True, fields=fields
+                ).data,
+            )
+
+        if self.pagination.is_requested(request):
+            return self._get_page(request, project_uuid, fields)
+
+        apartments = get_apartments(project_uuid, fields=fields)
+        serializer = ApartmentDocumentSerializer(apartments, many=True, fields=fields)
         return Response(serializer.data)
 
+    def _get_page(self, request, project_uuid, fields):
+        page_size = self.pagination.get_page_size(request)
+        # Fetch one extra apartment to know whether there is a next page
+        apartments = list(
+            get_apartments_page(
+                project_uuid,
+                search_after=self.pagination.decode_cursor(request),
+                size=page_size + 1,
+                fields=fields,
+            )
+        )
+        next_search_after = None
+        if len(apartments) > page_size:
+            apartments = apartments[:page_size]
+            next_search_after = list(apartments[-1].meta.sort)
+        serializer = ApartmentDocumentSerializer(apartments, many=True, fields=fields)
+        return self.pagination.get_paginated_response(
+            request, serializer.data, next_search_after
+        )
+
+    def _get_fields(self, request):
+        if not request.GET.get("fields"):
+            return None
+        fields = [field.strip() for field in request.GET["fields"].split(",")]
+        unknown_fields = set(fields) - set(ApartmentDocumentSerializer().fields)
+        if unknown_fields:
+            raise ValidationError(
+                {"fields": f"Unknown fields: {', '.join(sorted(unknown_fields))}"}
+            )
+        return fields
+
 
 class ProjectAPIView(APIView):
     permission_classes = [
@@ -33,6 +91,13 @@ class ProjectAPIView(APIView):
 
     def get(self, request, project_uuid=None):
         many = project_uuid is None
+        if many and is_stream_requested(request):
+            return streaming_json_response(
+                scan_projects(),
+                lambda projects: ProjectDocumentListSerializer(
+                    projects, many=True
+                ).data,
+            )
         try:
             project_data = get_projects(project_uuid)
             if not many:
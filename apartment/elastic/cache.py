@@ -0,0 +1,138 @@
+import functools
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+from typing import Callable, Dict, Optional
+
+_logger = logging.getLogger(__name__)
+
+_GENERATION_CACHE_KEY = "elastic_query_cache_generation"
+
+_request_memo: ContextVar[Optional[Dict[str, object]]] = ContextVar(
+    "elastic_query_request_memo", default=None
+)
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def cached_query(func: Callable) -> Callable:
+    """
+    Caches the results of an Elasticsearch query function.
+
+    Inside `elastic_query_cache()`, which is active for every request, each query is
+    run at most once per distinct arguments. If `ELASTICSEARCH_QUERY_CACHE_TIMEOUT` is
+    set, the results are also shared between requests through the Django cache
+    `ELASTICSEARCH_QUERY_CACHE_ALIAS` for that many seconds.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = _make_key(func.__name__, args, kwargs)
+
+        memo = _request_memo.get()
+        if memo is not None and key in memo:
+            _record(func.__name__, "request_hits")
+            return memo[key]
+
+        result = _get_shared(key)
+        if result is not None:
+            _record(func.__name__, "shared_hits")
+        else:
+            _record(func.__name__, "misses")
+            result = func(*args, **kwargs)
+            _set_shared(key, result)
+
+        if memo is not None:
+            memo[key] = result
+        return result
+
+    return wrapper
+
+
+@contextmanager
+def elastic_query_cache():
+    """
+    Memoizes the Elasticsearch queries run within the block. Nested blocks share the
+    memo of the outermost one.
+    """
+    if _request_memo.get() is not None:
+        yield
+        return
+    token = _request_memo.set({})
+    try:
+        yield
+    finally:
+        _request_memo.reset(token)
+
+
+def invalidate_elastic_query_cache() -> None:
+    """
+    Drops the cached query results of the current request and of the shared cache.
+    Should be called whenever the apartment data in Elasticsearch has been changed.
+    """
+    memo = _request_memo.get()
+    if memo is not None:
+        memo.clear()
+    cache = _get_shared_cache()
+    if cache is not None:
+        # Bumping the generation makes every previously cached key unreachable
+        cache.set(_GENERATION_CACHE_KEY, _get_generation(cache) + 1, None)
+
+
+def get_elastic_query_cache_stats() -> Dict[str, int]:
+    """
+    Returns the hit and miss counts of the cached queries of this process, keyed by
+    "<query function>.<request_hits|shared_hits|misses>".
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_elastic_query_cache_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def _make_key(name: str, args: tuple, kwargs: dict) -> str:
+    arguments = [str(arg) for arg in args] + [
+        f"{key}={value}" for key, value in sorted(kwargs.items())
+    ]
+    return f"elastic_query:{name}:{','.join(arguments)}"
+
+
+def _record(name: str, event: str) -> None:
+    with _stats_lock:
+        _stats[f"{name}.{event}"] += 1
+    _logger.debug("Elasticsearch query cache %s: %s", event, name)
+
+
+def _get_shared_cache():
+    if not settings.ELASTICSEARCH_QUERY_CACHE_TIMEOUT:
+        return None
+    return caches[settings.ELASTICSEARCH_QUERY_CACHE_ALIAS]
+
+
+def _get_generation(cache) -> int:
+    return cache.get(_GENERATION_CACHE_KEY, 0)
+
+
+def _get_shared(key: str):
+    cache = _get_shared_cache()
+    if cache is None:
+        return None
+    return cache.get(f"{key}:{_get_generation(cache)}")
+
+
+def _set_shared(key: str, value) -> None:
+    cache = _get_shared_cache()
+    if cache is None:
+        return
+    cache.set(
+        f"{key}:{_get_generation(cache)}",
+        value,
+        settings.ELASTICSEARCH_QUERY_CACHE_TIMEOUT,
+    )
@@ -1,8 +1,10 @@
 from django.core.exceptions import ObjectDoesNotExist
 
+from apartment.elastic.cache import cached_query
 from apartment.elastic.documents import ApartmentDocument
 
 
+@cached_query
 def get_apartment(apartment_uuid, include_project_fields=False):
     search = ApartmentDocument.search()
 
@@ -18,15 +20,42 @@ def get_apartment(apartment_uuid, include_project_fields=False):
     return apartment
 
 
-def get_apartments(project_uuid=None):
+def get_apartments_by_uuids(apartment_uuids, include_project_fields=False):
+    """
+    Fetches the given apartments with a single query. Returns a dict of the apartments
+    keyed by their UUID as a string. Apartments that don't exist are left out.
+    """
+    apartment_uuids = list({str(apartment_uuid) for apartment_uuid in apartment_uuids})
+    if not apartment_uuids:
+        return {}
+
+    search = ApartmentDocument.search()
+
+    # Filters
+    search = search.filter("terms", uuid__keyword=apartment_uuids)
+
+    if not include_project_fields:
+        search = search.source(excludes=["project_*"])
+
+    # Get all items
+    size = len(apartment_uuids)
+    response = search[0:size].execute()
+
+    return {apartment.uuid: apartment for apartment in response}
+
+
+def get_apartments(project_uuid=None, fields=None):
     search = ApartmentDocument.search()
 
     # Filters
     if project_uuid:
         search = search.filter("term", project_uuid__keyword=project_uuid)
 
-    # Exclude project fields
-    search = search.source(excludes=["project_*"])
+    # Fetch only the requested fields, or exclude project fields
+    if fields:
+        search = search.source(includes=list(fields))
+    else:
+        search = search.source(excludes=["project_*"])
 
     # Get all items
     count = search.count()
@@ -35,6 +64,76 @@ def get_apartments(project_uuid=None):
     return response
 
 
+def get_apartments_page(project_uuid=None, search_after=None, size=100, fields=None):
+    """
+    Returns a page of apartments ordered by their UUID. The next page starts after the
+    sort values (`hit.meta.sort`) of the last apartment of the previous page, so deep
+    pages cost the same as the first one and are not limited by `max_result_window`.
+
+    If `fields` is given, only those fields of the apartments are fetched.
+    """
+    search = ApartmentDocument.search()
+
+    # Filters
+    if project_uuid:
+        search = search.filter("term", project_uuid__keyword=project_uuid)
+
+    if fields:
+        search = search.source(includes=list(fields))
+    else:
+        search = search.source(excludes=["project_*"])
+
+    # The UUID is unique, so it alone gives a stable order to continue from
+    search = search.sort("uuid.keyword")
+    if search_after:
+        search = search.extra(search_after=list(search_after))
+
+    return search[0:size].execute()
+
+
+def scan_apartments(project_uuid=None, fields=None):
+    """
+    Iterates over all the apartments, optionally of a single project, without loading
+    them all into memory at once.
+    """
+    search = ApartmentDocument.search()
+
+    # Filters
+    if project_uuid:
+        search = search.filter("term", project_uuid__keyword=project_uuid)
+
+    if fields:
+        search = search.source(includes=list(fields))
+    else:
+        search = search.source(excludes=["project_*"])
+
+    return search.scan()
+
+
+def scan_projects():
+    """
+    Iterates over all the projects without loading them all into memory at once.
+
+    Field collapsing is not supported when scrolling, so the apartments with project
+    data are scanned and only the first apartment of each project is yielded.
+    """
+    search = ApartmentDocument.search()
+
+    # Project data needs to exist in apartment data
+    search = search.filter("exists", field="project_id")
+
+    # Retrieve only project fields
+    search = search.source(["project_*"])
+
+    seen_project_ids = set()
+    for apartment in search.scan():
+        if apartment.project_id in seen_project_ids:
+            continue
+        seen_project_ids.add(apartment.project_id)
+        yield apartment
+
+
+@cached_query
 def get_apartment_uuids(project_uuid):
     search = ApartmentDocument.search()
 
@@ -50,6 +149,7 @@ def get_apartment_uuids(project_uuid):
     return result
 
 
+@cached_query
 def get_projects(project_uuid=None):
     search = ApartmentDocument.search()
 
@@ -0,0 +1,14 @@
+from apartment.elastic.cache import elastic_query_cache
+
+
+class ElasticQueryCacheMiddleware:
+    """
+    Memoizes the Elasticsearch queries for the duration of each request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with elastic_query_cache():
+            return self.get_response(request)
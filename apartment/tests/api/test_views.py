@@ -1,7 +1,11 @@
+import json
 import pytest
 import uuid
+from django.core.management import call_command
 from django.urls import reverse
 
+from application_form.models import ProjectLotteryStatus
+from application_form.services.lottery.utils import _save_application_order
 from application_form.tests.factories import (
     ApartmentReservationFactory,
     LotteryEventFactory,
@@ -38,6 +42,95 @@ def test_apartment_list_get_with_project_uuid(
     assert response.data[0].get("uuid") == apartments[0].uuid
 
 
+@pytest.mark.django_db
+def test_apartment_list_get_paginated(api_client, elastic_project_with_5_apartments):
+    project_uuid, apartments = elastic_project_with_5_apartments
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+
+    received_uuids = []
+    url = reverse("apartment:apartment-list")
+    data = {"project_uuid": project_uuid, "limit": 2}
+    pages = 0
+    while url:
+        response = api_client.get(url, data=data, format="json")
+        assert response.status_code == 200
+        assert len(response.data["results"]) <= 2
+        received_uuids += [apartment["uuid"] for apartment in response.data["results"]]
+        url = response.data["next"]
+        data = None
+        pages += 1
+
+    assert pages == 3
+    assert received_uuids == sorted(apartment.uuid for apartment in apartments)
+
+
+@pytest.mark.django_db
+def test_apartment_list_get_with_fields(api_client, elastic_project_with_5_apartments):
+    project_uuid, apartments = elastic_project_with_5_apartments
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    data = {"project_uuid": project_uuid, "fields": "uuid,apartment_number"}
+    response = api_client.get(
+        reverse("apartment:apartment-list"), data=data, format="json"
+    )
+    assert response.status_code == 200
+    assert len(response.data) == 5
+    assert all(
+        set(apartment) == {"uuid", "apartment_number"} for apartment in response.data
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("elastic_apartments")
+@pytest.mark.parametrize(
+    "data", [{"fields": "uuid,lizard"}, {"limit": "lizard"}, {"cursor": "lizard"}]
+)
+def test_apartment_list_get_with_invalid_parameters(api_client, data):
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    response = api_client.get(
+        reverse("apartment:apartment-list"), data=data, format="json"
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_apartment_list_get_streamed(api_client, elastic_project_with_5_apartments):
+    project_uuid, apartments = elastic_project_with_5_apartments
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    data = {"project_uuid": project_uuid, "stream": "true"}
+    response = api_client.get(
+        reverse("apartment:apartment-list"), data=data, format="json"
+    )
+    assert response.status_code == 200
+    assert response.streaming
+    data = json.loads(b"".join(response.streaming_content))
+    assert sorted(apartment["uuid"] for apartment in data) == sorted(
+        apartment.uuid for apartment in apartments
+    )
+
+
+@pytest.mark.django_db
+def test_project_list_get_streamed(api_client, elastic_project_with_5_apartments):
+    project_uuid, apartments = elastic_project_with_5_apartments
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    response = api_client.get(
+        reverse("apartment:project-list"), data={"stream": "true"}, format="json"
+    )
+    assert response.status_code == 200
+    assert response.streaming
+    data = json.loads(b"".join(response.streaming_content))
+    # Each project should be listed once even though it has several apartments
+    assert [project["uuid"] for project in data].count(project_uuid) == 1
+    non_streamed_response = api_client.get(
+        reverse("apartment:project-list"), format="json"
+    )
+    assert len(data) == len(non_streamed_response.data)
+
+
 @pytest.mark.django_db
 @pytest.mark.usefixtures("elastic_apartments")
 def test_project_list_get(api_client):
@@ -59,7 +152,7 @@ def test_project_list_lottery_completed_field(
     api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
 
     if lottery_exists:
-        LotteryEventFactory(apartment_uuid=apartments[0].uuid)
+        _save_application_order(apartments[0].uuid)
 
     url = (
         reverse("apartment:project-list")
@@ -76,6 +169,41 @@ def test_project_list_lottery_completed_field(
     assert data["lottery_completed"] is lottery_exists
 
 
+@pytest.mark.django_db
+def test_project_list_lottery_completed_without_lottery_status(
+    api_client, elastic_project_with_5_apartments
+):
+    project_uuid, apartments = elastic_project_with_5_apartments
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    # A lottery performed before the lottery status was stored
+    LotteryEventFactory(apartment_uuid=apartments[0].uuid)
+
+    response = api_client.get(reverse("apartment:project-list"), format="json")
+    assert response.status_code == 200
+    assert response.data[0]["lottery_completed"] is False
+    assert not ProjectLotteryStatus.objects.exists()
+
+    call_command("update_project_lottery_statuses")
+
+    response = api_client.get(reverse("apartment:project-list"), format="json")
+    assert response.data[0]["lottery_completed"] is True
+    assert ProjectLotteryStatus.objects.filter(project_uuid=project_uuid).exists()
+
+
+@pytest.mark.django_db
+def test_save_application_order_marks_project_lottery_completed(
+    elastic_project_with_5_apartments,
+):
+    project_uuid, apartments = elastic_project_with_5_apartments
+
+    _save_application_order(apartments[0].uuid)
+
+    assert list(
+        ProjectLotteryStatus.objects.values_list("project_uuid", flat=True)
+    ) == [uuid.UUID(str(project_uuid))]
+
+
 @pytest.mark.django_db
 def test_project_get_with_project_uuid(api_client, elastic_project_with_5_apartments):
     project_uuid, _ = elastic_project_with_5_apartments
@@ -151,3 +279,27 @@ def test_project_detail_apartment_reservations(
             key=lambda x: (x["lottery_position"], x["queue_position"]),
         )
         assert apartment_data["reservations"] == expect_sorted_reservations
+
+
+@pytest.mark.django_db
+def test_project_detail_apartment_reservations_query_count(
+    api_client, elastic_project_with_5_apartments, django_assert_max_num_queries
+):
+    # The number of queries must not depend on the number of apartments or reservations
+    project_uuid, apartments = elastic_project_with_5_apartments
+    for apartment in apartments:
+        for _ in range(0, 5):
+            ApartmentReservationFactory(apartment_uuid=apartment.uuid)
+
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    with django_assert_max_num_queries(10):
+        response = api_client.get(
+            reverse("apartment:project-detail", kwargs={"project_uuid": project_uuid}),
+            format="json",
+        )
+    assert response.status_code == 200
+    assert all(
+        len(apartment_data["reservations"]) == 5
+        for apartment_data in response.data["apartments"]
+    )
@@ -0,0 +1,73 @@
+import pytest
+from django.core.cache import cache
+from unittest.mock import patch
+
+from apartment.elastic.cache import (
+    elastic_query_cache,
+    get_elastic_query_cache_stats,
+    invalidate_elastic_query_cache,
+    reset_elastic_query_cache_stats,
+)
+from apartment.elastic.documents import ApartmentDocument
+from apartment.elastic.queries import get_apartment
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    reset_elastic_query_cache_stats()
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _count_searches():
+    return patch.object(ApartmentDocument, "search", wraps=ApartmentDocument.search)
+
+
+def test_get_apartment_is_not_cached_outside_request(elastic_apartments):
+    apartment = elastic_apartments[0]
+    with _count_searches() as search:
+        get_apartment(apartment.uuid)
+        get_apartment(apartment.uuid)
+    assert search.call_count == 2
+
+
+def test_get_apartment_is_memoized_within_request(elastic_apartments):
+    apartment = elastic_apartments[0]
+    with _count_searches() as search, elastic_query_cache():
+        first = get_apartment(apartment.uuid)
+        second = get_apartment(apartment.uuid)
+        # Different arguments are cached separately
+        get_apartment(apartment.uuid, include_project_fields=True)
+    assert first is second
+    assert search.call_count == 2
+    stats = get_elastic_query_cache_stats()
+    assert stats["get_apartment.misses"] == 2
+    assert stats["get_apartment.request_hits"] == 1
+
+
+def test_invalidate_elastic_query_cache_drops_request_memo(elastic_apartments):
+    apartment = elastic_apartments[0]
+    with _count_searches() as search, elastic_query_cache():
+        get_apartment(apartment.uuid)
+        invalidate_elastic_query_cache()
+        get_apartment(apartment.uuid)
+    assert search.call_count == 2
+
+
+def test_get_apartment_is_shared_between_requests_with_timeout(
+    elastic_apartments, settings
+):
+    settings.ELASTICSEARCH_QUERY_CACHE_TIMEOUT = 60
+    apartment = elastic_apartments[0]
+    with _count_searches() as search:
+        with elastic_query_cache():
+            get_apartment(apartment.uuid)
+        with elastic_query_cache():
+            assert get_apartment(apartment.uuid).uuid == apartment.uuid
+        assert search.call_count == 1
+        assert get_elastic_query_cache_stats()["get_apartment.shared_hits"] == 1
+
+        invalidate_elastic_query_cache()
+        get_apartment(apartment.uuid)
+        assert search.call_count == 2
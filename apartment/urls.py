@@ -2,7 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from apartment.api.views import ApartmentAPIView, ProjectAPIView
-from invoicing.api.views import ProjectInstallmentTemplateAPIView
+from application_form.api.sales.views import ProjectContractAPIView
+from invoicing.api.views import ProjectInstallmentTemplateAPIView, ProjectInvoiceAPIView
 
 router = DefaultRouter()
 
@@ -23,5 +24,15 @@ urlpatterns = [
         ProjectInstallmentTemplateAPIView.as_view(),
         name="project-installment-template-list",
     ),
+    path(
+        "sales/projects/<uuid:project_uuid>/invoices/",
+        ProjectInvoiceAPIView.as_view(),
+        name="project-invoices",
+    ),
+    path(
+        "sales/projects/<uuid:project_uuid>/contracts/",
+        ProjectContractAPIView.as_view(),
+        name="project-contracts",
+    ),
     path("", include(router.urls)),
 ]
@@ -1,14 +1,57 @@
+import base64
 import dataclasses
+import hashlib
+import hmac
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from cryptography.fernet import Fernet, InvalidToken
 from datetime import date
 from decimal import Decimal
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from functools import lru_cache
 from io import BytesIO
-from pikepdf import Pdf, String
-from typing import ClassVar, Dict, Iterable, Union
+from pikepdf import Array, Dictionary, Page, Pdf, String
+from typing import (
+    BinaryIO,
+    ClassVar,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+_logger = logging.getLogger(__name__)
 
 PDF_TEMPLATE_DIRECTORY = "pdf_templates"
 
+# Changing this invalidates the cached PDFs, e.g. when the rendering changes
+PDF_CACHE_VERSION = 1
+
+# Batches with at least this many documents are rendered across a process pool
+PARALLEL_RENDER_THRESHOLD = 100
+PARALLEL_RENDER_WORKERS = os.cpu_count() or 1
+
 DataDict = Dict[str, str]
 
+# Started when the first large batch is rendered and kept for the later ones
+_render_executor: Optional[ProcessPoolExecutor] = None
+_render_executor_lock = threading.Lock()
+
+# The parsed templates of each thread, since pikepdf objects are not thread-safe
+_thread_templates = threading.local()
+
 
 class PDFError(Exception):
     pass
@@ -82,50 +125,423 @@ class PDFCurrencyField:
 def create_pdf(
     template_file_name: str, pdf_data_list: Union[PDFData, Iterable[PDFData]]
 ) -> BytesIO:
+    """
+    Creates a single PDF of the given items. The PDF is served from the PDF cache if
+    the same template has already been rendered with the same data.
+    """
+    template_path = f"{PDF_TEMPLATE_DIRECTORY}/{template_file_name}"
+    data_dicts = _get_data_dicts(pdf_data_list)
+    cache_key = _get_cache_key(template_path, data_dicts)
+    return BytesIO(_create_cached_pdf(template_path, data_dicts, cache_key))
+
+
+def create_pdf_response(
+    request,
+    template_file_name: str,
+    pdf_data_list: Union[PDFData, Iterable[PDFData]],
+    filename: str,
+) -> HttpResponse:
+    """
+    Returns a response with the PDF `create_pdf()` creates of the given arguments, or
+    a "304 Not Modified" response if the client already has the same PDF according to
+    its If-None-Match header.
+    """
+    template_path = f"{PDF_TEMPLATE_DIRECTORY}/{template_file_name}"
+    data_dicts = _get_data_dicts(pdf_data_list)
+    cache_key = _get_cache_key(template_path, data_dicts)
+    etag = quote_etag(cache_key)
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            _create_cached_pdf(template_path, data_dicts, cache_key),
+            content_type="application/pdf",
+        )
+        response["Content-Disposition"] = f"attachment; filename={filename}"
+    response["ETag"] = etag
+
+    return response
+
+
+def write_pdf(
+    template_file_name: str, pdf_data_list: Iterable[PDFData], file: BinaryIO
+) -> None:
+    """
+    Writes a single PDF of the given items to the given file. Unlike `create_pdf()`,
+    the PDF is not cached and its content is written straight to the file instead of
+    memory, so this suits large documents.
+    """
+    template_path = f"{PDF_TEMPLATE_DIRECTORY}/{template_file_name}"
+    _save_merged_pdf(
+        template_path, (pdf_data.to_data_dict() for pdf_data in pdf_data_list), file
+    )
+
+
+def create_pdfs(
+    template_file_name: str, pdf_data_list: Iterable[PDFData]
+) -> List[BytesIO]:
+    """
+    Creates a separate PDF of each item. Large batches are rendered across a process
+    pool shared by the calls, so that the rendering scales with the number of cores.
+
+    Merging the pages of PDFs rendered in other processes costs about as much as
+    rendering them, so `create_pdf()` always renders a single merged PDF serially.
+    """
+    template_path = f"{PDF_TEMPLATE_DIRECTORY}/{template_file_name}"
+    data_dicts = [pdf_data.to_data_dict() for pdf_data in pdf_data_list]
+
+    if len(data_dicts) >= PARALLEL_RENDER_THRESHOLD and PARALLEL_RENDER_WORKERS > 1:
+        contents = _render_in_pool(template_path, data_dicts)
+    else:
+        contents = [
+            _render_to_bytes(template_path, data_dict) for data_dict in data_dicts
+        ]
+
+    return [BytesIO(content) for content in contents]
+
+
+def _render_in_pool(template_path: str, data_dicts: List[DataDict]) -> List[bytes]:
+    chunk_size = math.ceil(len(data_dicts) / PARALLEL_RENDER_WORKERS)
+    # A pool whose worker has died can't be used anymore, so it is replaced and the
+    # batch is rendered once more
+    for attempt in range(2):
+        executor = _get_render_executor()
+        try:
+            return list(
+                executor.map(
+                    _render_to_bytes,
+                    [template_path] * len(data_dicts),
+                    data_dicts,
+                    chunksize=chunk_size,
+                )
+            )
+        except BrokenProcessPool:
+            _logger.exception("The PDF render pool is broken")
+            _discard_render_executor(executor)
+            if attempt:
+                raise
+
+
+def _get_render_executor() -> ProcessPoolExecutor:
+    global _render_executor
+    with _render_executor_lock:
+        if _render_executor is None:
+            _render_executor = ProcessPoolExecutor(max_workers=PARALLEL_RENDER_WORKERS)
+        return _render_executor
+
+
+def _discard_render_executor(executor: ProcessPoolExecutor) -> None:
+    global _render_executor
+    with _render_executor_lock:
+        if _render_executor is executor:
+            _render_executor = None
+    executor.shutdown(wait=False)
+
+
+def _get_data_dicts(pdf_data_list: Union[PDFData, Iterable[PDFData]]) -> List[DataDict]:
     if not isinstance(pdf_data_list, Iterable):
         pdf_data_list = [pdf_data_list]
+    return [pdf_data.to_data_dict() for pdf_data in pdf_data_list]
+
+
+def _get_cache_key(template_file_name: str, data_dicts: List[DataDict]) -> str:
+    key = hashlib.sha256()
+    key.update(f"{PDF_CACHE_VERSION}:".encode())
+    key.update(_get_template(template_file_name).digest.encode())
+    key.update(json.dumps(data_dicts, sort_keys=True).encode())
+    return key.hexdigest()
+
+
+def _create_cached_pdf(
+    template_file_name: str, data_dicts: List[DataDict], cache_key: str
+) -> bytes:
+    content = _read_cached_pdf(cache_key)
+    if content is not None:
+        return content
+
+    pdf_bytes = BytesIO()
+    _save_merged_pdf(template_file_name, data_dicts, pdf_bytes)
+    content = pdf_bytes.getvalue()
+    _write_cached_pdf(cache_key, content)
+    return content
+
+
+def _save_merged_pdf(
+    template_file_name: str, data_dicts: Iterable[DataDict], file: BinaryIO
+) -> None:
+    # The pages of each document are copied from the template and filled in the merged
+    # PDF, so no PDF is kept per document and the documents share the contents of the
+    # template pages
     pdf = Pdf.new()
+    for data_dict in data_dicts:
+        _append_filled_pages(pdf, template_file_name, data_dict)
+    pdf.save(file)
+
+
+def _append_filled_pages(
+    pdf: Pdf, template_file_name: str, data_dict: DataDict
+) -> None:
+    template = _get_template(template_file_name)
+    first_page_index = len(pdf.pages)
+    pdf.pages.extend(_get_template_pdf(template_file_name, template).pages)
+    pages = pdf.pages[first_page_index:]
+    _copy_annotations(pdf, pages)
+    _set_pdf_fields(pages, template.fields, data_dict)
 
-    for pdf_data in pdf_data_list:
-        single_pdf = _create_pdf(
-            f"{PDF_TEMPLATE_DIRECTORY}/{template_file_name}", pdf_data.to_data_dict()
+
+def _copy_annotations(pdf: Pdf, pages: Sequence[Page]) -> None:
+    """
+    Gives the pages their own copies of their annotations and of the parent fields of
+    those. Copying the same template page to a PDF again gives a page that shares the
+    annotations of the earlier copy.
+    """
+    parents: Dict[Tuple[int, int], Dictionary] = {}
+    for page in pages:
+        annots = []
+        for annot in page.Annots:
+            annot = Dictionary(annot)
+            if "/Parent" in annot:
+                parent_id = annot.Parent.objgen
+                if parent_id not in parents:
+                    parents[parent_id] = pdf.make_indirect(Dictionary(annot.Parent))
+                    parents[parent_id].Kids = Array()
+                annot.Parent = parents[parent_id]
+            annot.P = page.obj
+            annot = pdf.make_indirect(annot)
+            if "/Parent" in annot:
+                annot.Parent.Kids.append(annot)
+            annots.append(annot)
+        page.Annots = pdf.make_indirect(Array(annots))
+
+
+class _PDFCacheIndex:
+    """
+    The files of the PDF cache of this process in least recently used order, with
+    their sizes. The index is built from the cache directory when it is first used,
+    so the directory isn't listed on every write. It is shared by the request
+    threads, so it is changed only while holding its lock.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.files: "OrderedDict[str, int]" = OrderedDict()
+        self.total_size = 0
+        self._lock = threading.Lock()
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.endswith(".pdf") and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self.add(name, size)
+
+    def add(self, name: str, size: int) -> None:
+        with self._lock:
+            self.total_size += size - self.files.pop(name, 0)
+            self.files[name] = size
+
+    def touch(self, name: str) -> None:
+        with self._lock:
+            if name in self.files:
+                self.files.move_to_end(name)
+
+    def discard(self, name: str) -> None:
+        with self._lock:
+            self.total_size -= self.files.pop(name, 0)
+
+    def evict(self, max_size: int) -> None:
+        """
+        Removes the least recently used PDFs until the cache fits in `max_size`.
+        """
+        while True:
+            with self._lock:
+                if not self.files or self.total_size <= max_size:
+                    return
+                name, size = self.files.popitem(last=False)
+                self.total_size -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+_cache_index: Optional[_PDFCacheIndex] = None
+_cache_index_lock = threading.Lock()
+
+
+def _get_cache_index() -> _PDFCacheIndex:
+    global _cache_index
+    with _cache_index_lock:
+        directory = settings.PDF_CACHE_DIRECTORY
+        if _cache_index is None or _cache_index.directory != directory:
+            os.makedirs(directory, exist_ok=True)
+            _cache_index = _PDFCacheIndex(directory)
+        return _cache_index
+
+
+def _get_cache_fernet() -> Fernet:
+    key = (settings.PDF_CACHE_KEY or settings.SECRET_KEY).encode()
+    return Fernet(base64.urlsafe_b64encode(hashlib.sha256(key).digest()))
+
+
+def _get_cached_pdf_name(cache_key: str) -> str:
+    # The cache key is a plain hash of the data, so the file is named by a keyed hash
+    # of it instead
+    key = (settings.PDF_CACHE_KEY or settings.SECRET_KEY).encode()
+    return hmac.new(key, cache_key.encode(), hashlib.sha256).hexdigest() + ".pdf"
+
+
+def _read_cached_pdf(cache_key: str) -> Optional[bytes]:
+    if not settings.PDF_CACHE_DIRECTORY:
+        return None
+    name = _get_cached_pdf_name(cache_key)
+    path = os.path.join(settings.PDF_CACHE_DIRECTORY, name)
+    try:
+        index = _get_cache_index()
+        with open(path, "rb") as f:
+            content = _get_cache_fernet().decrypt(f.read())
+    except FileNotFoundError:
+        # the PDF may have been evicted by another process
+        if _cache_index is not None:
+            _cache_index.discard(name)
+        return None
+    except (OSError, InvalidToken):
+        _logger.exception("Could not read the cached PDF %s", path)
+        return None
+    index.touch(name)
+    return content
+
+
+def _write_cached_pdf(cache_key: str, content: bytes) -> None:
+    if not settings.PDF_CACHE_DIRECTORY:
+        return
+    # The PDFs contain personal data, so they are encrypted on the disk
+    token = _get_cache_fernet().encrypt(content)
+    if len(token) > settings.PDF_CACHE_MAX_SIZE:
+        return
+    name = _get_cached_pdf_name(cache_key)
+    path = os.path.join(settings.PDF_CACHE_DIRECTORY, name)
+    try:
+        index = _get_cache_index()
+        # Written to a temporary file first, so that other processes never read a
+        # partially written PDF
+        fd, temp_path = tempfile.mkstemp(
+            dir=settings.PDF_CACHE_DIRECTORY, suffix=".tmp"
         )
-        pdf.pages.extend(single_pdf.pages)
+        with os.fdopen(fd, "wb") as f:
+            f.write(token)
+        os.replace(temp_path, path)
+        index.add(name, len(token))
+        index.evict(settings.PDF_CACHE_MAX_SIZE)
+    except OSError:
+        _logger.exception("Could not write the cached PDF %s", path)
 
+
+def _render_to_bytes(template_file_name: str, data_dict: DataDict) -> bytes:
     pdf_bytes = BytesIO()
-    pdf.save(pdf_bytes)
-    pdf_bytes.seek(0)
+    _create_pdf(template_file_name, data_dict).save(pdf_bytes)
+    return pdf_bytes.getvalue()
 
-    return pdf_bytes
 
+@dataclasses.dataclass(frozen=True)
+class _TemplateField:
+    page_index: int
+    annot_index: int
+    parent_name: Optional[str]
+    field_name: Optional[str]
+    field_type: Optional[str]
 
-def _set_pdf_fields(pdf: Pdf, data_dict: DataDict) -> None:
-    for page in pdf.pages:
-        for annot in page.Annots:
-            if not hasattr(annot, "FT") and str(annot.Parent.T) in data_dict:
-                pdf_value = String(data_dict[str(annot.Parent.T)])
-                annot.Parent.V = pdf_value
-                annot.Parent.DV = pdf_value
-                continue
-            if not hasattr(annot, "T") or (field_name := str(annot.T)) not in data_dict:
+
+@dataclasses.dataclass(frozen=True)
+class _Template:
+    content: bytes
+    digest: str
+    fields: Tuple[_TemplateField, ...]
+
+
+@lru_cache(maxsize=None)
+def _get_template(template_file_name: str) -> _Template:
+    """
+    Reads and parses the template once per process. The form fields of the template
+    are collected so that filling a copy of it doesn't need to inspect every
+    annotation again.
+    """
+    with open(template_file_name, "rb") as f:
+        content = f.read()
+    pdf = Pdf.open(BytesIO(content))
+    fields = []
+    for page_index, page in enumerate(pdf.pages):
+        for annot_index, annot in enumerate(page.Annots):
+            has_type = hasattr(annot, "FT")
+            fields.append(
+                _TemplateField(
+                    page_index=page_index,
+                    annot_index=annot_index,
+                    parent_name=None if has_type else str(annot.Parent.T),
+                    field_name=str(annot.T) if hasattr(annot, "T") else None,
+                    field_type=str(annot.FT) if has_type else None,
+                )
+            )
+    return _Template(
+        content=content,
+        digest=hashlib.sha256(content).hexdigest(),
+        fields=tuple(fields),
+    )
+
+
+def _get_template_pdf(template_file_name: str, template: _Template) -> Pdf:
+    """
+    Returns the parsed template of the current thread, for copying its pages to each
+    document. The contents of the copied pages are read from it when the document is
+    saved, so it is never shared between threads.
+    """
+    pdfs = getattr(_thread_templates, "pdfs", None)
+    if pdfs is None:
+        pdfs = _thread_templates.pdfs = {}
+    if template_file_name not in pdfs:
+        pdfs[template_file_name] = Pdf.open(BytesIO(template.content))
+    return pdfs[template_file_name]
+
+
+def _set_pdf_fields(
+    pages: Sequence[Page], fields: Iterable[_TemplateField], data_dict: DataDict
+) -> None:
+    for field in fields:
+        annot = pages[field.page_index].Annots[field.annot_index]
+        if field.parent_name is not None and field.parent_name in data_dict:
+            pdf_value = String(data_dict[field.parent_name])
+            annot.Parent.V = pdf_value
+            annot.Parent.DV = pdf_value
+            continue
+        if field.field_name is None or field.field_name not in data_dict:
+            continue
+        field_name = field.field_name
+        if field.field_type == "/Tx":  # text field
+            pdf_value = String(data_dict[field_name])
+            annot.V = pdf_value
+            annot.DV = pdf_value
+        elif field.field_type == "/Btn":  # checkbox
+            if not data_dict[field_name]:
                 continue
-            if annot.FT == "/Tx":  # text field
-                pdf_value = String(data_dict[field_name])
-                annot.V = pdf_value
-                annot.DV = pdf_value
-            elif annot.FT == "/Btn":  # checkbox
-                if not data_dict[field_name]:
-                    continue
-                pdf_value = "True"
-                annot.AS = pdf_value
-                annot.V = pdf_value
-                annot.DV = pdf_value
-            else:
-                raise PDFError(f"Field {field_name} has an unsupported type {annot.FT}")
+            pdf_value = "True"
+            annot.AS = pdf_value
+            annot.V = pdf_value
+            annot.DV = pdf_value
+        else:
+            raise PDFError(
+                f"Field {field_name} has an unsupported type {field.field_type}"
+            )
 
 
 def _create_pdf(template_file_name: str, data_dict: DataDict) -> Pdf:
-    pdf = Pdf.open(template_file_name)
-    _set_pdf_fields(pdf, data_dict)
+    template = _get_template(template_file_name)
+    # Copying the pages of the parsed template gives a copy to fill without parsing
+    # the template again
+    template_pdf = _get_template_pdf(template_file_name, template)
+    pdf = Pdf.new()
+    pdf.Root.AcroForm = pdf.copy_foreign(template_pdf.Root.AcroForm)
+    pdf.pages.extend(template_pdf.pages)
+    _set_pdf_fields(pdf.pages, template.fields, data_dict)
     pdf.Root.AcroForm.NeedAppearances = 1
     return pdf
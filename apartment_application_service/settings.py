@@ -54,7 +54,15 @@ env = environ.Env(
     ELASTICSEARCH_PORT=(int, 9200),
     ELASTICSEARCH_USERNAME=(str, ""),
     ELASTICSEARCH_PASSWORD=(str, ""),
+    ELASTICSEARCH_QUERY_CACHE_TIMEOUT=(int, 0),
+    ELASTICSEARCH_QUERY_CACHE_ALIAS=(str, "default"),
     APARTMENT_INDEX_NAME=(str, "asuntotuotanto-apartments"),
+    PDF_CACHE_DIRECTORY=(str, ""),
+    PDF_CACHE_MAX_SIZE=(int, 100 * 1024 * 1024),
+    PDF_CACHE_KEY=(str, ""),
+    AUDIT_LOG_SPOOL_DIRECTORY=(str, ""),
+    AUDIT_LOG_FLUSH_INTERVAL=(float, 1.0),
+    PROFILE_SEARCH_KEY=(str, ""),
     ETUOVI_SUPPLIER_SOURCE_ITEMCODE=(str, ""),
     ETUOVI_COMPANY_NAME=(str, ""),
     ETUOVI_TRANSFER_ID=(str, ""),
@@ -167,6 +175,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
+    "apartment.middleware.ElasticQueryCacheMiddleware",
 ]
 
 TEMPLATES = [
@@ -271,8 +280,30 @@ ELASTICSEARCH_URL = env("ELASTICSEARCH_URL")
 ELASTICSEARCH_PORT = env("ELASTICSEARCH_PORT")
 ELASTICSEARCH_USERNAME = env("ELASTICSEARCH_USERNAME")
 ELASTICSEARCH_PASSWORD = env("ELASTICSEARCH_PASSWORD")
+# Seconds to share the query results between requests. 0 disables the shared cache.
+ELASTICSEARCH_QUERY_CACHE_TIMEOUT = env("ELASTICSEARCH_QUERY_CACHE_TIMEOUT")
+ELASTICSEARCH_QUERY_CACHE_ALIAS = env("ELASTICSEARCH_QUERY_CACHE_ALIAS")
 APARTMENT_INDEX_NAME = env("APARTMENT_INDEX_NAME")
 
+# Rendered PDFs are cached in this directory. An empty value disables the cache.
+PDF_CACHE_DIRECTORY = env("PDF_CACHE_DIRECTORY")
+# Maximum total size of the cached PDFs in bytes. The least recently used PDFs are
+# removed when the cache grows larger.
+PDF_CACHE_MAX_SIZE = env("PDF_CACHE_MAX_SIZE")
+# Key of the encryption of the cached PDFs. Defaults to SECRET_KEY.
+PDF_CACHE_KEY = env("PDF_CACHE_KEY")
+
+# Setting a spool directory makes a background thread write the READ and FORBIDDEN
+# audit log events in batches every AUDIT_LOG_FLUSH_INTERVAL seconds. The events are
+# kept in the directory until they have been written.
+AUDIT_LOG_SPOOL_DIRECTORY = env("AUDIT_LOG_SPOOL_DIRECTORY")
+AUDIT_LOG_FLUSH_INTERVAL = env("AUDIT_LOG_FLUSH_INTERVAL")
+
+# Key of the hashed search tokens of the encrypted profile fields. Defaults to
+# SECRET_KEY. The tokens must be rebuilt with update_profile_search_tokens when the key
+# is changed.
+PROFILE_SEARCH_KEY = env("PROFILE_SEARCH_KEY")
+
 # Etuovi settings
 ETUOVI_SUPPLIER_SOURCE_ITEMCODE = env("ETUOVI_SUPPLIER_SOURCE_ITEMCODE")
 ETUOVI_COMPANY_NAME = env("ETUOVI_COMPANY_NAME")
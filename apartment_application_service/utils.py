@@ -1,3 +1,9 @@
+import io
+import shutil
+import zipfile
+from typing import BinaryIO, Iterable, Iterator, Tuple
+
+
 class SafeAttributeObject:
     def __init__(self, obj):
         self.obj = obj
@@ -14,3 +20,36 @@ def update_obj(obj, data):
         setattr(obj, field, value)
     obj.save()
     return obj
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """A write-only file object that hands out what has been written to it."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(files: Iterable[Tuple[str, BinaryIO]]) -> Iterator[bytes]:
+    """
+    Yields a ZIP archive of the given (file name, file) pairs piece by piece. Only one
+    file of the archive is held in memory at a time.
+    """
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for file_name, file in files:
+            with archive.open(file_name, mode="w") as archive_file:
+                shutil.copyfileobj(file, archive_file)
+            yield buffer.pop()
+    yield buffer.pop()
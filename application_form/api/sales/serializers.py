@@ -1,7 +1,9 @@
 import logging
 from drf_spectacular.utils import extend_schema_field
+from enumfields.drf import EnumField
 from rest_framework import serializers
 from rest_framework.fields import UUIDField
+from typing import Optional
 
 from apartment.elastic.queries import get_apartment
 from application_form.api.serializers import (
@@ -9,7 +11,8 @@ from application_form.api.serializers import (
     ApplicantSerializerBase,
     ApplicationSerializerBase,
 )
-from application_form.models import Applicant
+from application_form.enums import LotteryJobState
+from application_form.models import Applicant, LotteryJob
 from invoicing.api.serializers import (
     ApartmentInstallmentCandidateSerializer,
     ApartmentInstallmentSerializer,
@@ -24,6 +27,48 @@ class ProjectUUIDSerializer(serializers.Serializer):
     project_uuid = UUIDField()
 
 
+class ExecuteLotterySerializer(ProjectUUIDSerializer):
+    job = serializers.BooleanField(
+        default=False,
+        help_text="Queue the lottery to be run by a worker instead of running it "
+        "within the request.",
+    )
+
+
+class LotteryJobSerializer(serializers.ModelSerializer):
+    state = EnumField(LotteryJobState, read_only=True)
+    apartment_count = serializers.SerializerMethodField()
+    processed_apartment_count = serializers.SerializerMethodField()
+    elapsed_seconds = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LotteryJob
+        fields = [
+            "id",
+            "project_uuid",
+            "state",
+            "apartment_count",
+            "processed_apartment_count",
+            "apartment_progress",
+            "elapsed_seconds",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_apartment_count(self, obj) -> int:
+        return len(obj.apartment_progress)
+
+    def get_processed_apartment_count(self, obj) -> int:
+        return sum(obj.apartment_progress.values())
+
+    def get_elapsed_seconds(self, obj) -> Optional[float]:
+        elapsed_time = obj.elapsed_time
+        return elapsed_time.total_seconds() if elapsed_time is not None else None
+
+
 class SalesApplicantSerializer(ApplicantSerializerBase):
     pass
 
@@ -1,8 +1,8 @@
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import (
     action,
@@ -12,10 +12,14 @@ from rest_framework.decorators import (
 )
 from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from apartment.elastic.queries import get_apartment, get_projects
+from apartment_application_service.pdf import create_pdf_response
+from apartment_application_service.utils import stream_zip
 from application_form.api.sales.serializers import (
-    ProjectUUIDSerializer,
+    ExecuteLotterySerializer,
+    LotteryJobSerializer,
     RootApartmentReservationSerializer,
     SalesApplicationSerializer,
 )
@@ -24,13 +28,25 @@ from application_form.api.serializers import (
     ApartmentReservationStateChangeEventSerializer,
 )
 from application_form.api.views import ApplicationViewSet
+from application_form.enums import ApartmentReservationState
 from application_form.exceptions import ProjectDoesNotHaveApplicationsException
-from application_form.models import ApartmentReservation
-from application_form.pdf import create_haso_contract_pdf, create_hitas_contract_pdf
+from application_form.models import ApartmentReservation, LotteryJob
+from application_form.pdf import iter_project_contract_pdfs
+from application_form.pdf.batch import get_project_contract_reservations
+from application_form.pdf.haso import (
+    get_haso_contract_pdf_data,
+    HASO_CONTRACT_PDF_TEMPLATE_FILE_NAME,
+)
+from application_form.pdf.hitas import (
+    get_hitas_contract_pdf_data,
+    HITAS_CONTRACT_PDF_TEMPLATE_FILE_NAME,
+)
 from application_form.services.application import cancel_reservation
 from application_form.services.lottery.exceptions import (
     ApplicationTimeNotFinishedException,
+    LotteryJobAlreadyQueuedException,
 )
+from application_form.services.lottery.jobs import enqueue_lottery
 from application_form.services.lottery.machine import distribute_apartments
 from users.permissions import IsSalesperson
 
@@ -42,8 +58,12 @@ from users.permissions import IsSalesperson
 def execute_lottery_for_project(request):
     """
     Run the lottery for the given project.
+
+    If `job` is true, the lottery is queued to be run by a worker and the id of the
+    lottery job is returned. The progress of the job can be followed with
+    `lottery_job_status`.
     """
-    serializer = ProjectUUIDSerializer(data=request.data)
+    serializer = ExecuteLotterySerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
     project_uuid = serializer.data.get("project_uuid")
@@ -54,15 +74,41 @@ def execute_lottery_for_project(request):
         raise NotFound(detail="Project not found.")
 
     try:
+        if serializer.data.get("job"):
+            job = enqueue_lottery(project_uuid)
+            return Response(
+                {"status": job.state.value, "job_id": job.id},
+                status=status.HTTP_202_ACCEPTED,
+            )
         distribute_apartments(project_uuid)
     except ProjectDoesNotHaveApplicationsException as ex:
         raise ValidationError(detail="Project does not have applications.") from ex
-    except ApplicationTimeNotFinishedException as ex:
+    except (
+        ApplicationTimeNotFinishedException,
+        LotteryJobAlreadyQueuedException,
+    ) as ex:
         raise ValidationError(detail=str(ex)) from ex
 
     return Response({"status": "success"}, status=status.HTTP_200_OK)
 
 
+@extend_schema(responses=LotteryJobSerializer)
+@api_view(http_method_names=["GET"])
+@permission_classes([permissions.IsAuthenticated, IsSalesperson])
+@require_http_methods(["GET"])  # For SonarCloud
+def lottery_job_status(request, job_id):
+    """
+    Return the state, the per-apartment progress and the elapsed time of a queued
+    lottery.
+    """
+    try:
+        job = LotteryJob.objects.get(pk=job_id)
+    except LotteryJob.DoesNotExist:
+        raise NotFound(detail="Lottery job not found.")
+
+    return Response(LotteryJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
 class SalesApplicationViewSet(ApplicationViewSet):
     serializer_class = SalesApplicationSerializer
     permission_classes = [permissions.IsAuthenticated, IsSalesperson]
@@ -89,19 +135,20 @@ class ApartmentReservationViewSet(mixins.RetrieveModelMixin, viewsets.GenericVie
         ownership_type = apartment.project_ownership_type.lower()
         if ownership_type == "hitas":
             filename = f"hitas_sopimus_{title}" if title else "hitas_sopimus"
-            pdf_data = create_hitas_contract_pdf(reservation)
+            template_file_name = HITAS_CONTRACT_PDF_TEMPLATE_FILE_NAME
+            pdf_data = get_hitas_contract_pdf_data(reservation, apartment=apartment)
         elif ownership_type == "haso":
             filename = f"haso_sopimus_{title}" if title else "haso_sopimus"
-            pdf_data = create_haso_contract_pdf(reservation)
+            template_file_name = HASO_CONTRACT_PDF_TEMPLATE_FILE_NAME
+            pdf_data = get_haso_contract_pdf_data(reservation, apartment=apartment)
         else:
             raise ValueError(
                 f"Unknown ownership_type: {apartment.project_ownership_type}"
             )
 
-        response = HttpResponse(pdf_data, content_type="application/pdf")
-        response["Content-Disposition"] = f"attachment; filename={filename}.pdf"
-
-        return response
+        return create_pdf_response(
+            request, template_file_name, pdf_data, f"{filename}.pdf"
+        )
 
     @extend_schema(
         operation_id="sales_apartment_reservations_set_state",
@@ -157,3 +204,53 @@ class ApartmentReservationViewSet(mixins.RetrieveModelMixin, viewsets.GenericVie
             ApartmentReservationCancelEventSerializer(cancel_event).data,
             status=status.HTTP_200_OK,
         )
+
+
+@extend_schema(
+    description="Create the contracts of all the reservations of a project as a ZIP "
+    "archive with a Hitas or a HASO contract PDF for each reservation.",
+    parameters=[
+        OpenApiParameter(
+            name="state",
+            description="Include only the reservations in this state. By default all "
+            "the reservations that haven't been canceled are included.",
+            type=str,
+            enum=[state.value for state in ApartmentReservationState],
+            location=OpenApiParameter.QUERY,
+            required=False,
+        )
+    ],
+    responses={(200, "application/zip"): OpenApiTypes.BINARY},
+)
+class ProjectContractAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsSalesperson]
+
+    def get(self, request, **kwargs):
+        project_uuid = kwargs["project_uuid"]
+        state = request.query_params.get("state")
+        if state is not None:
+            try:
+                state = ApartmentReservationState(state)
+            except ValueError:
+                raise ValidationError(f"Invalid state {state}")
+
+        try:
+            get_projects(project_uuid)
+        except ObjectDoesNotExist:
+            raise NotFound(detail="Project not found.")
+        if not get_project_contract_reservations(project_uuid, state).exists():
+            raise NotFound(detail="Project does not have reservations.")
+        try:
+            contracts = iter_project_contract_pdfs(project_uuid, state)
+        except ObjectDoesNotExist as e:
+            raise NotFound(detail=str(e))
+        except ValueError as e:
+            raise ValidationError(detail=str(e))
+
+        response = StreamingHttpResponse(
+            stream_zip(contracts),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = "attachment; filename=sopimukset.zip"
+
+        return response
@@ -30,3 +30,10 @@ class ApplicationType(Enum):
 class ApartmentQueueChangeEventType(Enum):
     ADDED = "added"
     REMOVED = "removed"
+
+
+class LotteryJobState(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
@@ -0,0 +1,37 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+
+from apartment_application_service.utils import stream_zip
+from application_form.enums import ApartmentReservationState
+from application_form.pdf import iter_project_contract_pdfs
+from application_form.pdf.batch import get_project_contract_reservations
+
+
+class Command(BaseCommand):
+    help = "Export the contracts of the reservations of a project as a ZIP archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_uuid", help="UUID of the project")
+        parser.add_argument("output_file", help="Path of the file to write")
+        parser.add_argument(
+            "--state",
+            choices=[state.value for state in ApartmentReservationState],
+            help="Include only the reservations in this state",
+        )
+
+    def handle(self, *args, **options):
+        project_uuid = options["project_uuid"]
+        state = options["state"] and ApartmentReservationState(options["state"])
+        if not get_project_contract_reservations(project_uuid, state).exists():
+            raise CommandError(f"Project {project_uuid} has no reservations")
+
+        try:
+            contracts = iter_project_contract_pdfs(project_uuid, state)
+        except (ObjectDoesNotExist, ValueError) as e:
+            raise CommandError(str(e))
+
+        with open(options["output_file"], "wb") as f:
+            for data in stream_zip(contracts):
+                f.write(data)
+
+        self.stdout.write(f"Contracts written to {options['output_file']}")
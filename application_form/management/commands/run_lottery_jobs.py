@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand
+
+from application_form.services.lottery.jobs import run_next_lottery_job
+
+
+class Command(BaseCommand):
+    help = "Run the queued lottery jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for new jobs",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait before checking the queue again when it is empty",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = run_next_lottery_job()
+            if job is not None:
+                self.stdout.write(
+                    f"Lottery job {job.id} of project {job.project_uuid}: "
+                    f"{job.state.value}"
+                )
+                continue
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from apartment.elastic.queries import get_apartment_uuids, get_projects
+from application_form.models import LotteryEvent, ProjectLotteryStatus
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark the lottery of every project that has lottery events as completed. "
+        "Needed once for the lotteries performed before the lottery status was stored."
+    )
+
+    def handle(self, *args, **options):
+        project_uuids_by_apartment = {
+            str(apartment_uuid): project.project_uuid
+            for project in get_projects()
+            for apartment_uuid in get_apartment_uuids(project.project_uuid)
+        }
+        completed_project_uuids = {
+            project_uuids_by_apartment[str(apartment_uuid)]
+            for apartment_uuid in LotteryEvent.objects.values_list(
+                "apartment_uuid", flat=True
+            ).distinct()
+            if str(apartment_uuid) in project_uuids_by_apartment
+        }
+        existing_project_uuids = {
+            str(project_uuid)
+            for project_uuid in ProjectLotteryStatus.objects.values_list(
+                "project_uuid", flat=True
+            )
+        }
+        statuses = ProjectLotteryStatus.objects.bulk_create(
+            [
+                ProjectLotteryStatus(project_uuid=project_uuid)
+                for project_uuid in completed_project_uuids
+                if str(project_uuid) not in existing_project_uuids
+            ]
+        )
+        self.stdout.write(f"Marked {len(statuses)} project lotteries as completed")
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.12 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("application_form", "0056_add_fields_to_application"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="apartmentreservation",
+            index=models.Index(
+                fields=["apartment_uuid", "queue_position"],
+                name="reservation_queue_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 3.2.12 on 2026-10-17 10:03
+
+import enumfields.fields
+import uuid
+from django.db import migrations, models
+
+import application_form.enums
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("application_form", "0057_apartmentreservation_queue_position_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LotteryJob",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="lottery job identifier",
+                    ),
+                ),
+                ("project_uuid", models.UUIDField(verbose_name="project uuid")),
+                (
+                    "state",
+                    enumfields.fields.EnumField(
+                        default="queued",
+                        enum=application_form.enums.LotteryJobState,
+                        max_length=16,
+                        verbose_name="lottery job state",
+                    ),
+                ),
+                (
+                    "apartment_progress",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="apartment progress"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="error")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="started at"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="finished at"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("created_at",),
+            },
+        ),
+    ]
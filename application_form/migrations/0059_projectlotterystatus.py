@@ -0,0 +1,30 @@
+# Generated by Django 3.2.12 on 2026-10-17 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("application_form", "0058_lotteryjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectLotteryStatus",
+            fields=[
+                (
+                    "project_uuid",
+                    models.UUIDField(
+                        primary_key=True, serialize=False, verbose_name="project uuid"
+                    ),
+                ),
+                (
+                    "lottery_completed_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="lottery completed at"
+                    ),
+                ),
+            ],
+        ),
+    ]
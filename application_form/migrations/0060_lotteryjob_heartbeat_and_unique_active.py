@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+import application_form.enums
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("application_form", "0059_projectlotterystatus"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lotteryjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="heartbeat at"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="lotteryjob",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    (
+                        "state__in",
+                        [
+                            application_form.enums.LotteryJobState["QUEUED"],
+                            application_form.enums.LotteryJobState["RUNNING"],
+                        ],
+                    )
+                ),
+                fields=("project_uuid",),
+                name="lottery_job_unique_active_project",
+            ),
+        ),
+    ]
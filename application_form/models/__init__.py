@@ -3,7 +3,12 @@ from application_form.models.application import (
     Application,
     ApplicationApartment,
 )
-from application_form.models.lottery import LotteryEvent, LotteryEventResult
+from application_form.models.lottery import (
+    LotteryEvent,
+    LotteryEventResult,
+    LotteryJob,
+    ProjectLotteryStatus,
+)
 from application_form.models.reservation import (
     ApartmentQueueChangeEvent,
     ApartmentReservation,
@@ -16,6 +21,8 @@ __all__ = [
     "ApplicationApartment",
     "LotteryEvent",
     "LotteryEventResult",
+    "LotteryJob",
+    "ProjectLotteryStatus",
     "ApartmentReservation",
     "ApartmentQueueChangeEvent",
     "ApartmentReservationStateChangeEvent",
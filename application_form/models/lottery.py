@@ -1,6 +1,12 @@
+from datetime import timedelta
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from enumfields import EnumField
+from typing import Optional
+from uuid import uuid4
 
+from application_form.enums import LotteryJobState
 from application_form.models.application import ApplicationApartment
 
 
@@ -16,3 +22,69 @@ class LotteryEventResult(models.Model):
 
     class Meta:
         unique_together = [("event", "application_apartment")]
+
+
+class ProjectLotteryStatus(models.Model):
+    """
+    Marks the lottery of a project as completed. Kept up to date when the lottery
+    results are recorded, so that the lottery status of many projects can be checked
+    without going through the lottery events of each apartment.
+    """
+
+    project_uuid = models.UUIDField(_("project uuid"), primary_key=True)
+    lottery_completed_at = models.DateTimeField(
+        _("lottery completed at"), auto_now_add=True
+    )
+
+
+class LotteryJob(models.Model):
+    """
+    A lottery of a project queued to be run by a worker.
+
+    The progress of the lottery is stored as a mapping from the apartment UUIDs of the
+    project to a boolean telling whether the lottery of the apartment has been drawn.
+    """
+
+    id = models.UUIDField(
+        _("lottery job identifier"), primary_key=True, default=uuid4, editable=False
+    )
+    project_uuid = models.UUIDField(verbose_name=_("project uuid"))
+    state = EnumField(
+        LotteryJobState,
+        max_length=16,
+        default=LotteryJobState.QUEUED,
+        verbose_name=_("lottery job state"),
+    )
+    apartment_progress = models.JSONField(
+        verbose_name=_("apartment progress"), default=dict, blank=True
+    )
+    error = models.TextField(verbose_name=_("error"), blank=True)
+    created_at = models.DateTimeField(verbose_name=_("created at"), auto_now_add=True)
+    started_at = models.DateTimeField(
+        verbose_name=_("started at"), null=True, blank=True
+    )
+    finished_at = models.DateTimeField(
+        verbose_name=_("finished at"), null=True, blank=True
+    )
+    # Updated whenever a running job makes progress
+    heartbeat_at = models.DateTimeField(
+        verbose_name=_("heartbeat at"), null=True, blank=True
+    )
+
+    class Meta:
+        ordering = ("created_at",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project_uuid"],
+                condition=models.Q(
+                    state__in=[LotteryJobState.QUEUED, LotteryJobState.RUNNING]
+                ),
+                name="lottery_job_unique_active_project",
+            )
+        ]
+
+    @property
+    def elapsed_time(self) -> Optional[timedelta]:
+        if self.started_at is None:
+            return None
+        return (self.finished_at or timezone.now()) - self.started_at
@@ -46,6 +46,12 @@ class ApartmentReservation(models.Model):
 
     class Meta:
         unique_together = [("apartment_uuid", "application_apartment")]
+        indexes = [
+            models.Index(
+                fields=["apartment_uuid", "queue_position"],
+                name="reservation_queue_idx",
+            )
+        ]
 
     @transaction.atomic
     def save(self, *args, **kwargs):
@@ -1,4 +1,9 @@
+from .batch import iter_project_contract_pdfs
 from .haso import create_haso_contract_pdf
 from .hitas import create_hitas_contract_pdf
 
-__all__ = ["create_haso_contract_pdf", "create_hitas_contract_pdf"]
+__all__ = [
+    "create_haso_contract_pdf",
+    "create_hitas_contract_pdf",
+    "iter_project_contract_pdfs",
+]
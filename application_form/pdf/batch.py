@@ -0,0 +1,142 @@
+from django.core.exceptions import ObjectDoesNotExist
+from io import BytesIO
+from typing import Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from apartment.elastic.queries import get_apartment_uuids, get_apartments_by_uuids
+from apartment_application_service.pdf import create_pdfs
+from application_form.enums import ApartmentReservationState
+from application_form.models import ApartmentReservation
+from invoicing.models import ProjectInstallmentTemplate
+
+from .haso import get_haso_contract_pdf_data, HASO_CONTRACT_PDF_TEMPLATE_FILE_NAME
+from .hitas import get_hitas_contract_pdf_data, HITAS_CONTRACT_PDF_TEMPLATE_FILE_NAME
+
+CONTRACT_EXPORT_CHUNK_SIZE = 500
+
+CONTRACT_TEMPLATE_FILE_NAMES = {
+    "hitas": HITAS_CONTRACT_PDF_TEMPLATE_FILE_NAME,
+    "haso": HASO_CONTRACT_PDF_TEMPLATE_FILE_NAME,
+}
+
+
+def get_project_contract_reservations(
+    project_uuid: UUID, state: Optional[ApartmentReservationState] = None
+):
+    """
+    Returns the reservations of the given project that have an application, with
+    everything the contracts need prefetched. The reservations are limited to the given
+    state, or to the ones that haven't been canceled if no state is given.
+    """
+    reservations = ApartmentReservation.objects.filter(
+        apartment_uuid__in=get_apartment_uuids(project_uuid),
+        application_apartment__isnull=False,
+    )
+    if state is not None:
+        reservations = reservations.filter(state=state)
+    else:
+        reservations = reservations.exclude(state=ApartmentReservationState.CANCELED)
+    return (
+        reservations.select_related(
+            "application_apartment__application__customer__primary_profile",
+            "application_apartment__application__customer__secondary_profile",
+        )
+        .prefetch_related("apartment_installments")
+        .order_by("id")
+    )
+
+
+def iter_project_contract_pdfs(
+    project_uuid: UUID, state: Optional[ApartmentReservationState] = None
+) -> Iterator[Tuple[str, BytesIO]]:
+    """
+    Returns an iterator of a file name and a contract PDF for each reservation of the
+    given project.
+
+    The apartment documents and the installment templates are fetched once for the
+    whole project. The reservations are handled in chunks, and the contracts of each
+    chunk are rendered in parallel by `create_pdfs()`.
+
+    The apartments of the reservations are checked before this returns, so that the
+    errors are raised before any contract has been rendered: ObjectDoesNotExist if an
+    apartment is not found, and ValueError if its ownership type is unknown.
+    """
+    reservations = get_project_contract_reservations(project_uuid, state)
+    apartment_uuids = {
+        str(apartment_uuid)
+        for apartment_uuid in reservations.order_by()
+        .values_list("apartment_uuid", flat=True)
+        .distinct()
+    }
+    apartments = get_apartments_by_uuids(apartment_uuids, include_project_fields=True)
+    missing_apartment_uuids = apartment_uuids - set(apartments)
+    if missing_apartment_uuids:
+        raise ObjectDoesNotExist(
+            f"Apartments not found: {', '.join(sorted(missing_apartment_uuids))}"
+        )
+    for apartment in apartments.values():
+        if _get_ownership_type(apartment) not in CONTRACT_TEMPLATE_FILE_NAMES:
+            raise ValueError(
+                f"Unknown ownership_type: {apartment.project_ownership_type}"
+            )
+    project_installment_templates = list(
+        ProjectInstallmentTemplate.objects.filter(project_uuid=project_uuid)
+    )
+    # the reservations of any apartments added after the check are left out
+    reservations = reservations.filter(apartment_uuid__in=apartment_uuids)
+    return _iter_contracts(reservations, apartments, project_installment_templates)
+
+
+def _iter_contracts(
+    reservations,
+    apartments: dict,
+    project_installment_templates: List[ProjectInstallmentTemplate],
+) -> Iterator[Tuple[str, BytesIO]]:
+    last_id = 0
+    while True:
+        # prefetch_related() doesn't work with iterator(), so the chunks are sliced
+        chunk = list(reservations.filter(id__gt=last_id)[:CONTRACT_EXPORT_CHUNK_SIZE])
+        if not chunk:
+            return
+        last_id = chunk[-1].id
+
+        yield from _render_contracts(chunk, apartments, project_installment_templates)
+
+
+def _get_ownership_type(apartment) -> str:
+    return (apartment.project_ownership_type or "").lower()
+
+
+def _render_contracts(
+    reservations: List[ApartmentReservation],
+    apartments: dict,
+    project_installment_templates: List[ProjectInstallmentTemplate],
+) -> Iterator[Tuple[str, BytesIO]]:
+    contracts = {ownership_type: [] for ownership_type in CONTRACT_TEMPLATE_FILE_NAMES}
+    for reservation in reservations:
+        apartment = apartments[str(reservation.apartment_uuid)]
+        ownership_type = _get_ownership_type(apartment)
+        if ownership_type == "hitas":
+            pdf_data = get_hitas_contract_pdf_data(
+                reservation,
+                apartment=apartment,
+                project_installment_templates=project_installment_templates,
+            )
+        else:
+            pdf_data = get_haso_contract_pdf_data(reservation, apartment=apartment)
+        contracts[ownership_type].append((reservation, apartment, pdf_data))
+
+    files = {}
+    for ownership_type, template_file_name in CONTRACT_TEMPLATE_FILE_NAMES.items():
+        items = contracts[ownership_type]
+        pdfs = create_pdfs(template_file_name, [pdf_data for _, _, pdf_data in items])
+        for (reservation, apartment, _), pdf in zip(items, pdfs):
+            file_name = (
+                f"{ownership_type}_sopimus_{apartment.apartment_number or ''}_"
+                f"{reservation.id}.pdf"
+            ).replace(" ", "_")
+            files[reservation.id] = (file_name, pdf)
+
+    # keep the archive in the order of the reservations
+    for reservation in reservations:
+        yield files[reservation.id]
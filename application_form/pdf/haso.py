@@ -90,17 +90,36 @@ class HasoContractPDFData(PDFData):
 
 
 def create_haso_contract_pdf(reservation: ApartmentReservation) -> BytesIO:
+    pdf_data = get_haso_contract_pdf_data(reservation)
+    return create_pdf(HASO_CONTRACT_PDF_TEMPLATE_FILE_NAME, pdf_data)
+
+
+def get_haso_contract_pdf_data(
+    reservation: ApartmentReservation, apartment=None
+) -> HasoContractPDFData:
+    """
+    Builds the contract data of the reservation. The apartment document (with the
+    project fields) can be given when it has already been fetched.
+    """
     customer = SafeAttributeObject(
         reservation.application_apartment.application.customer
     )
     primary_profile = SafeAttributeObject(customer.primary_profile)
     secondary_profile = SafeAttributeObject(customer.secondary_profile)
-    apartment = get_apartment(reservation.apartment_uuid, include_project_fields=True)
+    if apartment is None:
+        apartment = get_apartment(
+            reservation.apartment_uuid, include_project_fields=True
+        )
 
     first_payment = SafeAttributeObject(
-        reservation.apartment_installments.filter(
-            type=InstallmentType.PAYMENT_1
-        ).first()
+        next(
+            (
+                installment
+                for installment in reservation.apartment_installments.all()
+                if installment.type == InstallmentType.PAYMENT_1
+            ),
+            None,
+        )
     )
 
     completion_start = apartment.project_contract_apartment_completion_selection_2_start
@@ -168,4 +187,4 @@ def create_haso_contract_pdf(reservation: ApartmentReservation) -> BytesIO:
         index_increment=None,
     )
 
-    return create_pdf(HASO_CONTRACT_PDF_TEMPLATE_FILE_NAME, pdf_data)
+    return pdf_data
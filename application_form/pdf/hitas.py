@@ -3,7 +3,7 @@ from datetime import date, datetime
 from decimal import Decimal
 from io import BytesIO
 from num2words import num2words
-from typing import ClassVar, Dict, Union
+from typing import ClassVar, Dict, List, Optional, Union
 
 from apartment.elastic.queries import get_apartment
 from apartment_application_service.pdf import create_pdf, PDFCurrencyField, PDFData
@@ -221,24 +221,40 @@ class HitasContractPDFData(PDFData):
 
 
 def create_hitas_contract_pdf(reservation: ApartmentReservation) -> BytesIO:
+    pdf_data = get_hitas_contract_pdf_data(reservation)
+    return create_pdf(HITAS_CONTRACT_PDF_TEMPLATE_FILE_NAME, pdf_data)
+
+
+def get_hitas_contract_pdf_data(
+    reservation: ApartmentReservation,
+    apartment=None,
+    project_installment_templates: Optional[List[ProjectInstallmentTemplate]] = None,
+) -> HitasContractPDFData:
+    """
+    Builds the contract data of the reservation. The apartment document (with the
+    project fields) and the installment templates of the project can be given when
+    they have already been fetched, otherwise they are fetched here.
+    """
     customer = SafeAttributeObject(
         reservation.application_apartment.application.customer
     )
 
     primary_profile = SafeAttributeObject(customer.primary_profile)
     secondary_profile = SafeAttributeObject(customer.secondary_profile)
-    apartment = SafeAttributeObject(
-        get_apartment(reservation.apartment_uuid, include_project_fields=True)
-    )
+    if apartment is None:
+        apartment = get_apartment(
+            reservation.apartment_uuid, include_project_fields=True
+        )
+    apartment = SafeAttributeObject(apartment)
 
-    project_installment_templates = ProjectInstallmentTemplate.objects.filter(
-        project_uuid=apartment.project_uuid
-    )
+    # .all() makes use of the installments prefetched by the batch generation
+    installments = {
+        installment.type: installment
+        for installment in reservation.apartment_installments.all()
+    }
 
     payment_1, payment_2, payment_3, payment_4, payment_5, payment_6, payment_7 = [
-        SafeAttributeObject(
-            reservation.apartment_installments.filter(type=payment_type).first()
-        )
+        SafeAttributeObject(installments.get(payment_type))
         for payment_type in (
             InstallmentType.PAYMENT_1,
             InstallmentType.PAYMENT_2,
@@ -250,11 +266,7 @@ def create_hitas_contract_pdf(reservation: ApartmentReservation) -> BytesIO:
         )
     ]
 
-    down_payment = SafeAttributeObject(
-        reservation.apartment_installments.filter(
-            type=InstallmentType.DOWN_PAYMENT
-        ).first()
-    )
+    down_payment = SafeAttributeObject(installments.get(InstallmentType.DOWN_PAYMENT))
 
     def hitas_price(cents: Union[int, None]) -> Union[PDFCurrencyField, None]:
         if cents is None:
@@ -265,9 +277,12 @@ def create_hitas_contract_pdf(reservation: ApartmentReservation) -> BytesIO:
             suffix=" €",
         )
 
-    project_installment_templates = list(
-        ProjectInstallmentTemplate.objects.filter(project_uuid=apartment.project_uuid)
-    )
+    if project_installment_templates is None:
+        project_installment_templates = list(
+            ProjectInstallmentTemplate.objects.filter(
+                project_uuid=apartment.project_uuid
+            )
+        )
 
     def get_percentage(apartment_installment):
         installment_template = next(
@@ -407,4 +422,4 @@ def create_hitas_contract_pdf(reservation: ApartmentReservation) -> BytesIO:
         salesperson=None,
     )
 
-    return create_pdf(HITAS_CONTRACT_PDF_TEMPLATE_FILE_NAME, pdf_data)
+    return pdf_data
@@ -0,0 +1,345 @@
+import uuid
+from collections import defaultdict
+from django.db import transaction
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from application_form.enums import (
+    ApartmentQueueChangeEventType,
+    ApartmentReservationState,
+)
+from application_form.models import (
+    ApartmentQueueChangeEvent,
+    ApartmentReservation,
+    ApartmentReservationStateChangeEvent,
+    LotteryEvent,
+    LotteryEventResult,
+)
+from application_form.services.lottery.utils import _mark_project_lottery_completed
+
+_BULK_BATCH_SIZE = 1000
+
+
+class LotteryEngine:
+    """
+    In-memory representation of the apartment queues of a single project.
+
+    All the reservations of the given apartments are loaded once, together with their
+    application apartments and applications. The lottery operations modify the loaded
+    reservations and collect the events they would create, and `save()` writes all the
+    changes back to the database in bulk.
+
+    The operations mirror the database-backed ones in `application_form.services`, so
+    running a lottery through the engine produces the same result. An application
+    always targets the apartments of a single project, so the loaded reservations
+    cover every queue the lottery can modify. If `project_uuid` is given, the lottery
+    of the project is marked as completed when lottery results are saved.
+    """
+
+    def __init__(
+        self,
+        apartment_uuids: Iterable[uuid.UUID],
+        project_uuid: Optional[uuid.UUID] = None,
+    ):
+        self.project_uuid = project_uuid
+        self.apartment_uuids = [
+            _to_uuid(apartment_uuid) for apartment_uuid in apartment_uuids
+        ]
+        self._reservations_by_apartment: Dict[
+            uuid.UUID, List[ApartmentReservation]
+        ] = defaultdict(list)
+        self._reservations_by_application: Dict[
+            int, List[ApartmentReservation]
+        ] = defaultdict(list)
+        self._removed_reservation_ids: Set[int] = set()
+        self._recorded_apartment_uuids: Set[uuid.UUID] = set()
+        self._changed_reservations: Dict[int, ApartmentReservation] = {}
+        self._lottery_results: Dict[uuid.UUID, List[Tuple[int, int]]] = {}
+        self._state_change_events: List[ApartmentReservationStateChangeEvent] = []
+        self._queue_change_events: List[ApartmentQueueChangeEvent] = []
+        self._load()
+
+    def _load(self) -> None:
+        reservations = (
+            ApartmentReservation.objects.filter(apartment_uuid__in=self.apartment_uuids)
+            .select_related("application_apartment__application")
+            .order_by("id")
+        )
+        for reservation in reservations:
+            self._reservations_by_apartment[reservation.apartment_uuid].append(
+                reservation
+            )
+            if reservation.application_apartment is not None:
+                application_id = reservation.application_apartment.application_id
+                self._reservations_by_application[application_id].append(reservation)
+
+        self._removed_reservation_ids = set(
+            ApartmentQueueChangeEvent.objects.filter(
+                queue_application__apartment_uuid__in=self.apartment_uuids,
+                type=ApartmentQueueChangeEventType.REMOVED,
+            ).values_list("queue_application_id", flat=True)
+        )
+        self._recorded_apartment_uuids = set(
+            LotteryEvent.objects.filter(
+                apartment_uuid__in=self.apartment_uuids
+            ).values_list("apartment_uuid", flat=True)
+        )
+
+    def get_reservations(self, apartment_uuid: uuid.UUID) -> List[ApartmentReservation]:
+        """
+        Returns the reservations of the given apartment that belong to an application,
+        ordered by the id of the application apartment.
+        """
+        return sorted(
+            (
+                reservation
+                for reservation in self._reservations_by_apartment[
+                    _to_uuid(apartment_uuid)
+                ]
+                if reservation.application_apartment is not None
+            ),
+            key=lambda reservation: reservation.application_apartment_id,
+        )
+
+    def get_queue(self, apartment_uuid: uuid.UUID) -> List[ApartmentReservation]:
+        """
+        Returns the reservations still in the queue of the given apartment, ordered by
+        their position in the queue. This is the in-memory counterpart of
+        `get_ordered_applications()`.
+        """
+        return sorted(
+            (
+                reservation
+                for reservation in self.get_reservations(apartment_uuid)
+                if reservation.id not in self._removed_reservation_ids
+            ),
+            key=lambda reservation: (
+                reservation.queue_position is None,
+                reservation.queue_position or 0,
+                reservation.id,
+            ),
+        )
+
+    def set_queue_position(
+        self, reservation: ApartmentReservation, position: Optional[int]
+    ) -> None:
+        reservation.queue_position = position
+        self._changed_reservations[reservation.id] = reservation
+
+    def set_state(
+        self, reservation: ApartmentReservation, state: ApartmentReservationState
+    ) -> None:
+        self._state_change_events.append(
+            ApartmentReservationStateChangeEvent(
+                reservation=reservation, state=state, comment=""
+            )
+        )
+        reservation.state = state
+        self._changed_reservations[reservation.id] = reservation
+
+    def record_lottery_result(self, apartment_uuid: uuid.UUID) -> None:
+        """
+        Records the current queue of the given apartment as its lottery result, unless
+        a result has already been recorded. See `_save_application_order()`.
+        """
+        apartment_uuid = _to_uuid(apartment_uuid)
+        if apartment_uuid in self._recorded_apartment_uuids:
+            return  # don't record it twice
+        self._recorded_apartment_uuids.add(apartment_uuid)
+        self._lottery_results[apartment_uuid] = [
+            (reservation.application_apartment_id, reservation.queue_position)
+            for reservation in self.get_reservations(apartment_uuid)
+        ]
+
+    def reserve_apartments(
+        self,
+        apartment_uuids: Iterable[uuid.UUID],
+        cancel_lower_priority_reserved: bool = True,
+    ) -> None:
+        """See `application_form.services.application._reserve_apartments()`."""
+        apartments_to_process = set(list(apartment_uuids))
+        while apartments_to_process:
+            for apartment_uuid in apartments_to_process.copy():
+                apartments_to_process.remove(apartment_uuid)
+                winner = self.reserve_apartment(apartment_uuid)
+                if winner is None:
+                    continue
+                canceled_winners = self.cancel_lower_priority_reservations(
+                    winner, cancel_lower_priority_reserved
+                )
+                apartments_to_process.update(
+                    reservation.apartment_uuid for reservation in canceled_winners
+                )
+
+    def reserve_apartment(
+        self, apartment_uuid: uuid.UUID
+    ) -> Optional[ApartmentReservation]:
+        """Marks the first reservation in the queue of the apartment as reserved."""
+        queue = self.get_queue(apartment_uuid)
+        if not queue:
+            return None
+        winner = queue[0]
+        self.set_state(winner, ApartmentReservationState.RESERVED)
+        return winner
+
+    def cancel_lower_priority_reservations(
+        self, reservation: ApartmentReservation, cancel_reserved: bool = True
+    ) -> List[ApartmentReservation]:
+        """
+        See `application_form.services.application._cancel_lower_priority_apartments()`.
+        """
+        states_to_cancel = [ApartmentReservationState.SUBMITTED]
+        if cancel_reserved:
+            states_to_cancel.append(ApartmentReservationState.RESERVED)
+        application_apartment = reservation.application_apartment
+        lower_priority_reservations = sorted(
+            (
+                other
+                for other in self._reservations_by_application[
+                    application_apartment.application_id
+                ]
+                if other.application_apartment.priority_number
+                > application_apartment.priority_number
+                and other.state in states_to_cancel
+            ),
+            key=lambda other: other.application_apartment_id,
+        )
+        canceled_winners = []
+        for other in lower_priority_reservations:
+            if other.queue_position == 0:
+                canceled_winners.append(other)
+            self.cancel_reservation(other)
+        return canceled_winners
+
+    def reserve_haso_apartment(self, apartment_uuid: uuid.UUID) -> None:
+        """
+        Declares the winner of the given HASO apartment based on the right of residence
+        numbers, which have been decrypted once when loading the reservations.
+        See `application_form.services.application._reserve_haso_apartment()`.
+        """
+        queue = self.get_queue(apartment_uuid)
+        if not queue:
+            return
+
+        # There can be a single winner, or multiple winners if there are several
+        # winning candidates with the same right of residence number.
+        min_right_of_residence = _get_right_of_residence(queue[0])
+        winners = [
+            reservation
+            for reservation in queue
+            if _get_right_of_residence(reservation) == min_right_of_residence
+        ]
+
+        # Set the reservation state to either "RESERVED" or "REVIEW"
+        state = ApartmentReservationState.RESERVED
+        if len(winners) > 1:
+            state = ApartmentReservationState.REVIEW
+        for winner in winners:
+            self.set_state(winner, state)
+
+        for winner in winners:
+            self.cancel_lower_priority_haso_reservations(winner)
+
+    def cancel_lower_priority_haso_reservations(
+        self, reservation: ApartmentReservation
+    ) -> None:
+        """
+        Cancels the submitted reservations of the same application that have a lower
+        priority than the given one and are not first in their queue.
+        See `_cancel_lower_priority_haso_applications()`.
+        """
+        application_apartment = reservation.application_apartment
+        lower_priority_reservations = sorted(
+            (
+                other
+                for other in self._reservations_by_application[
+                    application_apartment.application_id
+                ]
+                if other.application_apartment.priority_number
+                > application_apartment.priority_number
+                and other.state == ApartmentReservationState.SUBMITTED
+                and other.queue_position is not None
+                and other.queue_position > 1
+            ),
+            key=lambda other: other.application_apartment_id,
+        )
+        for other in lower_priority_reservations:
+            self.cancel_reservation(other)
+
+    def cancel_reservation(self, reservation: ApartmentReservation) -> None:
+        """
+        Cancels the reservation and removes it from the queue of the apartment. If the
+        reservation had won the apartment, the winner is recalculated.
+        See `application_form.services.application.cancel_reservation()`.
+        """
+        was_reserved = reservation.state is not ApartmentReservationState.SUBMITTED
+        old_queue_position = reservation.queue_position
+        self.set_queue_position(reservation, None)
+        if old_queue_position is not None:
+            for other in self._reservations_by_apartment[reservation.apartment_uuid]:
+                if (
+                    other.queue_position is not None
+                    and other.queue_position >= old_queue_position
+                ):
+                    self.set_queue_position(other, other.queue_position - 1)
+        self.set_state(reservation, ApartmentReservationState.CANCELED)
+        self._queue_change_events.append(
+            ApartmentQueueChangeEvent(
+                queue_application=reservation,
+                type=ApartmentQueueChangeEventType.REMOVED,
+                comment="",
+            )
+        )
+        self._removed_reservation_ids.add(reservation.id)
+
+        if was_reserved:
+            self.reserve_apartments([reservation.apartment_uuid], False)
+
+    @transaction.atomic
+    def save(self) -> None:
+        """Writes all the changes made by the engine to the database in bulk."""
+        ApartmentReservation.objects.bulk_update(
+            self._changed_reservations.values(),
+            ["queue_position", "state"],
+            batch_size=_BULK_BATCH_SIZE,
+        )
+        lottery_events = LotteryEvent.objects.bulk_create(
+            [
+                LotteryEvent(apartment_uuid=apartment_uuid)
+                for apartment_uuid in self._lottery_results
+            ]
+        )
+        LotteryEventResult.objects.bulk_create(
+            [
+                LotteryEventResult(
+                    event=event,
+                    application_apartment_id=application_apartment_id,
+                    result_position=result_position,
+                )
+                for event in lottery_events
+                for application_apartment_id, result_position in self._lottery_results[
+                    event.apartment_uuid
+                ]
+            ],
+            batch_size=_BULK_BATCH_SIZE,
+        )
+        ApartmentReservationStateChangeEvent.objects.bulk_create(
+            self._state_change_events, batch_size=_BULK_BATCH_SIZE
+        )
+        ApartmentQueueChangeEvent.objects.bulk_create(
+            self._queue_change_events, batch_size=_BULK_BATCH_SIZE
+        )
+        if lottery_events and self.project_uuid is not None:
+            _mark_project_lottery_completed(self.project_uuid)
+
+        self._changed_reservations = {}
+        self._lottery_results = {}
+        self._state_change_events = []
+        self._queue_change_events = []
+
+
+def _to_uuid(value) -> uuid.UUID:
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def _get_right_of_residence(reservation: ApartmentReservation) -> Optional[int]:
+    return reservation.application_apartment.application.right_of_residence
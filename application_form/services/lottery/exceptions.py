@@ -12,3 +12,14 @@ class ApplicationTimeNotFinishedException(Exception):
         self, msg="Project's application time is not finished.", *args, **kwargs
     ):
         super().__init__(msg, *args, **kwargs)
+
+
+class LotteryJobAlreadyQueuedException(Exception):
+    """
+    Raises when the lottery of the project is already queued or running.
+    """
+
+    def __init__(
+        self, msg="The lottery of the project is already queued.", *args, **kwargs
+    ):
+        super().__init__(msg, *args, **kwargs)
@@ -0,0 +1,201 @@
+import json
+import logging
+import threading
+import uuid
+from datetime import timedelta
+from django.db import connections, DatabaseError, IntegrityError, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from typing import Optional
+
+from apartment.elastic.queries import get_apartment_uuids
+from application_form.enums import LotteryJobState
+from application_form.models import LotteryJob
+from application_form.services.lottery.exceptions import (
+    LotteryJobAlreadyQueuedException,
+)
+from application_form.services.lottery.machine import distribute_apartments
+from application_form.services.lottery.utils import (
+    _validate_project_application_time_has_finished,
+    _validate_project_has_applications,
+)
+
+_logger = logging.getLogger(__name__)
+
+# A running job that hasn't reported any progress for this long is considered to be
+# abandoned by its worker
+LOTTERY_JOB_TIMEOUT = timedelta(minutes=30)
+
+# How often a worker refreshes the heartbeat of the job it is running
+LOTTERY_JOB_HEARTBEAT_INTERVAL = timedelta(minutes=1)
+
+
+def enqueue_lottery(project_uuid: uuid.UUID) -> LotteryJob:
+    """
+    Queues the lottery of the given project to be run by a worker. The project is
+    validated right away, so that the caller gets the validation errors immediately.
+    Only one lottery job can be queued or running for a project at a time.
+    """
+    _validate_project_has_applications(project_uuid)
+    _validate_project_application_time_has_finished(project_uuid)
+    try:
+        with transaction.atomic():
+            return LotteryJob.objects.create(project_uuid=project_uuid)
+    except IntegrityError as e:
+        raise LotteryJobAlreadyQueuedException() from e
+
+
+def run_next_lottery_job() -> Optional[LotteryJob]:
+    """
+    Runs the oldest queued lottery job, if there is one. The job is locked when it is
+    picked, so several workers can safely process the same queue.
+    """
+    fail_stale_lottery_jobs()
+    with transaction.atomic():
+        job = (
+            LotteryJob.objects.select_for_update(skip_locked=True)
+            .filter(state=LotteryJobState.QUEUED)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.state = LotteryJobState.RUNNING
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=("state", "started_at", "heartbeat_at"))
+
+    with _Heartbeat(job):
+        try:
+            job.apartment_progress = {
+                str(apartment_uuid): False
+                for apartment_uuid in get_apartment_uuids(job.project_uuid)
+            }
+        except Exception as e:
+            _logger.exception("Could not start lottery job %s", job.id)
+            _finish_job(job, LotteryJobState.FAILED, str(e))
+            return job
+        job.save(update_fields=("apartment_progress",))
+
+        run_lottery_job(job)
+    return job
+
+
+def fail_stale_lottery_jobs() -> int:
+    """
+    Marks the running jobs whose worker has stopped reporting progress as failed. The
+    jobs are not queued again, since their lottery may have been committed already.
+    """
+    now = timezone.now()
+    count = (
+        LotteryJob.objects.filter(state=LotteryJobState.RUNNING)
+        .annotate(last_seen_at=Coalesce("heartbeat_at", "started_at"))
+        .filter(last_seen_at__lt=now - LOTTERY_JOB_TIMEOUT)
+        .update(
+            state=LotteryJobState.FAILED,
+            error="The lottery job timed out.",
+            finished_at=now,
+        )
+    )
+    if count:
+        _logger.warning("Marked %s stale lottery jobs as failed", count)
+    return count
+
+
+def run_lottery_job(job: LotteryJob) -> None:
+    """
+    Runs the lottery of the given job and stores the outcome in the job.
+
+    The lottery is run in a single transaction, so the progress is saved through a
+    database connection of its own, which makes it visible to the status endpoint
+    before the lottery has been committed.
+    """
+    progress_connection = connections.create_connection("default")
+
+    def report_progress(apartment_uuid: uuid.UUID) -> None:
+        job.apartment_progress[str(apartment_uuid)] = True
+        _save_progress(progress_connection, job)
+
+    try:
+        distribute_apartments(job.project_uuid, progress_callback=report_progress)
+    except Exception as e:
+        _logger.exception("Lottery job %s failed", job.id)
+        _finish_job(job, LotteryJobState.FAILED, str(e))
+    else:
+        _finish_job(job, LotteryJobState.SUCCEEDED)
+    finally:
+        progress_connection.close()
+
+
+def _finish_job(job: LotteryJob, state: LotteryJobState, error: str = "") -> None:
+    """
+    Stores the outcome of the job, unless the job is no longer running, e.g. because
+    it has been marked as failed by `fail_stale_lottery_jobs()`.
+    """
+    finished_at = timezone.now()
+    finished = LotteryJob.objects.filter(
+        pk=job.pk, state=LotteryJobState.RUNNING
+    ).update(
+        state=state,
+        apartment_progress=job.apartment_progress,
+        error=error,
+        finished_at=finished_at,
+    )
+    if not finished:
+        _logger.warning(
+            "Lottery job %s was no longer running, so it was not marked as %s",
+            job.id,
+            state.value,
+        )
+        job.refresh_from_db()
+        return
+    job.state = state
+    job.error = error
+    job.finished_at = finished_at
+
+
+class _Heartbeat:
+    """
+    Refreshes the heartbeat of a running job from a thread of its own, so that the job
+    isn't considered stale during the phases of the lottery that report no progress,
+    such as writing the results.
+    """
+
+    def __init__(self, job: LotteryJob):
+        self.job_id = job.pk
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        interval = LOTTERY_JOB_HEARTBEAT_INTERVAL.total_seconds()
+        try:
+            while not self._stopped.wait(interval):
+                try:
+                    LotteryJob.objects.filter(
+                        pk=self.job_id, state=LotteryJobState.RUNNING
+                    ).update(heartbeat_at=timezone.now())
+                except DatabaseError:
+                    _logger.exception(
+                        "Could not refresh the heartbeat of lottery job %s",
+                        self.job_id,
+                    )
+        finally:
+            # the connections of this thread
+            connections.close_all()
+
+
+def _save_progress(progress_connection, job: LotteryJob) -> None:
+    job.heartbeat_at = timezone.now()
+    with progress_connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {LotteryJob._meta.db_table} "
+            "SET apartment_progress = %s::jsonb, heartbeat_at = %s WHERE id = %s",
+            [json.dumps(job.apartment_progress), job.heartbeat_at, job.pk],
+        )
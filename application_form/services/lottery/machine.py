@@ -1,5 +1,6 @@
 import uuid
 from django.utils.translation import ugettext_lazy as _
+from typing import Callable, Optional
 
 from apartment.elastic.queries import get_projects
 from apartment.enums import OwnershipType
@@ -11,18 +12,25 @@ from application_form.services.lottery.utils import (
 )
 
 
-def distribute_apartments(project_uuid: uuid.UUID) -> None:
+def distribute_apartments(
+    project_uuid: uuid.UUID,
+    progress_callback: Optional[Callable[[uuid.UUID], None]] = None,
+) -> None:
+    """
+    Runs the lottery of the given project. If given, `progress_callback` is called with
+    the UUID of each apartment once the lottery of the apartment has been drawn.
+    """
     _validate_project_has_applications(project_uuid)
     _validate_project_application_time_has_finished(project_uuid)
 
     project = get_projects(project_uuid)[0]
     if project.project_ownership_type.lower() == OwnershipType.HASO.value:
-        _distribute_haso_apartments(project_uuid)
+        _distribute_haso_apartments(project_uuid, progress_callback)
     elif project.project_ownership_type.lower() in [
         OwnershipType.HITAS.value,
         OwnershipType.HALF_HITAS.value,
     ]:
-        _distribute_hitas_apartments(project_uuid)
+        _distribute_hitas_apartments(project_uuid, progress_callback)
     else:
         raise NotImplementedError(
             _(
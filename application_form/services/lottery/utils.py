@@ -1,19 +1,29 @@
 import uuid
 from django.utils import timezone
+from typing import Iterable, Optional, Set
 
-from apartment.elastic.queries import get_apartment_uuids, get_projects
+from apartment.elastic.queries import get_apartment, get_apartment_uuids, get_projects
 from application_form.exceptions import ProjectDoesNotHaveApplicationsException
-from application_form.models import ApartmentReservation, Application, LotteryEvent
+from application_form.models import (
+    ApartmentReservation,
+    Application,
+    LotteryEvent,
+    ProjectLotteryStatus,
+)
 from application_form.services.lottery.exceptions import (
     ApplicationTimeNotFinishedException,
 )
 
 
-def _save_application_order(apartment_uuid: uuid.UUID) -> None:
+def _save_application_order(
+    apartment_uuid: uuid.UUID, project_uuid: Optional[uuid.UUID] = None
+) -> None:
     """
     Persist the apartment queue for the given apartment in the database.
     This creates a new lottery event for the apartment and associates the apartment
-    applications to that event in the order of their current queue position.
+    applications to that event in the order of their current queue position. The
+    lottery of the project of the apartment is marked as completed; the project is
+    looked up from Elasticsearch if not given.
 
     If the apartment queue has already been recorded, then this function does nothing;
     a lottery is performed only once and therefore its result is stored only once.
@@ -27,6 +37,31 @@ def _save_application_order(apartment_uuid: uuid.UUID) -> None:
             application_apartment=apartment_reservation.application_apartment,
             result_position=apartment_reservation.queue_position,
         )
+    if project_uuid is None:
+        project_uuid = get_apartment(
+            apartment_uuid, include_project_fields=True
+        ).project_uuid
+    _mark_project_lottery_completed(project_uuid)
+
+
+def _mark_project_lottery_completed(project_uuid: uuid.UUID) -> None:
+    ProjectLotteryStatus.objects.get_or_create(project_uuid=project_uuid)
+
+
+def get_lottery_completed_project_uuids(project_uuids: Iterable[uuid.UUID]) -> Set[str]:
+    """
+    Returns the uuids of the given projects whose lottery has been completed, with a
+    single query.
+
+    The lotteries performed before the lottery status was stored are not included
+    until the `update_project_lottery_statuses` command has been run.
+    """
+    return {
+        str(project_uuid)
+        for project_uuid in ProjectLotteryStatus.objects.filter(
+            project_uuid__in=[str(project_uuid) for project_uuid in project_uuids]
+        ).values_list("project_uuid", flat=True)
+    }
 
 
 def _validate_project_has_applications(project_uuid: uuid.UUID):
@@ -108,14 +108,25 @@ def _calculate_queue_position(
     submitted_late = application_apartment.application.submitted_late
     all_reservations = ApartmentReservation.objects.filter(
         apartment_uuid=apartment_uuid
-    ).only("queue_position", "application_apartment__application__right_of_residence")
-    reservations = all_reservations.filter(
-        application_apartment__application__submitted_late=submitted_late
-    ).order_by("queue_position")
-    for apartment_reservation in reservations:
-        other_application = apartment_reservation.application_apartment.application
-        if right_of_residence < other_application.right_of_residence:
-            return apartment_reservation.queue_position
+    )
+    # The pool is already ordered by the right of residence number, so the new
+    # application goes right before the first one with a larger number. The numbers
+    # are decrypted and compared by the database, which still has to decrypt the
+    # number of every reservation in the pool, as the numbers are stored encrypted.
+    next_position = (
+        all_reservations.filter(
+            application_apartment__application__submitted_late=submitted_late,
+            application_apartment__application__right_of_residence__gt=(
+                right_of_residence
+            ),
+            queue_position__isnull=False,
+        )
+        .order_by("queue_position")
+        .values_list("queue_position", flat=True)
+        .first()
+    )
+    if next_position is not None:
+        return next_position
     return all_reservations.count() + 1
 
 
@@ -125,6 +136,11 @@ def _shift_queue_positions(
     """
     Shifts all items in the queue by one by either incrementing or decrementing their
     positions, depending on whether the item was added or deleted from the queue.
+
+    The positions are shifted with a single UPDATE statement. The queue positions are
+    shown to the users as consecutive numbers, so the statement still writes every
+    row after the changed position, and adding to the queue takes time linear in the
+    length of the queue.
     """
     # We only need to update the positions in the queue that are >= from_position
     reservations = ApartmentReservation.objects.filter(
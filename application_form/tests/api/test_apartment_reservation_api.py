@@ -1,8 +1,10 @@
 import pytest
 import uuid
+import zipfile
 from datetime import date
 from decimal import Decimal
 from django.urls import reverse
+from io import BytesIO
 
 from apartment.tests.factories import ApartmentDocumentFactory
 from application_form.enums import ApartmentReservationState
@@ -163,6 +165,86 @@ def test_contract_pdf_creation(profile_api_client, ownership_type):
     assert bytes(test_value, encoding="utf-8") in response.content
 
 
+@pytest.mark.django_db
+def test_contract_pdf_etag(profile_api_client):
+    apartment = ApartmentDocumentFactory(project_ownership_type="Hitas")
+    reservation = ApartmentReservationFactory(apartment_uuid=apartment.uuid)
+    url = reverse(
+        "application_form:sales-apartment-reservation-contract",
+        kwargs={"pk": reservation.id},
+    )
+
+    response = profile_api_client.get(url)
+    assert response.status_code == 200
+    assert response["ETag"]
+
+    response = profile_api_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize("ownership_type", ("HASO", "Hitas"))
+@pytest.mark.django_db
+def test_project_contracts_zip_creation(salesperson_api_client, ownership_type):
+    apartment = ApartmentDocumentFactory(project_ownership_type=ownership_type)
+    reserved = ApartmentReservationFactory(
+        apartment_uuid=apartment.uuid, state=ApartmentReservationState.RESERVED
+    )
+    sold = ApartmentReservationFactory(
+        apartment_uuid=apartment.uuid, state=ApartmentReservationState.SOLD
+    )
+    ApartmentReservationFactory(
+        apartment_uuid=apartment.uuid, state=ApartmentReservationState.CANCELED
+    )
+    url = reverse(
+        "apartment:project-contracts", kwargs={"project_uuid": apartment.project_uuid}
+    )
+
+    response = salesperson_api_client.get(url)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/zip"
+    archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+    file_names = archive.namelist()
+    assert len(file_names) == 2
+    assert file_names[0].startswith(f"{ownership_type.lower()}_sopimus_")
+    assert file_names[0].endswith(f"_{reserved.id}.pdf")
+    assert file_names[1].endswith(f"_{sold.id}.pdf")
+
+    response = salesperson_api_client.get(url + "?state=sold")
+    assert response.status_code == 200
+    archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+    assert archive.namelist() == [file_names[1]]
+
+    response = salesperson_api_client.get(url + "?state=offered")
+    assert response.status_code == 404
+
+    response = salesperson_api_client.get(url + "?state=foo")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_project_contracts_zip_unknown_ownership_type(salesperson_api_client):
+    apartment = ApartmentDocumentFactory(project_ownership_type="Puolihitas")
+    ApartmentReservationFactory(apartment_uuid=apartment.uuid)
+    url = reverse(
+        "apartment:project-contracts", kwargs={"project_uuid": apartment.project_uuid}
+    )
+
+    response = salesperson_api_client.get(url)
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_project_contracts_zip_requires_salesperson(profile_api_client):
+    apartment = ApartmentDocumentFactory(project_ownership_type="Hitas")
+    ApartmentReservationFactory(apartment_uuid=apartment.uuid)
+    url = reverse(
+        "apartment:project-contracts", kwargs={"project_uuid": apartment.project_uuid}
+    )
+
+    response = profile_api_client.get(url)
+    assert response.status_code == 403
+
+
 @pytest.mark.parametrize("comment", ("Foo", ""))
 @pytest.mark.django_db
 def test_apartment_reservation_set_state(user_api_client, comment):
@@ -20,7 +20,7 @@ from application_form.tests.utils import (
     get_elastic_apartments_uuids,
 )
 from connections.tests.factories import ApartmentMinimalFactory
-from users.tests.factories import ProfileFactory, UserFactory
+from users.tests.factories import ProfileFactory, SalespersonProfileFactory, UserFactory
 from users.tests.utils import _create_token
 
 faker.config.DEFAULT_LOCALE = "fi_FI"
@@ -39,6 +39,14 @@ def profile_api_client():
     return api_client
 
 
+@fixture
+def salesperson_api_client():
+    api_client = APIClient()
+    profile = SalespersonProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    return api_client
+
+
 @fixture
 def user_api_client():
     api_client = APIClient()
@@ -1,8 +1,20 @@
 import pytest
+import time
+import uuid
+from datetime import timedelta
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 
-from application_form.enums import ApplicationType
+from application_form.enums import ApplicationType, LotteryJobState
+from application_form.models import LotteryEvent, LotteryJob
+from application_form.services.lottery import jobs
+from application_form.services.lottery.jobs import (
+    _finish_job,
+    _Heartbeat,
+    LOTTERY_JOB_TIMEOUT,
+    run_next_lottery_job,
+)
 from application_form.services.queue import add_application_to_queues
 from application_form.tests.factories import ApplicationFactory
 from users.tests.factories import SalespersonProfileFactory
@@ -138,3 +150,159 @@ def test_execute_haso_lottery_for_project_post_without_applications(
         reverse("application_form:execute_lottery_for_project"), data, format="json"
     )
     assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_execute_lottery_for_project_as_job(
+    api_client, elastic_hitas_project_application_end_time_finished
+):
+    profile = SalespersonProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    project_uuid, apartment = elastic_hitas_project_application_end_time_finished
+
+    app = ApplicationFactory(type=ApplicationType.HITAS)
+    app.application_apartments.create(apartment_uuid=apartment.uuid, priority_number=0)
+    add_application_to_queues(app)
+
+    data = {"project_uuid": project_uuid, "job": True}
+    response = api_client.post(
+        reverse("application_form:execute_lottery_for_project"), data, format="json"
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job_id = response.json()["job_id"]
+    # The lottery should only have been queued
+    assert LotteryJob.objects.get(pk=job_id).state == LotteryJobState.QUEUED
+    assert not LotteryEvent.objects.filter(apartment_uuid=apartment.uuid).exists()
+
+    response = api_client.get(
+        reverse("application_form:lottery_job_status", kwargs={"job_id": job_id})
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["state"] == "queued"
+    assert response.json()["elapsed_seconds"] is None
+
+    assert str(run_next_lottery_job().id) == job_id
+    assert run_next_lottery_job() is None
+
+    response = api_client.get(
+        reverse("application_form:lottery_job_status", kwargs={"job_id": job_id})
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["state"] == "succeeded"
+    assert data["apartment_progress"][str(apartment.uuid)] is True
+    assert data["processed_apartment_count"] == data["apartment_count"]
+    assert data["elapsed_seconds"] >= 0
+    assert data["error"] == ""
+
+
+@pytest.mark.django_db
+def test_execute_lottery_for_project_as_job_without_applications(
+    api_client, elastic_hitas_project_with_5_apartments
+):
+    profile = SalespersonProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    project_uuid, apartments = elastic_hitas_project_with_5_apartments
+
+    data = {"project_uuid": project_uuid, "job": True}
+    response = api_client.post(
+        reverse("application_form:execute_lottery_for_project"), data, format="json"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not LotteryJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_execute_lottery_for_project_as_job_already_queued(
+    api_client, elastic_hitas_project_application_end_time_finished
+):
+    profile = SalespersonProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    project_uuid, apartment = elastic_hitas_project_application_end_time_finished
+
+    app = ApplicationFactory(type=ApplicationType.HITAS)
+    app.application_apartments.create(apartment_uuid=apartment.uuid, priority_number=0)
+    add_application_to_queues(app)
+
+    data = {"project_uuid": project_uuid, "job": True}
+    response = api_client.post(
+        reverse("application_form:execute_lottery_for_project"), data, format="json"
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    response = api_client.post(
+        reverse("application_form:execute_lottery_for_project"), data, format="json"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert LotteryJob.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_stale_lottery_job_is_marked_failed():
+    job = LotteryJob.objects.create(
+        project_uuid=uuid.uuid4(),
+        state=LotteryJobState.RUNNING,
+        started_at=timezone.now() - LOTTERY_JOB_TIMEOUT - timedelta(minutes=1),
+    )
+
+    assert run_next_lottery_job() is None
+
+    job.refresh_from_db()
+    assert job.state == LotteryJobState.FAILED
+    assert job.finished_at is not None
+
+
+@pytest.mark.django_db
+def test_finished_lottery_job_does_not_overwrite_failed_state():
+    job = LotteryJob.objects.create(
+        project_uuid=uuid.uuid4(),
+        state=LotteryJobState.RUNNING,
+        started_at=timezone.now(),
+    )
+    LotteryJob.objects.filter(pk=job.pk).update(state=LotteryJobState.FAILED)
+
+    _finish_job(job, LotteryJobState.SUCCEEDED)
+
+    job.refresh_from_db()
+    assert job.state == LotteryJobState.FAILED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_lottery_job_heartbeat_is_refreshed_while_running(monkeypatch):
+    monkeypatch.setattr(
+        jobs, "LOTTERY_JOB_HEARTBEAT_INTERVAL", timedelta(milliseconds=10)
+    )
+    last_seen_at = timezone.now() - LOTTERY_JOB_TIMEOUT
+    job = LotteryJob.objects.create(
+        project_uuid=uuid.uuid4(),
+        state=LotteryJobState.RUNNING,
+        started_at=last_seen_at,
+        heartbeat_at=last_seen_at,
+    )
+
+    with _Heartbeat(job):
+        time.sleep(0.2)
+
+    job.refresh_from_db()
+    assert job.heartbeat_at > last_seen_at
+
+
+@pytest.mark.django_db
+def test_lottery_job_status_unauthorized(api_client):
+    job = LotteryJob.objects.create(project_uuid=uuid.uuid4())
+    response = api_client.get(
+        reverse("application_form:lottery_job_status", kwargs={"job_id": job.id})
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_lottery_job_status_not_found(api_client):
+    profile = SalespersonProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    response = api_client.get(
+        reverse(
+            "application_form:lottery_job_status",
+            kwargs={"job_id": "2b0bb8a9-8a4c-4b8b-a9c6-7b8d3d8b6f71"},
+        )
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
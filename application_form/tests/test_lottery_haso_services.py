@@ -344,3 +344,41 @@ def test_winning_does_not_cancel_higher_priority_applications(
     assert app_apt1.apartment_reservation.state == ApartmentReservationState.RESERVED
     assert app_apt2.apartment_reservation.state == ApartmentReservationState.SUBMITTED
     assert app_apt3.apartment_reservation.state == ApartmentReservationState.RESERVED
+
+
+@mark.django_db
+def test_lottery_query_count_does_not_depend_on_application_count(
+    elastic_haso_project_with_5_apartments, django_assert_max_num_queries
+):
+    # The right of residence numbers are decrypted once and the results are written
+    # in bulk, so the number of queries should not grow with the queue lengths.
+    project_uuid, apartments = elastic_haso_project_with_5_apartments
+    first_apartment_uuid = apartments[0].uuid
+    second_apartment_uuid = apartments[1].uuid
+    applications = []
+    for right_of_residence in range(1, 11):
+        app = ApplicationFactory(
+            type=ApplicationType.HASO, right_of_residence=right_of_residence
+        )
+        app.application_apartments.create(
+            apartment_uuid=first_apartment_uuid, priority_number=0
+        )
+        app.application_apartments.create(
+            apartment_uuid=second_apartment_uuid, priority_number=1
+        )
+        add_application_to_queues(app)
+        applications.append(app)
+
+    with django_assert_max_num_queries(15):
+        _distribute_haso_apartments(project_uuid)
+
+    # The smallest right of residence number wins the first priority apartment, and
+    # its lower priority application stays in place since it is first in the queue.
+    winner = applications[0]
+    assert list(get_ordered_applications(first_apartment_uuid)) == applications
+    assert list(get_ordered_applications(second_apartment_uuid)) == applications
+    for app_apartment in winner.application_apartments.all():
+        assert (
+            app_apartment.apartment_reservation.state
+            == ApartmentReservationState.RESERVED
+        )
@@ -2,7 +2,12 @@ from pytest import fixture, mark
 from unittest.mock import patch
 
 from application_form.enums import ApartmentReservationState, ApplicationType
-from application_form.models import LotteryEvent, LotteryEventResult
+from application_form.models import (
+    ApartmentReservation,
+    LotteryEvent,
+    LotteryEventResult,
+    ProjectLotteryStatus,
+)
 from application_form.services.application import (
     cancel_reservation,
     get_ordered_applications,
@@ -151,6 +156,9 @@ def test_lottery_result_is_persisted_before_apartment_distribution(
     for app in applications:
         assert results.filter(application_apartment__application=app).count() == 1
 
+    # The lottery of the project should have been marked as completed
+    assert ProjectLotteryStatus.objects.filter(project_uuid=project_uuid).exists()
+
 
 @mark.django_db
 def test_lottery_result_is_not_persisted_twice(elastic_hitas_project_with_5_apartments):
@@ -477,3 +485,38 @@ def test_winning_low_priority_apartment_does_not_cancel_higher_priority_applicat
     assert (
         single_high.apartment_reservation.state == ApartmentReservationState.SUBMITTED
     )
+
+
+@mark.django_db
+def test_lottery_query_count_does_not_depend_on_application_count(
+    elastic_hitas_project_with_5_apartments, django_assert_max_num_queries
+):
+    # The lottery is run in memory and the results are written in bulk, so the number
+    # of database queries should stay the same regardless of the queue lengths.
+    project_uuid, apartments = elastic_hitas_project_with_5_apartments
+    first_apartment_uuid = apartments[0].uuid
+    second_apartment_uuid = apartments[1].uuid
+    for _ in range(10):
+        app = ApplicationFactory(type=ApplicationType.HITAS)
+        app.application_apartments.create(
+            apartment_uuid=first_apartment_uuid, priority_number=0
+        )
+        app.application_apartments.create(
+            apartment_uuid=second_apartment_uuid, priority_number=1
+        )
+        add_application_to_queues(app)
+
+    with django_assert_max_num_queries(15):
+        _distribute_hitas_apartments(project_uuid)
+
+    # Every applicant wins at most one of the apartments
+    assert LotteryEvent.objects.count() == 2
+    assert LotteryEventResult.objects.count() == 20
+    for apartment_uuid in [first_apartment_uuid, second_apartment_uuid]:
+        assert (
+            ApartmentReservation.objects.filter(
+                apartment_uuid=apartment_uuid,
+                state=ApartmentReservationState.RESERVED,
+            ).count()
+            == 1
+        )
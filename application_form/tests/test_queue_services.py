@@ -1,6 +1,6 @@
 from django.db.models import QuerySet
 from pytest import mark, raises
-from unittest.mock import Mock
+from unittest.mock import ANY, Mock
 
 from application_form.enums import ApartmentQueueChangeEventType, ApplicationType
 from application_form.models.reservation import (
@@ -191,6 +191,43 @@ def test_add_late_application_remains_at_end_when_new_application_is_added(
     ]
 
 
+@mark.django_db
+def test_add_haso_application_to_queue_query_count_does_not_depend_on_queue_length(
+    elastic_project_with_5_apartments, django_assert_max_num_queries
+):
+    # Finding the position of a HASO application must not load the other applications
+    # of the queue one by one.
+    project_uuid, apartments = elastic_project_with_5_apartments
+    first_apartment_uuid = apartments[0].uuid
+    for right_of_residence in range(2, 22, 2):
+        app = ApplicationFactory(
+            type=ApplicationType.HASO, right_of_residence=right_of_residence
+        )
+        app.application_apartments.create(
+            apartment_uuid=first_apartment_uuid, priority_number=1
+        )
+        add_application_to_queues(app)
+    app = ApplicationFactory(type=ApplicationType.HASO, right_of_residence=9)
+    app.application_apartments.create(
+        apartment_uuid=first_apartment_uuid, priority_number=1
+    )
+    with django_assert_max_num_queries(10) as context:
+        add_application_to_queues(app)
+    # The following positions are shifted with a single UPDATE
+    reservation_table = ApartmentReservation._meta.db_table
+    assert [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith(f'UPDATE "{reservation_table}"')
+    ] == [ANY]
+    assert app.application_apartments.get().apartment_reservation.queue_position == 5
+    assert list(
+        ApartmentReservation.objects.filter(apartment_uuid=first_apartment_uuid)
+        .order_by("queue_position")
+        .values_list("queue_position", flat=True)
+    ) == list(range(1, 12))
+
+
 @mark.django_db
 def test_adding_application_to_queue_creates_change_event(
     elastic_project_with_5_apartments,
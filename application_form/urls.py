@@ -4,6 +4,7 @@ from rest_framework.routers import DefaultRouter
 from application_form.api.sales.views import (
     ApartmentReservationViewSet,
     execute_lottery_for_project,
+    lottery_job_status,
     SalesApplicationViewSet,
 )
 from application_form.api.views import ApplicationViewSet, ListProjectReservations
@@ -41,6 +42,11 @@ urlpatterns = [
         execute_lottery_for_project,
         name="execute_lottery_for_project",
     ),
+    path(
+        r"sales/lottery_jobs/<uuid:job_id>",
+        lottery_job_status,
+        name="lottery_job_status",
+    ),
     path(
         r"sales/apartment_reservations/<int:apartment_reservation_id>/installments/invoices/",  # noqa: E501
         ApartmentInstallmentInvoiceAPIView.as_view(),
@@ -9,7 +9,7 @@ from audit_log.paginators import LargeTablePaginator
 
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
-    exclude = ("message",)
+    fields = ("message_prettified",)
     readonly_fields = ("message_prettified",)
 
     # For increasing listing performance
@@ -0,0 +1,109 @@
+import base64
+import binascii
+import json
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from typing import List, Optional
+
+
+class AuditLogKeysetPagination(BasePagination):
+    """
+    Keyset pagination of audit logs, newest first.
+
+    The cursor is an opaque token holding the timestamp and the id of the last event
+    of the previous page. The next page is fetched with a range condition on the
+    indexed timestamp instead of an OFFSET, so deep pages are as fast as the first.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    page_size = 100
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None) -> List:
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by("-timestamp", "-id")
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            timestamp, id = cursor
+            queryset = queryset.filter(
+                Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=id)
+            )
+
+        # One extra event tells whether there is a next page
+        page = list(queryset[: page_size + 1])
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+        self.last = page[-1] if page else None
+        return page
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(
+                request.query_params.get(self.page_size_query_param, self.page_size)
+            )
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "Must be an integer."})
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: "Must be positive."})
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request) -> Optional[List]:
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            timestamp, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            timestamp = parse_datetime(timestamp)
+            id = int(id)
+        except (binascii.Error, TypeError, ValueError):
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        if timestamp is None:
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        return [timestamp, id]
+
+    def encode_cursor(self, cursor: List) -> str:
+        return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+    def get_paginated_response(self, data) -> Response:
+        next_url = None
+        if self.has_next:
+            next_url = replace_query_param(
+                self.request.build_absolute_uri(),
+                self.cursor_query_param,
+                self.encode_cursor([self.last.timestamp.isoformat(), self.last.id]),
+            )
+        return Response({"next": next_url, "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -51,3 +51,40 @@ class AuditLogSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         return AuditLog.objects.create(message=self.data)
+
+
+class AuditLogListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditLog
+        fields = ["id", "timestamp", "message"]
+
+
+class AuditLogFilterSerializer(serializers.Serializer):
+    actor = CharField(
+        required=False, help_text="Profile id of the actor of the events."
+    )
+    target_id = CharField(required=False)
+    target_type = CharField(required=False)
+    operation = EnumField(Operation, required=False)
+    status = EnumField(Status, required=False)
+    start = DateTimeField(
+        required=False, help_text="Include the events at or after this time."
+    )
+    end = DateTimeField(
+        required=False, help_text="Include the events before this time."
+    )
+
+    def filter_queryset(self, queryset):
+        data = self.validated_data
+        filters = {
+            "actor_profile_id": data.get("actor"),
+            "target_id": data.get("target_id"),
+            "target_type": data.get("target_type"),
+            "operation": data["operation"].value if "operation" in data else None,
+            "status": data["status"].value if "status" in data else None,
+            "timestamp__gte": data.get("start"),
+            "timestamp__lt": data.get("end"),
+        }
+        return queryset.filter(
+            **{key: value for key, value in filters.items() if value is not None}
+        )
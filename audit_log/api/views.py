@@ -1,11 +1,78 @@
+import json
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
 from rest_framework import mixins, viewsets
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from typing import Iterator
 
-from audit_log.api.serializers import AuditLogSerializer
+from audit_log.api.pagination import AuditLogKeysetPagination
+from audit_log.api.serializers import (
+    AuditLogFilterSerializer,
+    AuditLogListSerializer,
+    AuditLogSerializer,
+)
 from audit_log.models import AuditLog
 
+EXPORT_CHUNK_SIZE = 2000
 
-class AuditLogViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
+
+class AuditLogViewSet(
+    mixins.CreateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
     queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AuditLogKeysetPagination
+
+    def get_permissions(self):
+        if self.action in ("list", "export"):
+            return [IsAdminUser()]
+        return super().get_permissions()
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return AuditLogListSerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ("list", "export"):
+            filter_serializer = AuditLogFilterSerializer(data=self.request.query_params)
+            filter_serializer.is_valid(raise_exception=True)
+            queryset = filter_serializer.filter_queryset(queryset)
+        return queryset
+
+    @extend_schema(
+        description="List the audit events matching the filters, newest first.",
+        parameters=[AuditLogFilterSerializer],
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        description="Export all the audit events matching the filters as "
+        "newline-delimited JSON, oldest first. The events are streamed, so "
+        "exports of any size can be downloaded.",
+        parameters=[AuditLogFilterSerializer],
+        responses={(200, "application/x-ndjson"): OpenApiTypes.BINARY},
+    )
+    @action(methods=["GET"], detail=False)
+    def export(self, request):
+        messages = (
+            self.get_queryset()
+            .order_by("timestamp", "id")
+            .values_list("message", flat=True)
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        response = StreamingHttpResponse(
+            _iter_ndjson(messages), content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = "attachment; filename=auditlogs.ndjson"
+        return response
+
+
+def _iter_ndjson(messages) -> Iterator[str]:
+    for message in messages:
+        yield json.dumps(message) + "\n"
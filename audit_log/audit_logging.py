@@ -5,6 +5,7 @@ from typing import Callable, Optional, Union
 
 from audit_log.enums import Operation, Role, Status
 from audit_log.models import AuditLog
+from audit_log.writer import get_writer
 from users.models import Profile
 
 ORIGIN = "APARTMENT_APPLICATION_SERVICE"
@@ -35,6 +36,10 @@ def log(
     (a Django model instance), status (e.g. SUCCESS), and a timestamp.
 
     Audit log events are written to the "audit" logger at "INFO" level.
+
+    Events that change data are written right away, in the transaction of the
+    change. READ and FORBIDDEN events are handed to the buffered writer if
+    `AUDIT_LOG_SPOOL_DIRECTORY` is set.
     """
     current_time = get_time()
     profile_id = None
@@ -65,12 +70,21 @@ def log(
             },
         },
     }
-    AuditLog.objects.create(message=message)
+    writer = get_writer()
+    if writer is not None and (
+        operation == Operation.READ or status == Status.FORBIDDEN
+    ):
+        writer.write(message)
+    else:
+        AuditLog.objects.create(message=message)
 
 
 def _get_target_id(instance: Optional[Model]) -> Optional[str]:
-    if instance is None or instance.pk is None:
+    # An unsaved instance has no id yet, even if its audit log id field has a default
+    if instance is None or instance._state.adding or instance.pk is None:
         return None
     field_name = getattr(instance, "audit_log_id_field", "pk")
     audit_log_id = getattr(instance, field_name, None)
+    if audit_log_id is None:
+        return None
     return str(audit_log_id)
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from audit_log.partitions import (
+    add_months,
+    create_partition,
+    get_month,
+    remove_partitions_before,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the monthly audit log partitions ahead of time and drop the ones "
+        "older than the retention period"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=2,
+            help="Number of future months to create partitions for",
+        )
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            help="Remove the partitions older than this many months. By default "
+            "nothing is removed.",
+        )
+        parser.add_argument(
+            "--detach",
+            action="store_true",
+            help="Detach the old partitions and keep them as separate tables for "
+            "archiving instead of dropping them",
+        )
+
+    def handle(self, *args, **options):
+        if options["retention_months"] is not None and options["retention_months"] < 1:
+            raise CommandError("--retention-months must be at least 1")
+
+        current_month = get_month(timezone.now().date())
+        with transaction.atomic():
+            for months in range(options["months_ahead"] + 1):
+                month = add_months(current_month, months)
+                if create_partition(month):
+                    self.stdout.write(f"Created the partition of {month:%Y-%m}")
+
+            if options["retention_months"] is not None:
+                removed = remove_partitions_before(
+                    add_months(current_month, -options["retention_months"]),
+                    detach=options["detach"],
+                )
+                action = "Detached" if options["detach"] else "Dropped"
+                for name in removed:
+                    self.stdout.write(f"{action} {name}")
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from audit_log.writer import write_spooled_messages
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the audit log messages left in the spool files by crashed processes "
+        "and failed flushes to the database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=float,
+            default=60,
+            help="Skip the spool files modified within this many seconds",
+        )
+
+    def handle(self, *args, **options):
+        spool_directory = settings.AUDIT_LOG_SPOOL_DIRECTORY
+        if not spool_directory:
+            raise CommandError("AUDIT_LOG_SPOOL_DIRECTORY is not set")
+
+        count = write_spooled_messages(spool_directory, min_age=options["min_age"])
+        self.stdout.write(f"Wrote {count} audit log messages")
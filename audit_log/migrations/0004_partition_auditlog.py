@@ -0,0 +1,170 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+# The table is recreated as a table partitioned by month on "timestamp". The primary
+# key of a partitioned table has to include the partition key, so it is
+# (id, timestamp) in the database. The ids still come from the original sequence.
+PARTITION_TABLE_SQL = """
+ALTER TABLE audit_log_auditlog RENAME TO audit_log_auditlog_unpartitioned;
+ALTER INDEX audit_log_auditlog_pkey RENAME TO audit_log_auditlog_unpartitioned_pkey;
+
+CREATE TABLE audit_log_auditlog (
+    id bigint NOT NULL DEFAULT nextval('audit_log_auditlog_id_seq'),
+    message jsonb NOT NULL,
+    timestamp timestamp with time zone NOT NULL,
+    actor_profile_id varchar(64) NULL,
+    target_type varchar(64) NULL,
+    target_id varchar(64) NULL,
+    operation varchar(16) NULL,
+    status varchar(16) NULL,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE audit_log_auditlog_default PARTITION OF audit_log_auditlog DEFAULT;
+
+ALTER SEQUENCE audit_log_auditlog_id_seq OWNED BY audit_log_auditlog.id;
+"""
+
+# The time of the event in the message of an existing row
+MESSAGE_TIMESTAMP_SQL = (
+    "COALESCE(to_timestamp("
+    "(message #>> '{audit_event,date_time_epoch}')::bigint / 1000.0), now())"
+)
+
+# The rows are copied once the partitions of their months exist, so that each row is
+# written only once
+COPY_ROWS_SQL = f"""
+INSERT INTO audit_log_auditlog (
+    id, message, timestamp, actor_profile_id, target_type, target_id, operation, status
+)
+SELECT
+    id,
+    message,
+    {MESSAGE_TIMESTAMP_SQL},
+    message #>> '{{audit_event,actor,profile_id}}',
+    message #>> '{{audit_event,target,type}}',
+    message #>> '{{audit_event,target,id}}',
+    message #>> '{{audit_event,operation}}',
+    message #>> '{{audit_event,status}}'
+FROM audit_log_auditlog_unpartitioned;
+
+DROP TABLE audit_log_auditlog_unpartitioned;
+
+CREATE INDEX auditlog_timestamp_idx ON audit_log_auditlog (timestamp);
+CREATE INDEX auditlog_actor_idx ON audit_log_auditlog (actor_profile_id, timestamp);
+CREATE INDEX auditlog_target_idx
+    ON audit_log_auditlog (target_id, target_type, timestamp);
+CREATE INDEX auditlog_operation_idx
+    ON audit_log_auditlog (operation, status, timestamp);
+"""
+
+UNPARTITION_TABLE_SQL = """
+CREATE TABLE audit_log_auditlog_unpartitioned (
+    id bigint NOT NULL DEFAULT nextval('audit_log_auditlog_id_seq') PRIMARY KEY,
+    message jsonb NOT NULL
+);
+INSERT INTO audit_log_auditlog_unpartitioned (id, message)
+SELECT id, message FROM audit_log_auditlog;
+
+ALTER SEQUENCE audit_log_auditlog_id_seq
+    OWNED BY audit_log_auditlog_unpartitioned.id;
+DROP TABLE audit_log_auditlog;
+ALTER TABLE audit_log_auditlog_unpartitioned RENAME TO audit_log_auditlog;
+"""
+
+
+def create_partitions(apps, schema_editor):
+    """
+    Creates the partitions of the months that have events, and of the current and
+    the next month, before the events are copied to the partitioned table.
+    """
+    from audit_log.partitions import add_months, create_partition, get_month
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT DISTINCT date_trunc("
+            f"'month', {MESSAGE_TIMESTAMP_SQL} AT TIME ZONE 'UTC'"
+            ") FROM audit_log_auditlog_unpartitioned"
+        )
+        months = {get_month(row[0].date()) for row in cursor.fetchall()}
+    current_month = get_month(django.utils.timezone.now().date())
+    months |= {current_month, add_months(current_month, 1)}
+
+    for month in sorted(months):
+        create_partition(month, connection=schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit_log", "0003_noncontrib_jsonfield"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name="auditlog",
+                    name="timestamp",
+                    field=models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                migrations.AddField(
+                    model_name="auditlog",
+                    name="actor_profile_id",
+                    field=models.CharField(blank=True, max_length=64, null=True),
+                ),
+                migrations.AddField(
+                    model_name="auditlog",
+                    name="target_type",
+                    field=models.CharField(blank=True, max_length=64, null=True),
+                ),
+                migrations.AddField(
+                    model_name="auditlog",
+                    name="target_id",
+                    field=models.CharField(blank=True, max_length=64, null=True),
+                ),
+                migrations.AddField(
+                    model_name="auditlog",
+                    name="operation",
+                    field=models.CharField(blank=True, max_length=16, null=True),
+                ),
+                migrations.AddField(
+                    model_name="auditlog",
+                    name="status",
+                    field=models.CharField(blank=True, max_length=16, null=True),
+                ),
+                migrations.AddIndex(
+                    model_name="auditlog",
+                    index=models.Index(
+                        fields=["timestamp"], name="auditlog_timestamp_idx"
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="auditlog",
+                    index=models.Index(
+                        fields=["actor_profile_id", "timestamp"],
+                        name="auditlog_actor_idx",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="auditlog",
+                    index=models.Index(
+                        fields=["target_id", "target_type", "timestamp"],
+                        name="auditlog_target_idx",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="auditlog",
+                    index=models.Index(
+                        fields=["operation", "status", "timestamp"],
+                        name="auditlog_operation_idx",
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(PARTITION_TABLE_SQL, UNPARTITION_TABLE_SQL),
+                migrations.RunPython(create_partitions, migrations.RunPython.noop),
+                migrations.RunSQL(COPY_ROWS_SQL, migrations.RunSQL.noop),
+            ],
+        ),
+    ]
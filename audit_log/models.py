@@ -1,10 +1,69 @@
+from datetime import datetime, timezone
 from django.db import models
 from django.db.models import JSONField
+from django.utils import timezone as django_timezone
+from typing import Any, Optional
+
+
+class AuditLogQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.set_indexed_fields()
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 class AuditLog(models.Model):
+    """
+    An audit event. The table is partitioned by month on `timestamp`, see
+    `audit_log.partitions`.
+    """
+
     message = JSONField()
 
+    # Copied from the message on save, so that the events can be searched by indexes
+    timestamp = models.DateTimeField(default=django_timezone.now)
+    actor_profile_id = models.CharField(max_length=64, null=True, blank=True)
+    target_type = models.CharField(max_length=64, null=True, blank=True)
+    target_id = models.CharField(max_length=64, null=True, blank=True)
+    operation = models.CharField(max_length=16, null=True, blank=True)
+    status = models.CharField(max_length=16, null=True, blank=True)
+
+    objects = AuditLogQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["timestamp"], name="auditlog_timestamp_idx"),
+            models.Index(
+                fields=["actor_profile_id", "timestamp"], name="auditlog_actor_idx"
+            ),
+            models.Index(
+                fields=["target_id", "target_type", "timestamp"],
+                name="auditlog_target_idx",
+            ),
+            models.Index(
+                fields=["operation", "status", "timestamp"],
+                name="auditlog_operation_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.set_indexed_fields()
+        super().save(*args, **kwargs)
+
+    def set_indexed_fields(self) -> None:
+        event = (
+            self.message.get("audit_event") if isinstance(self.message, dict) else None
+        )
+        epoch = _get(event, "date_time_epoch")
+        if epoch is not None:
+            self.timestamp = datetime.fromtimestamp(int(epoch) / 1000, tz=timezone.utc)
+        self.actor_profile_id = _get(event, "actor", "profile_id")
+        self.target_type = _get(event, "target", "type")
+        self.target_id = _get(event, "target", "id")
+        self.operation = _get(event, "operation")
+        self.status = _get(event, "status")
+
     def __str__(self):
         return " ".join(
             [
@@ -26,3 +85,12 @@ def _safe_get(value: dict, *keys: str) -> str:
         except KeyError:
             return "UNKNOWN"
     return str(value)
+
+
+def _get(value: Any, *keys: str) -> Optional[str]:
+    """Look up a nested key in the given dict, or return None if it is missing."""
+    for key in keys:
+        if not isinstance(value, dict) or value.get(key) is None:
+            return None
+        value = value[key]
+    return str(value)
@@ -7,14 +7,17 @@ class LargeTablePaginator(Paginator):
     """
     Paginator that uses PostgreSQL `reltuples` for queryset size. This is much faster
     than the naive count implemented by the default paginator, so it works better for
-    tables containing millions of rows.
+    tables containing millions of rows. The estimates of the partitions of a
+    partitioned table are summed up.
     """
 
     @cached_property
     def count(self):
         cursor = connection.cursor()
         cursor.execute(
-            "SELECT reltuples FROM pg_class WHERE relname = %s",
-            [self.object_list.query.model._meta.db_table],
+            "SELECT SUM(GREATEST(reltuples, 0)) FROM pg_class "
+            "WHERE oid = %s::regclass OR oid IN "
+            "(SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+            [self.object_list.query.model._meta.db_table] * 2,
         )
-        return int(cursor.fetchone()[0])
+        return int(cursor.fetchone()[0] or 0)
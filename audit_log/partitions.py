@@ -0,0 +1,112 @@
+"""
+The audit log table is partitioned by month on its `timestamp` column. Each month is
+stored in a partition of its own, named e.g. "audit_log_auditlog_2022_01", and the
+events that don't belong to any of those end up in the default partition.
+
+The partitions are created ahead of time and the old ones removed with the
+`rotate_audit_log_partitions` management command. Removing a whole partition is
+instant and leaves no dead rows behind, unlike deleting the events.
+"""
+import re
+from datetime import date, datetime, timezone
+from django.db import connection as default_connection
+from typing import List, Tuple
+
+from audit_log.models import AuditLog
+
+TABLE_NAME = AuditLog._meta.db_table
+DEFAULT_PARTITION_NAME = f"{TABLE_NAME}_default"
+
+_PARTITION_NAME_PATTERN = re.compile(rf"^{TABLE_NAME}_(\d{{4}})_(\d{{2}})$")
+
+
+def get_month(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def get_partition_name(month: date) -> str:
+    return f"{TABLE_NAME}_{month:%Y_%m}"
+
+
+def get_partitions(connection=default_connection) -> List[Tuple[str, date]]:
+    """
+    Returns the names and the months of the monthly partitions, oldest first.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [TABLE_NAME],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = _PARTITION_NAME_PATTERN.match(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partition(month: date, connection=default_connection) -> bool:
+    """
+    Creates the partition of the given month, unless it exists already. The events of
+    the month are moved to it from the default partition. Returns whether the partition
+    was created.
+    """
+    name = get_partition_name(month)
+    if name in (partition_name for partition_name, _ in get_partitions(connection)):
+        return False
+
+    start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    end_month = add_months(month, 1)
+    end = datetime(end_month.year, end_month.month, 1, tzinfo=timezone.utc)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} "
+            f"(LIKE {quote(TABLE_NAME)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        # A partition can't be attached while the default partition has rows of it
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {quote(DEFAULT_PARTITION_NAME)} "
+            "WHERE timestamp >= %s AND timestamp < %s RETURNING *) "
+            f"INSERT INTO {quote(name)} SELECT * FROM moved",
+            [start, end],
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(TABLE_NAME)} ATTACH PARTITION {quote(name)} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+    return True
+
+
+def remove_partitions_before(
+    month: date, detach: bool = False, connection=default_connection
+) -> List[str]:
+    """
+    Drops the partitions of the months before the given one. With `detach`, the
+    partitions are only detached and left in the database as separate tables, e.g.
+    to be archived. Returns the names of the removed partitions.
+    """
+    quote = connection.ops.quote_name
+    removed = []
+    with connection.cursor() as cursor:
+        for name, partition_month in get_partitions(connection):
+            if partition_month >= month:
+                break
+            if detach:
+                cursor.execute(
+                    f"ALTER TABLE {quote(TABLE_NAME)} DETACH PARTITION {quote(name)}"
+                )
+            else:
+                cursor.execute(f"DROP TABLE {quote(name)}")
+            removed.append(name)
+    return removed
@@ -1,3 +1,4 @@
+import json
 import pytest
 from dateutil import parser
 from django.urls import reverse
@@ -59,11 +60,87 @@ def test_audit_log_post_writes_audit_log_with_authorized_user(api_client):
 
 
 @pytest.mark.django_db
-def test_audit_log_get_not_allowed(api_client):
+def test_audit_log_get_forbidden_without_staff_user(api_client):
     profile = ProfileFactory()
     api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
     response = api_client.get(reverse("audit_log:auditlog-list"))
-    assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = api_client.get(reverse("audit_log:auditlog-export"))
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def _create_audit_logs(count, **event):
+    return [
+        AuditLog.objects.create(
+            message={
+                "audit_event": {
+                    **_common_fields["audit_event"],
+                    "date_time_epoch": 1590969600000 + index * 1000,
+                    **event,
+                }
+            }
+        )
+        for index in range(count)
+    ]
+
+
+@pytest.mark.django_db
+def test_audit_log_list_keyset_pagination(api_client, superuser):
+    logs = _create_audit_logs(5)
+    api_client.force_authenticate(superuser)
+
+    ids = []
+    url = reverse("audit_log:auditlog-list") + "?limit=2"
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) <= 2
+        ids += [log["id"] for log in response.data["results"]]
+        url = response.data["next"]
+
+    assert ids == [log.id for log in reversed(logs)]
+
+
+@pytest.mark.django_db
+def test_audit_log_list_filters(api_client, superuser):
+    _create_audit_logs(2)
+    forbidden_updates = _create_audit_logs(1, operation="UPDATE", status="FORBIDDEN")
+    _create_audit_logs(
+        1, actor={"role": "USER", "profile_id": "f5cf186a-f9a8-4671-a7a5-1ecbe758071f"}
+    )
+    api_client.force_authenticate(superuser)
+
+    response = api_client.get(
+        reverse("audit_log:auditlog-list"),
+        {
+            "actor": "73aa0891-32a3-42cb-a91f-284777bf1d7f",
+            "operation": "UPDATE",
+            "status": "FORBIDDEN",
+            "start": "2020-06-01T00:00:00Z",
+            "end": "2020-06-02T00:00:00Z",
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [log["id"] for log in response.data["results"]] == [forbidden_updates[0].id]
+
+    response = api_client.get(reverse("audit_log:auditlog-list"), {"operation": "FOO"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_audit_log_export_ndjson(api_client, superuser):
+    logs = _create_audit_logs(3)
+    _create_audit_logs(1, target={"id": "other", "type": "Customer"})
+    api_client.force_authenticate(superuser)
+
+    response = api_client.get(
+        reverse("audit_log:auditlog-export"),
+        {"target_id": "73aa0891-32a3-42cb-a91f-284777bf1d7f"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [log.message for log in logs]
 
 
 @pytest.mark.django_db
@@ -5,6 +5,7 @@ from django.contrib.auth.models import AnonymousUser
 from audit_log import audit_logging
 from audit_log.enums import Operation, Status
 from audit_log.models import AuditLog
+from users.models import Profile
 
 _common_fields = {
     "audit_event": {
@@ -96,6 +97,13 @@ def test_log_status(fixed_datetime, profile, status):
     }
 
 
+@pytest.mark.django_db
+def test_log_unsaved_target(fixed_datetime, profile):
+    audit_logging.log(profile, Operation.CREATE, Profile(), get_time=fixed_datetime)
+    message = AuditLog.objects.get().message
+    assert message["audit_event"]["target"] == {"id": None, "type": "Profile"}
+
+
 @pytest.mark.django_db
 def test_log_origin(fixed_datetime, profile):
     audit_logging.log(profile, Operation.READ, profile, get_time=fixed_datetime)
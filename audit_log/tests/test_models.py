@@ -1,3 +1,6 @@
+from datetime import datetime, timezone
+from pytest import mark
+
 from audit_log.models import AuditLog
 
 
@@ -37,3 +40,27 @@ def test_audit_log_string_representation_missing_field_is_replaced_with_unknown(
         }
     )
     assert str(log) == f"{time} USER {uuid} WRITE UNKNOWN {uuid}"
+
+
+@mark.django_db
+def test_audit_log_indexed_fields_are_copied_from_the_message():
+    uuid = "f1e33c3b-2137-4bf1-926f-0a2ca013f0b5"
+    message = {
+        "audit_event": {
+            "status": "FORBIDDEN",
+            "date_time_epoch": 1590969600000,
+            "actor": {"role": "USER", "profile_id": uuid},
+            "operation": "UPDATE",
+            "target": {"id": uuid, "type": "Profile"},
+        }
+    }
+    AuditLog.objects.create(message=message)
+    AuditLog.objects.bulk_create([AuditLog(message=message)])
+
+    for log in AuditLog.objects.all():
+        assert log.timestamp == datetime(2020, 6, 1, tzinfo=timezone.utc)
+        assert log.actor_profile_id == uuid
+        assert log.target_type == "Profile"
+        assert log.target_id == uuid
+        assert log.operation == "UPDATE"
+        assert log.status == "FORBIDDEN"
@@ -0,0 +1,60 @@
+from datetime import date, datetime, timezone
+from django.core.management import call_command
+from pytest import mark
+
+from audit_log.models import AuditLog
+from audit_log.partitions import (
+    add_months,
+    create_partition,
+    get_month,
+    get_partition_name,
+    get_partitions,
+    remove_partitions_before,
+)
+
+
+def _message(time: datetime) -> dict:
+    return {"audit_event": {"date_time_epoch": int(time.timestamp() * 1000)}}
+
+
+def test_add_months():
+    assert add_months(date(2021, 11, 1), 3) == date(2022, 2, 1)
+    assert add_months(date(2021, 1, 1), -1) == date(2020, 12, 1)
+
+
+@mark.django_db
+def test_create_partition_moves_events_from_the_default_partition():
+    log = AuditLog.objects.create(
+        message=_message(datetime(2001, 2, 3, tzinfo=timezone.utc))
+    )
+
+    assert create_partition(date(2001, 2, 1))
+    assert not create_partition(date(2001, 2, 1))
+
+    assert (get_partition_name(date(2001, 2, 1)), date(2001, 2, 1)) in get_partitions()
+    assert AuditLog.objects.get().pk == log.pk
+
+
+@mark.django_db
+def test_remove_partitions_before():
+    create_partition(date(2001, 1, 1))
+    create_partition(date(2001, 2, 1))
+    AuditLog.objects.create(message=_message(datetime(2001, 1, 5, tzinfo=timezone.utc)))
+    kept = AuditLog.objects.create(
+        message=_message(datetime(2001, 2, 5, tzinfo=timezone.utc))
+    )
+
+    assert remove_partitions_before(date(2001, 2, 1)) == [
+        get_partition_name(date(2001, 1, 1))
+    ]
+    assert list(AuditLog.objects.all()) == [kept]
+
+
+@mark.django_db
+def test_rotate_audit_log_partitions_creates_partitions_ahead():
+    call_command("rotate_audit_log_partitions", months_ahead=3)
+
+    months = [month for _, month in get_partitions()]
+    current_month = get_month(date.today())
+    for months_ahead in range(4):
+        assert add_months(current_month, months_ahead) in months
@@ -0,0 +1,36 @@
+from pytest import mark
+
+from audit_log import audit_logging
+from audit_log.enums import Operation
+from audit_log.models import AuditLog
+from customer.api.sales.views import CustomerViewSet
+from customer.tests.factories import CustomerFactory
+from users.api.views import ProfileViewSet
+
+
+@mark.django_db
+def test_audit_log_id_only_target_is_not_loaded(profile, django_assert_num_queries):
+    view = ProfileViewSet(kwargs={"pk": str(profile.pk)}, audit_log_id_only=True)
+    with django_assert_num_queries(0):
+        target = view._get_target()
+    assert target.pk == profile.pk
+
+
+@mark.django_db
+def test_audit_log_id_only_target_id_is_logged(profile):
+    view = ProfileViewSet(kwargs={"pk": str(profile.pk)}, audit_log_id_only=True)
+    audit_logging.log(profile, Operation.READ, view._get_target())
+    message = AuditLog.objects.get().message
+    assert message["audit_event"]["target"] == {
+        "id": str(profile.pk),
+        "type": "Profile",
+    }
+
+
+@mark.django_db
+def test_audit_log_target_is_loaded_without_id_only(django_assert_num_queries):
+    customer = CustomerFactory()
+    view = CustomerViewSet(kwargs={"pk": str(customer.pk)})
+    with django_assert_num_queries(1):
+        target = view._get_target()
+    assert target == customer
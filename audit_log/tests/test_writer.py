@@ -0,0 +1,100 @@
+import json
+import pytest
+
+from audit_log import audit_logging, writer
+from audit_log.enums import Operation
+from audit_log.models import AuditLog
+from audit_log.writer import BufferedAuditLogWriter, write_spooled_messages
+
+
+def _get_messages():
+    return list(AuditLog.objects.order_by("id").values_list("message", flat=True))
+
+
+@pytest.mark.django_db
+def test_buffered_writer_writes_messages_on_flush(tmp_path):
+    buffered_writer = BufferedAuditLogWriter(str(tmp_path), flush_interval=3600)
+    buffered_writer.write({"number": 1})
+    buffered_writer.write({"number": 2})
+
+    assert AuditLog.objects.count() == 0
+    assert len(list(tmp_path.iterdir())) == 1
+
+    buffered_writer.flush()
+
+    assert _get_messages() == [{"number": 1}, {"number": 2}]
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.django_db
+def test_buffered_writer_keeps_messages_of_failed_flush(tmp_path, monkeypatch):
+    buffered_writer = BufferedAuditLogWriter(str(tmp_path), flush_interval=3600)
+    buffered_writer.write({"number": 1})
+    (open_file,) = tmp_path.iterdir()
+    assert open_file.name.endswith(writer.OPEN_SPOOL_FILE_SUFFIX)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("Database is down")
+
+    monkeypatch.setattr(AuditLog.objects, "bulk_create", fail)
+    buffered_writer.flush()
+    monkeypatch.undo()
+
+    (spool_file,) = tmp_path.iterdir()
+    assert spool_file.name.endswith(writer.SPOOL_FILE_SUFFIX)
+    assert write_spooled_messages(str(tmp_path), min_age=0) == 1
+    assert _get_messages() == [{"number": 1}]
+
+
+@pytest.mark.django_db
+def test_write_spooled_messages(tmp_path):
+    spool_file = tmp_path / f"1234-abc{writer.SPOOL_FILE_SUFFIX}"
+    spool_file.write_text(json.dumps({"number": 1}) + "\n" + '{"numb')
+
+    assert write_spooled_messages(str(tmp_path), min_age=0) == 1
+    assert _get_messages() == [{"number": 1}]
+    assert not spool_file.exists()
+
+
+@pytest.mark.django_db
+def test_write_spooled_messages_skips_recent_files(tmp_path):
+    spool_file = tmp_path / f"1234-abc{writer.SPOOL_FILE_SUFFIX}"
+    spool_file.write_text(json.dumps({"number": 1}) + "\n")
+
+    assert write_spooled_messages(str(tmp_path), min_age=60) == 0
+    assert AuditLog.objects.count() == 0
+    assert spool_file.exists()
+
+
+@pytest.mark.django_db
+def test_write_spooled_messages_completes_abandoned_open_files(tmp_path):
+    spool_file = tmp_path / f"1234-abc{writer.OPEN_SPOOL_FILE_SUFFIX}"
+    spool_file.write_text(json.dumps({"number": 1}) + "\n")
+
+    assert write_spooled_messages(str(tmp_path), min_age=60) == 0
+    assert spool_file.exists()
+
+    assert write_spooled_messages(str(tmp_path), min_age=0) == 1
+    assert _get_messages() == [{"number": 1}]
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.django_db
+def test_log_buffers_only_read_events(settings, monkeypatch, tmp_path, profile):
+    settings.AUDIT_LOG_SPOOL_DIRECTORY = str(tmp_path)
+    settings.AUDIT_LOG_FLUSH_INTERVAL = 3600
+    monkeypatch.setattr(writer, "_writer", None)
+
+    audit_logging.log(profile, Operation.READ, profile)
+    audit_logging.log(profile, Operation.UPDATE, profile)
+
+    assert [message["audit_event"]["operation"] for message in _get_messages()] == [
+        "UPDATE"
+    ]
+
+    writer.get_writer().flush()
+
+    assert [message["audit_event"]["operation"] for message in _get_messages()] == [
+        "UPDATE",
+        "READ",
+    ]
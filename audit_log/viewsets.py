@@ -21,6 +21,17 @@ class AuditLoggingModelViewSet(ModelViewSet):
         "DELETE": Operation.DELETE,
     }
     created_instance: Optional[Model] = None
+    loaded_instance: Optional[Model] = None
+
+    # If True, a target that the view hasn't loaded is recorded by the lookup value of
+    # the URL without fetching it from the database
+    audit_log_id_only = False
+
+    def check_object_permissions(self, request, obj):
+        # get_object() passes every instance it loads here, so it can be reused as the
+        # audit log target, also when the object permissions are denied
+        self.loaded_instance = obj
+        super().check_object_permissions(request, obj)
 
     def permission_denied(self, request, message=None, code=None):
         audit_logging.log(
@@ -84,10 +95,26 @@ class AuditLoggingModelViewSet(ModelViewSet):
         return self.method_to_operation[self.request.method]
 
     def _get_target(self) -> Optional[Model]:
+        if self.loaded_instance is not None:
+            return self.loaded_instance
         target = None
         lookup_value = self.kwargs.get(self.lookup_field, None)
         if lookup_value is not None:
+            if self.audit_log_id_only:
+                return self._build_target(lookup_value)
             target = self.queryset.model.objects.filter(
                 **{self.lookup_field: lookup_value}
             ).first()
         return target or self.created_instance or self.queryset.model()
+
+    def _build_target(self, lookup_value) -> Model:
+        model = self.queryset.model
+        field = (
+            model._meta.pk
+            if self.lookup_field == "pk"
+            else model._meta.get_field(self.lookup_field)
+        )
+        target = model(**{field.attname: field.to_python(lookup_value)})
+        # The target stands for an existing row, so its id is logged
+        target._state.adding = False
+        return target
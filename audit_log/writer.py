@@ -0,0 +1,187 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from typing import List, Optional
+
+from audit_log.models import AuditLog
+
+_logger = logging.getLogger(__name__)
+
+# The messages are flushed at latest when this many of them have been buffered
+BATCH_SIZE = 500
+
+SPOOL_FILE_SUFFIX = ".jsonl"
+# The spool file that is being appended to has this suffix until it is switched
+OPEN_SPOOL_FILE_SUFFIX = f"{SPOOL_FILE_SUFFIX}.open"
+
+
+class BufferedAuditLogWriter:
+    """
+    Writes audit log messages to the database in batches from a background thread.
+
+    Every message is appended to a spool file before it is buffered, so that the
+    messages that are still in memory when the process dies can be written later with
+    `write_spooled_messages()`. The spool file is switched on every flush and removed
+    once its messages have been written to the database. It has a temporary name until
+    it is switched, so that `write_spooled_messages()` doesn't pick it up while it is
+    still being appended to.
+    """
+
+    def __init__(self, spool_directory: str, flush_interval: float):
+        self.spool_directory = spool_directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._messages: List[dict] = []
+        self._spool_file = None
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self, message: dict) -> None:
+        line = json.dumps(message) + "\n"
+        with self._lock:
+            if self._thread is None:
+                self._start()
+            if self._spool_file is None:
+                self._spool_file = self._open_spool_file()
+            self._spool_file.write(line)
+            self._spool_file.flush()
+            self._messages.append(message)
+            is_full = len(self._messages) >= BATCH_SIZE
+        if is_full:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered messages to the database. If that fails, the messages are
+        left in their spool file.
+        """
+        with self._lock:
+            messages, self._messages = self._messages, []
+            spool_file, self._spool_file = self._spool_file, None
+        if spool_file is None:
+            return
+        spool_file.close()
+        path = _complete_spool_file(spool_file.name)
+
+        try:
+            AuditLog.objects.bulk_create(
+                [AuditLog(message=message) for message in messages],
+                batch_size=BATCH_SIZE,
+            )
+        except Exception:
+            _logger.exception(
+                "Could not write %s audit log messages, they are kept in %s",
+                len(messages),
+                path,
+            )
+            return
+        os.remove(path)
+
+    def _start(self) -> None:
+        os.makedirs(self.spool_directory, exist_ok=True)
+        self._thread = threading.Thread(
+            target=self._run, name="audit-log-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception:
+                # The messages of a failed flush stay in their spool file, so the
+                # thread can go on with the next ones
+                _logger.exception("Could not flush the audit log messages")
+
+    def _open_spool_file(self):
+        file_name = f"{os.getpid()}-{uuid.uuid4().hex}{OPEN_SPOOL_FILE_SUFFIX}"
+        return open(os.path.join(self.spool_directory, file_name), "a")
+
+
+def _complete_spool_file(path: str) -> str:
+    complete_path = path[: -len(OPEN_SPOOL_FILE_SUFFIX)] + SPOOL_FILE_SUFFIX
+    os.replace(path, complete_path)
+    return complete_path
+
+
+_writer: Optional[BufferedAuditLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> Optional[BufferedAuditLogWriter]:
+    """
+    Returns the buffered writer of this process, or None if buffering has not been
+    enabled with `AUDIT_LOG_SPOOL_DIRECTORY`.
+    """
+    global _writer
+    if not settings.AUDIT_LOG_SPOOL_DIRECTORY:
+        return None
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = BufferedAuditLogWriter(
+                    settings.AUDIT_LOG_SPOOL_DIRECTORY,
+                    settings.AUDIT_LOG_FLUSH_INTERVAL,
+                )
+    return _writer
+
+
+def _reset_writer() -> None:
+    # A forked worker must not share the buffer or the spool file of its parent
+    global _writer, _writer_lock
+    _writer = None
+    _writer_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_writer)
+
+
+def write_spooled_messages(spool_directory: str, min_age: float = 60) -> int:
+    """
+    Writes the messages of the spool files that haven't been modified in `min_age`
+    seconds to the database and removes the files. The files of running writers are
+    switched on every flush, so only the files of crashed processes and failed flushes
+    are that old. A file that was still open when its process crashed is completed
+    first, so `min_age` must be longer than the flush interval of the writers. Returns
+    the number of messages written.
+    """
+    count = 0
+    for file_name in sorted(os.listdir(spool_directory)):
+        path = os.path.join(spool_directory, file_name)
+        if not file_name.endswith((SPOOL_FILE_SUFFIX, OPEN_SPOOL_FILE_SUFFIX)):
+            continue
+        if time.time() - os.path.getmtime(path) < min_age:
+            continue
+        if file_name.endswith(OPEN_SPOOL_FILE_SUFFIX):
+            path = _complete_spool_file(path)
+        count += _write_spool_file(path)
+    return count
+
+
+def _write_spool_file(path: str) -> int:
+    messages = []
+    with open(path) as f:
+        for line in f:
+            try:
+                messages.append(json.loads(line))
+            except json.JSONDecodeError:
+                # The last line may have been cut short by a crash
+                _logger.warning("Skipping a malformed audit log line in %s", path)
+
+    with transaction.atomic():
+        AuditLog.objects.bulk_create(
+            [AuditLog(message=message) for message in messages],
+            batch_size=BATCH_SIZE,
+        )
+    os.remove(path)
+    return len(messages)
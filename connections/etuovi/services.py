@@ -7,13 +7,19 @@ from typing import Optional
 from apartment.elastic.documents import ApartmentDocument
 from connections.enums import ApartmentStateOfSale
 from connections.etuovi.etuovi_mapper import map_apartment_to_item
+from connections.mapping_cache import MappingCache
+from connections.pipeline import map_apartments, MappingStats
 
 _logger = logging.getLogger(__name__)
 
 
-def fetch_apartments_for_sale() -> list:
+def fetch_apartments_for_sale(
+    cache: Optional[MappingCache] = None, stats: Optional[MappingStats] = None
+) -> list:
     """
-    Fetch apartments for sale from elasticsearch and map them for Etuovi
+    Fetch apartments for sale from elasticsearch and map them for Etuovi. If a cache
+    is given, the apartments that haven't changed since the last run are not mapped
+    again. The mapping failures are counted in the given stats.
     """
     s_obj = (
         ApartmentDocument.search()
@@ -24,13 +30,13 @@ def fetch_apartments_for_sale() -> list:
     s_obj.execute()
     scan = s_obj.scan()
 
-    items = []
+    if stats is None:
+        stats = MappingStats()
+    items = [
+        item for (item,) in map_apartments(scan, [map_apartment_to_item], stats, cache)
+    ]
+    stats.log("Etuovi")
 
-    for hit in scan:
-        try:
-            items.append(map_apartment_to_item(hit))
-        except ValueError:
-            _logger.warning(f"Could not map apartment {hit.uuid}:", exc_info=True)
     if not items:
         _logger.warning(
             "There were no apartments to map or could not map any apartments"
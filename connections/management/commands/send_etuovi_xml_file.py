@@ -4,7 +4,7 @@ from django.core.management.base import BaseCommand
 from django_etuovi.etuovi import send_items
 
 from connections.etuovi.services import create_xml, fetch_apartments_for_sale
-from connections.models import MappedApartment
+from connections.mapping_cache import MappingCache
 from connections.utils import create_elastic_connection
 
 _logger = logging.getLogger(__name__)
@@ -20,10 +20,16 @@ class Command(BaseCommand):
             action="store_true",
             help="Only create XML file without sending it via FTP",
         )
+        parser.add_argument(
+            "--delta",
+            action="store_true",
+            help="Map only the apartments that have changed since the last run",
+        )
 
     def handle(self, *args, **options):
         path = settings.APARTMENT_DATA_TRANSFER_PATH
-        items = fetch_apartments_for_sale()
+        cache = MappingCache("etuovi", reuse=options["delta"])
+        items = fetch_apartments_for_sale(cache)
         xml_file = create_xml(items)
 
         if options["only_create_file"]:
@@ -43,12 +49,8 @@ class Command(BaseCommand):
                 )
                 raise e
 
-        MappedApartment.objects.exclude(
-            pk__in=[item.cust_itemcode for item in items]
-        ).update(mapped_etuovi=False)
-
-        for item in items:
-            MappedApartment.objects.update_or_create(
-                apartment_uuid=item.cust_itemcode,
-                defaults={"mapped_etuovi": True},
-            )
+        summary = cache.record_mapped(item.cust_itemcode for item in items)
+        _logger.info(
+            f"Etuovi apartments added: {summary.added}, kept: {summary.kept}, "
+            f"dropped: {summary.dropped}"
+        )
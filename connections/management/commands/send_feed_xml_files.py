@@ -0,0 +1,86 @@
+import logging
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_etuovi import etuovi
+from django_oikotie import oikotie
+
+from connections.etuovi.services import create_xml
+from connections.mapping_cache import MappingCache
+from connections.oikotie.services import (
+    create_xml_apartment_file,
+    create_xml_housing_company_file,
+)
+from connections.services import fetch_apartments_for_sale
+from connections.utils import create_elastic_connection
+
+_logger = logging.getLogger(__name__)
+create_elastic_connection()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the Etuovi apartments XML file and the Oikotie apartments and "
+        "housing companies XML files from a single Elasticsearch scan and send them "
+        "via FTP"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only_create_files",
+            action="store_true",
+            help="Only create XML files without sending them via FTP",
+        )
+        parser.add_argument(
+            "--delta",
+            action="store_true",
+            help="Map only the apartments that have changed since the last run",
+        )
+
+    def handle(self, *args, **options):
+        etuovi_cache = MappingCache("etuovi", reuse=options["delta"])
+        oikotie_cache = MappingCache("oikotie", reuse=options["delta"])
+        apartments = fetch_apartments_for_sale(etuovi_cache, oikotie_cache)
+
+        etuovi_file = create_xml(apartments.etuovi_items)
+        oikotie_files = [
+            create_xml_housing_company_file(apartments.oikotie_housing_companies),
+            create_xml_apartment_file(apartments.oikotie_apartments),
+        ]
+
+        if options["only_create_files"]:
+            _logger.info("Not sending XML files to Etuovi and Oikotie")
+            return
+
+        self.send_files(etuovi.send_items, "Etuovi", [etuovi_file])
+        summary = etuovi_cache.record_mapped(
+            item.cust_itemcode for item in apartments.etuovi_items
+        )
+        _logger.info(
+            f"Etuovi apartments added: {summary.added}, kept: {summary.kept}, "
+            f"dropped: {summary.dropped}"
+        )
+
+        self.send_files(oikotie.send_items, "Oikotie", oikotie_files)
+        summary = oikotie_cache.record_mapped(
+            item.key for item in apartments.oikotie_apartments
+        )
+        _logger.info(
+            f"Oikotie apartments added: {summary.added}, kept: {summary.kept}, "
+            f"dropped: {summary.dropped}"
+        )
+
+    def send_files(self, send_items, feed: str, files: list) -> None:
+        path = settings.APARTMENT_DATA_TRANSFER_PATH
+        for file in files:
+            if not file:
+                continue
+            try:
+                send_items(path, file)
+                _logger.info(
+                    f"Successfully sent XML file {path}/{file} to {feed} FTP server"
+                )
+            except Exception as e:
+                _logger.error(
+                    f"File {path}/{file} sending via FTP to {feed} failed:", str(e)
+                )
+                raise e
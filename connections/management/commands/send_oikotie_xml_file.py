@@ -3,7 +3,7 @@ from django.conf import settings
 from django.core.management.base import BaseCommand
 from django_oikotie.oikotie import send_items
 
-from connections.models import MappedApartment
+from connections.mapping_cache import MappingCache
 from connections.oikotie.services import (
     create_xml_apartment_file,
     create_xml_housing_company_file,
@@ -33,10 +33,16 @@ class Command(BaseCommand):
             choices=[1, 2],
             help="Send either housing company file (1) or apartment file (2)",
         )
+        parser.add_argument(
+            "--delta",
+            action="store_true",
+            help="Map only the apartments that have changed since the last run",
+        )
 
     def handle(self, *args, **options):
         path = settings.APARTMENT_DATA_TRANSFER_PATH
-        apartments, housing_companies = fetch_apartments_for_sale()
+        cache = MappingCache("oikotie", reuse=options["delta"])
+        apartments, housing_companies = fetch_apartments_for_sale(cache)
         sending_apartments = False
         oikotie_files = []
 
@@ -68,12 +74,8 @@ class Command(BaseCommand):
                     raise e
 
         if sending_apartments:
-            MappedApartment.objects.exclude(
-                pk__in=[item.key for item in apartments]
-            ).update(mapped_oikotie=False)
-
-            for item in apartments:
-                MappedApartment.objects.update_or_create(
-                    apartment_uuid=item.key,
-                    defaults={"mapped_oikotie": True},
-                )
+            summary = cache.record_mapped(item.key for item in apartments)
+            _logger.info(
+                f"Oikotie apartments added: {summary.added}, kept: {summary.kept}, "
+                f"dropped: {summary.dropped}"
+            )
@@ -0,0 +1,227 @@
+import importlib
+from enum import Enum
+
+import dataclasses
+import hashlib
+import json
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from django.utils.functional import Promise
+from typing import Dict, Iterable, Optional, Tuple
+
+from connections.models import MappedApartment, MappingSummary
+
+_logger = logging.getLogger(__name__)
+
+# Bump this whenever the mappers change, so that the previously mapped items are not
+# reused
+MAPPING_CACHE_VERSION = 3
+
+# The settings the mappers read. The items mapped with other values are not reused.
+MAPPER_SETTINGS = (
+    "ETUOVI_SUPPLIER_SOURCE_ITEMCODE",
+    "OIKOTIE_VENDOR_ID",
+    "LANGUAGE_CODE",
+)
+
+# Only the classes of these modules are created when the stored items are decoded
+_ITEM_MODULES = ("django_etuovi.", "django_oikotie.", "connections.")
+
+
+def get_source_hash(hit) -> str:
+    """
+    Returns a hash of the Elasticsearch source of the given apartment, the version of
+    the mappers and the settings they read.
+    """
+    source = json.dumps(
+        {
+            "version": MAPPING_CACHE_VERSION,
+            "settings": {
+                name: getattr(settings, name, None) for name in MAPPER_SETTINGS
+            },
+            "source": hit.to_dict(),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+class MappingCache:
+    """
+    Keeps the items mapped for a feed between the runs, so that only the apartments
+    whose source has changed since the last run need to be mapped again.
+
+    The items are stored in `MappedApartment` as JSON, together with the hash of the
+    source of the apartment, when the feed has been sent. Without `reuse`, every
+    apartment is mapped again, but the hashes and the items are still recorded for the
+    next run.
+    """
+
+    def __init__(self, feed: str, reuse: bool = True):
+        self.feed = feed
+        # the hashes of the apartments that were mapped or reused on this run
+        self.hashes: Dict[str, str] = {}
+        self._seen_hashes: Dict[str, str] = {}
+        self._items: Dict[str, tuple] = {}
+        self._stored: Dict[str, Tuple[str, object]] = {}
+        if reuse:
+            items_field = f"{feed}_mapped_items"
+            stored = MappedApartment.objects.filter(
+                **{f"mapped_{feed}": True, f"{items_field}__isnull": False}
+            ).values_list("apartment_uuid", f"{feed}_source_hash", items_field)
+            self._stored = {
+                str(apartment_uuid): (source_hash, items)
+                for apartment_uuid, source_hash, items in stored
+            }
+
+    def get(self, hit) -> Optional[tuple]:
+        """
+        Returns the items mapped on a previous run if the source of the apartment
+        hasn't changed since, otherwise None.
+        """
+        apartment_uuid = str(hit.uuid)
+        source_hash = get_source_hash(hit)
+        self._seen_hashes[apartment_uuid] = source_hash
+        stored = self._stored.get(apartment_uuid)
+        if stored is None or stored[0] != source_hash:
+            return None
+        try:
+            items = tuple(decode_item(item) for item in stored[1])
+        except (TypeError, ValueError, LookupError):
+            _logger.warning(
+                f"Could not decode the stored {self.feed} items of {apartment_uuid}",
+                exc_info=True,
+            )
+            return None
+        self._items[apartment_uuid] = items
+        self.hashes[apartment_uuid] = source_hash
+        return items
+
+    def set(self, hit, items: tuple) -> None:
+        """
+        Stores the items mapped from the apartment on this run. `get()` must have been
+        called for the apartment first.
+        """
+        apartment_uuid = str(hit.uuid)
+        self._items[apartment_uuid] = items
+        self.hashes[apartment_uuid] = self._seen_hashes[apartment_uuid]
+
+    def record_mapped(self, apartment_uuids: Iterable) -> MappingSummary:
+        """
+        Records the given apartments as the ones mapped to the feed, with their hashes
+        and items for the next run. See `MappedApartmentQuerySet.record_mapped()`.
+        """
+        source_hashes = {}
+        mapped_items = {}
+        for apartment_uuid in map(str, apartment_uuids):
+            source_hashes[apartment_uuid] = self.hashes.get(apartment_uuid, "")
+            mapped_items[apartment_uuid] = self._encode_items(apartment_uuid)
+        return MappedApartment.objects.record_mapped(
+            self.feed, source_hashes, mapped_items
+        )
+
+    def _encode_items(self, apartment_uuid: str) -> Optional[list]:
+        items = self._items.get(apartment_uuid)
+        if items is None:
+            return None
+        try:
+            return [encode_item(item) for item in items]
+        except TypeError:
+            _logger.warning(
+                f"Could not encode the {self.feed} items of {apartment_uuid}",
+                exc_info=True,
+            )
+            return None
+
+
+def encode_item(value):
+    """
+    Encodes a mapped item into a value that can be stored as JSON. The dataclasses and
+    the enums are tagged with their class, so that `decode_item()` can recreate them.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Promise):
+        return str(value)
+    if isinstance(value, Enum):
+        return {"__enum__": _get_class_path(value), "value": encode_item(value.value)}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {
+            "__dataclass__": _get_class_path(value),
+            "fields": {
+                field.name: encode_item(getattr(value, field.name))
+                for field in dataclasses.fields(value)
+            },
+        }
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, (list, tuple)):
+        encoded = [encode_item(item) for item in value]
+        return {"__tuple__": encoded} if isinstance(value, tuple) else encoded
+    if isinstance(value, dict):
+        return {
+            "__dict__": {str(key): encode_item(item) for key, item in value.items()}
+        }
+    raise TypeError(f"Cannot encode a value of type {type(value).__name__}")
+
+
+def decode_item(value):
+    """
+    Recreates a mapped item encoded by `encode_item()`. Only the classes of the feed
+    libraries and of this app are created.
+    """
+    if isinstance(value, list):
+        return [decode_item(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__enum__" in value:
+        return _get_class(value["__enum__"], Enum)(decode_item(value["value"]))
+    if "__dataclass__" in value:
+        return _decode_dataclass(value)
+    if "__datetime__" in value:
+        return datetime.fromisoformat(value["__datetime__"])
+    if "__date__" in value:
+        return date.fromisoformat(value["__date__"])
+    if "__decimal__" in value:
+        return Decimal(value["__decimal__"])
+    if "__tuple__" in value:
+        return tuple(decode_item(item) for item in value["__tuple__"])
+    if "__dict__" in value:
+        return {key: decode_item(item) for key, item in value["__dict__"].items()}
+    raise ValueError(f"Unknown encoded value: {value}")
+
+
+def _decode_dataclass(value: dict):
+    cls = _get_class(value["__dataclass__"])
+    fields = {name: decode_item(item) for name, item in value["fields"].items()}
+    init_fields = {field.name for field in dataclasses.fields(cls) if field.init}
+    item = cls(**{name: fields[name] for name in init_fields if name in fields})
+    for name in fields.keys() - init_fields:
+        setattr(item, name, fields[name])
+    return item
+
+
+def _get_class_path(value) -> str:
+    cls = type(value)
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _get_class(path: str, base: Optional[type] = None) -> type:
+    module_name, _, qualname = path.partition(":")
+    if not module_name.startswith(_ITEM_MODULES):
+        raise ValueError(f"Not an item class: {path}")
+    cls = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        cls = getattr(cls, name)
+    if not isinstance(cls, type) or not (
+        issubclass(cls, base) if base is not None else dataclasses.is_dataclass(cls)
+    ):
+        raise ValueError(f"Not an item class: {path}")
+    return cls
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("connections", "0002_add_timestamp_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mappedapartment",
+            name="etuovi_source_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="mappedapartment",
+            name="oikotie_source_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("connections", "0003_mappedapartment_source_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mappedapartment",
+            name="etuovi_mapped_items",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="mappedapartment",
+            name="oikotie_mapped_items",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -1,7 +1,113 @@
-from django.db import models
+import json
+from dataclasses import dataclass
+from django.db import connection, models, transaction
+from django.utils import timezone
+from typing import Dict, Optional
 
 from apartment_application_service.models import TimestampedModel
 
+FEEDS = ("etuovi", "oikotie")
+
+
+@dataclass
+class MappingSummary:
+    added: int
+    kept: int
+    dropped: int
+
+
+class MappedApartmentQuerySet(models.QuerySet):
+    def record_mapped(
+        self,
+        feed: str,
+        source_hashes: Dict[str, str],
+        mapped_items: Optional[Dict[str, object]] = None,
+    ) -> MappingSummary:
+        """
+        Marks the given apartments as mapped to the feed with their source hashes, and
+        every other apartment as not mapped. Takes a constant number of queries.
+
+        `source_hashes` maps the UUIDs of the mapped apartments to their source hashes,
+        and `mapped_items` to the JSON of the items mapped from them, if any. Returns
+        how many apartments were added to, kept in and dropped from the feed.
+        """
+        if feed not in FEEDS:
+            raise ValueError(f"Unknown feed: {feed}")
+        mapped_field = f"mapped_{feed}"
+        apartment_uuids = [str(apartment_uuid) for apartment_uuid in source_hashes]
+
+        with transaction.atomic():
+            previous = {
+                str(apartment_uuid)
+                for apartment_uuid in self.filter(**{mapped_field: True}).values_list(
+                    "apartment_uuid", flat=True
+                )
+            }
+            dropped = (
+                self.filter(**{mapped_field: True})
+                .exclude(pk__in=apartment_uuids)
+                .update(**{mapped_field: False})
+            )
+            if apartment_uuids:
+                self._upsert(feed, source_hashes, mapped_items or {})
+
+        kept = len(previous.intersection(apartment_uuids))
+        return MappingSummary(
+            added=len(apartment_uuids) - kept, kept=kept, dropped=dropped
+        )
+
+    def _upsert(
+        self, feed: str, source_hashes: Dict[str, str], mapped_items: Dict[str, object]
+    ) -> None:
+        # bulk_create() can't update the existing rows before Django 4.1
+        quote_name = connection.ops.quote_name
+        columns = ["apartment_uuid"]
+        values = ["apartment_uuid"]
+        for other_feed in FEEDS:
+            columns += [
+                f"mapped_{other_feed}",
+                f"{other_feed}_source_hash",
+                f"{other_feed}_mapped_items",
+            ]
+            if other_feed == feed:
+                values += ["true", "source_hash", "items"]
+            else:
+                values += ["false", "''", "NULL"]
+        mapped_field = quote_name(f"mapped_{feed}")
+        hash_field = quote_name(f"{feed}_source_hash")
+        items_field = quote_name(f"{feed}_mapped_items")
+        sql = (
+            f"INSERT INTO {quote_name(self.model._meta.db_table)} "
+            f"({', '.join(quote_name(column) for column in columns)}, "
+            "created_at, updated_at) "
+            f"SELECT {', '.join(values)}, %s, %s "
+            "FROM unnest(%s::uuid[], %s::varchar[], %s::jsonb[]) "
+            "AS t(apartment_uuid, source_hash, items) "
+            f"ON CONFLICT (apartment_uuid) DO UPDATE SET {mapped_field} = true, "
+            f"{hash_field} = EXCLUDED.{hash_field}, "
+            f"{items_field} = EXCLUDED.{items_field}, "
+            "updated_at = EXCLUDED.updated_at"
+        )
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql,
+                [
+                    now,
+                    now,
+                    [str(apartment_uuid) for apartment_uuid in source_hashes],
+                    list(source_hashes.values()),
+                    [
+                        _dump_items(mapped_items.get(apartment_uuid))
+                        for apartment_uuid in source_hashes
+                    ],
+                ],
+            )
+
+
+def _dump_items(items: object) -> Optional[str]:
+    return json.dumps(items) if items is not None else None
+
 
 class MappedApartment(TimestampedModel):
     """
@@ -12,3 +118,10 @@ class MappedApartment(TimestampedModel):
     apartment_uuid = models.UUIDField(primary_key=True)
     mapped_etuovi = models.BooleanField(default=False)
     mapped_oikotie = models.BooleanField(default=False)
+    etuovi_source_hash = models.CharField(max_length=64, blank=True)
+    oikotie_source_hash = models.CharField(max_length=64, blank=True)
+    # the items mapped from the apartment, reused while its source hash is unchanged
+    etuovi_mapped_items = models.JSONField(null=True, blank=True)
+    oikotie_mapped_items = models.JSONField(null=True, blank=True)
+
+    objects = MappedApartmentQuerySet.as_manager()
@@ -1,22 +1,30 @@
+import dataclasses
 import logging
 import os
 from django.conf import settings
 from django_oikotie.oikotie import create_apartments, create_housing_companies
-from typing import Optional, Tuple
+from django_oikotie.xml_models.housing_company import HousingCompany
+from typing import Dict, Optional, Tuple, Union
 
 from apartment.elastic.documents import ApartmentDocument
 from connections.enums import ApartmentStateOfSale
+from connections.mapping_cache import MappingCache
 from connections.oikotie.oikotie_mapper import (
     map_oikotie_apartment,
     map_oikotie_housing_company,
 )
+from connections.pipeline import map_apartments, MappingStats
 
 _logger = logging.getLogger(__name__)
 
 
-def fetch_apartments_for_sale() -> Tuple[list, list]:
+def fetch_apartments_for_sale(
+    cache: Optional[MappingCache] = None, stats: Optional[MappingStats] = None
+) -> Tuple[list, list]:
     """
-    Fetch apartments for sale from elasticsearch and map them for Oikotie
+    Fetch apartments for sale from elasticsearch and map them for Oikotie. If a cache
+    is given, the apartments that haven't changed since the last run are not mapped
+    again. The mapping failures are counted in the given stats.
     """
     s_obj = (
         ApartmentDocument.search()
@@ -29,20 +37,15 @@ def fetch_apartments_for_sale() -> Tuple[list, list]:
     apartments = []
     housing_companies = []
 
-    for hit in scan:
-        try:
-            apartment = map_oikotie_apartment(hit)
-        except ValueError:
-            _logger.warning(f"Could not map apartment {hit.uuid}", exc_info=True)
-            continue
-        try:
-            housing = map_oikotie_housing_company(hit)
-        except ValueError:
-            _logger.warning(f"Could not map housing company {hit.uuid}")
-            continue
-
+    if stats is None:
+        stats = MappingStats()
+    for apartment, housing in map_apartments(
+        scan, [map_oikotie_apartment, HousingCompanyMapper()], stats, cache
+    ):
         apartments.append(apartment)
         housing_companies.append(housing)
+    housing_companies = merge_housing_companies(apartments, housing_companies)
+    stats.log("Oikotie")
 
     if not apartments:
         _logger.warning(
@@ -52,6 +55,56 @@ def fetch_apartments_for_sale() -> Tuple[list, list]:
     return (apartments, housing_companies)
 
 
+class HousingCompanyMapper:
+    """
+    Maps the housing company of each project only once per mapper. The housing company
+    is mapped from the project fields, which are the same on every apartment of the
+    project.
+
+    When a chunk is mapped across the process pool, the mapper is pickled with each
+    batch sent to a worker, so the memo only lasts for that batch and a project may
+    be mapped once per batch. `merge_housing_companies()` leaves one housing company
+    per project in the end.
+    """
+
+    def __init__(self):
+        self.__name__ = map_oikotie_housing_company.__name__
+        self._housing_companies: Dict[str, Union[HousingCompany, ValueError]] = {}
+
+    def __call__(self, elastic_apartment) -> HousingCompany:
+        project_uuid = str(elastic_apartment.project_uuid)
+        if project_uuid not in self._housing_companies:
+            try:
+                housing_company = map_oikotie_housing_company(elastic_apartment)
+            except ValueError as e:
+                housing_company = e
+            self._housing_companies[project_uuid] = housing_company
+        housing_company = self._housing_companies[project_uuid]
+        if isinstance(housing_company, ValueError):
+            raise housing_company
+        return housing_company
+
+
+def merge_housing_companies(apartments: list, housing_companies: list) -> list:
+    """
+    Returns a single housing company per project from the housing companies mapped
+    for each of the apartments, listing the types of all the apartments of the
+    project.
+    """
+    merged = {}
+    for apartment, housing_company in zip(apartments, housing_companies):
+        key = str(housing_company.key)
+        if key not in merged:
+            merged[key] = dataclasses.replace(
+                housing_company,
+                apartment=dataclasses.replace(housing_company.apartment, types=[]),
+            )
+        apartment_types = merged[key].apartment.types
+        if apartment.type not in apartment_types:
+            apartment_types.append(apartment.type)
+    return list(merged.values())
+
+
 def create_xml_apartment_file(apartments: list) -> Optional[str]:
     """
     Create XML file from apartment list
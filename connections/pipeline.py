@@ -0,0 +1,146 @@
+import logging
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from connections.mapping_cache import MappingCache
+
+_logger = logging.getLogger(__name__)
+
+# The hits are pulled from the scan and mapped this many at a time. Only one chunk of
+# Elasticsearch documents is held at once, but the mapped items of the whole feed are
+# collected for the XML writers, so the memory use still grows with the feed.
+MAPPING_CHUNK_SIZE = 500
+
+# Chunks with at least this many apartments to map are mapped across a process pool
+PARALLEL_MAPPING_THRESHOLD = 100
+PARALLEL_MAPPING_WORKERS = os.cpu_count() or 1
+
+# The result of mapping a single apartment: the items of every mapper, or the name of
+# the first mapper that failed and its error
+_Result = Tuple[Optional[tuple], Optional[Tuple[str, str]]]
+
+
+@dataclass
+class MappingStats:
+    mapped: int = 0
+    reused: int = 0
+    # failure counts keyed by the name of the mapper
+    failures: Counter = field(default_factory=Counter)
+    failed_apartments: List[str] = field(default_factory=list)
+
+    def log(self, feed: str) -> None:
+        _logger.info(
+            f"Mapped {self.mapped} and reused {self.reused} {feed} apartments, "
+            f"{len(self.failed_apartments)} apartments could not be mapped"
+        )
+        for mapper_name, count in self.failures.items():
+            _logger.warning(f"{mapper_name} failed for {count} {feed} apartments")
+
+
+def map_apartments(
+    hits: Iterable,
+    mappers: Sequence[Callable],
+    stats: MappingStats,
+    cache: Optional[MappingCache] = None,
+    pool: Optional["MappingPool"] = None,
+) -> Iterator[tuple]:
+    """
+    Maps the apartments with every given mapper and yields a tuple of the items of
+    the mappers for each apartment that all of them could map, in the order of the
+    hits. A mapper fails by raising a ValueError, which is counted in the stats.
+
+    The hits are consumed in chunks of `MAPPING_CHUNK_SIZE`. Large chunks are mapped
+    across a process pool, since the mappers are CPU bound. The pool is shut down at
+    the end, unless it is given by the caller.
+    """
+    hits = iter(hits)
+    own_pool = pool is None
+    if own_pool:
+        pool = MappingPool()
+    try:
+        while True:
+            chunk = list(islice(hits, MAPPING_CHUNK_SIZE))
+            if not chunk:
+                return
+            results = _map_chunk(chunk, mappers, stats, cache, pool)
+            for hit, (items, failure) in zip(chunk, results):
+                if failure is not None:
+                    mapper_name, error = failure
+                    stats.failures[mapper_name] += 1
+                    stats.failed_apartments.append(str(hit.uuid))
+                    _logger.warning(
+                        f"Could not map apartment {hit.uuid} with {mapper_name}: "
+                        f"{error}"
+                    )
+                    continue
+                yield items
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+
+class MappingPool:
+    """
+    Process pool that is started only when a chunk is large enough to need it.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def map(self, mappers: Sequence[Callable], hits: list) -> Iterable[_Result]:
+        if len(hits) < PARALLEL_MAPPING_THRESHOLD or PARALLEL_MAPPING_WORKERS <= 1:
+            return [_map_apartment(mappers, hit) for hit in hits]
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=PARALLEL_MAPPING_WORKERS)
+        return self._executor.map(
+            _map_apartment,
+            [mappers] * len(hits),
+            hits,
+            chunksize=math.ceil(len(hits) / PARALLEL_MAPPING_WORKERS),
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+def _map_chunk(
+    chunk: list,
+    mappers: Sequence[Callable],
+    stats: MappingStats,
+    cache: Optional[MappingCache],
+    pool: MappingPool,
+) -> List[_Result]:
+    results: List[_Result] = [(None, None)] * len(chunk)
+    to_map = []
+    for index, hit in enumerate(chunk):
+        items = cache.get(hit) if cache is not None else None
+        if items is not None:
+            stats.reused += 1
+            results[index] = (items, None)
+        else:
+            to_map.append(index)
+
+    mapped = pool.map(mappers, [chunk[index] for index in to_map])
+    for index, result in zip(to_map, mapped):
+        results[index] = result
+        if result[0] is not None:
+            stats.mapped += 1
+            if cache is not None:
+                cache.set(chunk[index], result[0])
+    return results
+
+
+def _map_apartment(mappers: Sequence[Callable], hit) -> _Result:
+    items = []
+    for mapper in mappers:
+        try:
+            items.append(mapper(hit))
+        except ValueError as e:
+            return None, (mapper.__name__, str(e))
+    return tuple(items), None
@@ -0,0 +1,83 @@
+import logging
+from dataclasses import dataclass, field
+from elasticsearch_dsl import Q
+from itertools import islice
+from typing import Optional
+
+from apartment.elastic.documents import ApartmentDocument
+from connections.enums import ApartmentStateOfSale
+from connections.etuovi.etuovi_mapper import map_apartment_to_item
+from connections.mapping_cache import MappingCache
+from connections.oikotie.oikotie_mapper import map_oikotie_apartment
+from connections.oikotie.services import HousingCompanyMapper, merge_housing_companies
+from connections.pipeline import (
+    map_apartments,
+    MAPPING_CHUNK_SIZE,
+    MappingPool,
+    MappingStats,
+)
+
+_logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FeedApartments:
+    etuovi_items: list = field(default_factory=list)
+    oikotie_apartments: list = field(default_factory=list)
+    oikotie_housing_companies: list = field(default_factory=list)
+    etuovi_stats: MappingStats = field(default_factory=MappingStats)
+    oikotie_stats: MappingStats = field(default_factory=MappingStats)
+
+
+def fetch_apartments_for_sale(
+    etuovi_cache: Optional[MappingCache] = None,
+    oikotie_cache: Optional[MappingCache] = None,
+) -> FeedApartments:
+    """
+    Fetch the apartments for sale published on Etuovi or Oikotie from elasticsearch
+    with a single scan, and map each of them for the feeds it is published on. The
+    mapped items of both feeds are returned in lists, since the XML writers take the
+    whole feed at once.
+    """
+    s_obj = (
+        ApartmentDocument.search()
+        .filter("term", _language__keyword="fi")
+        .filter("term", apartment_state_of_sale__keyword=ApartmentStateOfSale.FOR_SALE)
+        .filter(Q("term", publish_on_etuovi=True) | Q("term", publish_on_oikotie=True))
+    )
+    scan = s_obj.scan()
+
+    result = FeedApartments()
+    housing_company_mapper = HousingCompanyMapper()
+    pool = MappingPool()
+    try:
+        while True:
+            chunk = list(islice(scan, MAPPING_CHUNK_SIZE))
+            if not chunk:
+                break
+            for (item,) in map_apartments(
+                [hit for hit in chunk if hit.publish_on_etuovi],
+                [map_apartment_to_item],
+                result.etuovi_stats,
+                etuovi_cache,
+                pool,
+            ):
+                result.etuovi_items.append(item)
+            for apartment, housing in map_apartments(
+                [hit for hit in chunk if hit.publish_on_oikotie],
+                [map_oikotie_apartment, housing_company_mapper],
+                result.oikotie_stats,
+                oikotie_cache,
+                pool,
+            ):
+                result.oikotie_apartments.append(apartment)
+                result.oikotie_housing_companies.append(housing)
+    finally:
+        pool.shutdown()
+    result.oikotie_housing_companies = merge_housing_companies(
+        result.oikotie_apartments, result.oikotie_housing_companies
+    )
+
+    result.etuovi_stats.log("Etuovi")
+    result.oikotie_stats.log("Oikotie")
+    return result
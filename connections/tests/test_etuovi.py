@@ -147,3 +147,52 @@ class TestApartmentFetchingFromElasticAndMapping:
         file_name = create_xml(items)
 
         assert file_name is None
+
+    @pytest.mark.usefixtures("not_sending_etuovi_ftp", "elastic_apartments")
+    def test_delta_run_maps_only_changed_apartments(self, monkeypatch):
+        from connections.etuovi import services
+
+        mapped = []
+
+        def map_apartment(hit):
+            mapped.append(hit.uuid)
+            return map_apartment_to_item(hit)
+
+        monkeypatch.setattr(services, "map_apartment_to_item", map_apartment)
+        expected = get_elastic_apartments_for_sale_published_on_etuovi_uuids()
+
+        call_command("send_etuovi_xml_file", "--delta")
+        assert sorted(mapped) == sorted(expected)
+        assert MappedApartment.objects.exclude(etuovi_source_hash="").count() == len(
+            expected
+        )
+        assert MappedApartment.objects.filter(
+            etuovi_mapped_items__isnull=False
+        ).count() == len(expected)
+
+        mapped.clear()
+        call_command("send_etuovi_xml_file", "--delta")
+        assert mapped == []
+        assert MappedApartment.objects.filter(mapped_etuovi=True).count() == len(
+            expected
+        )
+
+    @pytest.mark.usefixtures(
+        "not_sending_etuovi_ftp", "not_sending_oikotie_ftp", "elastic_apartments"
+    )
+    def test_combined_feed_command_maps_both_feeds(self):
+        call_command("send_feed_xml_files")
+
+        etuovi_mapped = MappedApartment.objects.filter(mapped_etuovi=True).values_list(
+            "apartment_uuid", flat=True
+        )
+        oikotie_mapped = MappedApartment.objects.filter(
+            mapped_oikotie=True
+        ).values_list("apartment_uuid", flat=True)
+
+        assert sorted(etuovi_mapped) == sorted(
+            map(UUID, get_elastic_apartments_for_sale_published_on_etuovi_uuids())
+        )
+        assert sorted(oikotie_mapped) == sorted(
+            map(UUID, get_elastic_apartments_for_sale_published_on_oikotie_uuids())
+        )
@@ -0,0 +1,61 @@
+from enum import Enum
+
+import pytest
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from django.utils.translation import gettext_lazy as _
+from typing import Optional
+
+from connections.mapping_cache import decode_item, encode_item
+
+
+class Condition(Enum):
+    GOOD = "good"
+    POOR = "poor"
+
+
+@dataclass
+class Address:
+    street: str
+    postal_code: Optional[str] = None
+
+
+@dataclass
+class Item:
+    key: str
+    condition: Condition
+    address: Address
+    price: Decimal
+    available: date
+    modified: datetime
+    rooms: tuple
+    images: list = field(default_factory=list)
+    extra: dict = field(default_factory=dict)
+
+
+def test_encoded_item_is_decoded_back():
+    item = Item(
+        key="1",
+        condition=Condition.GOOD,
+        address=Address("Street 1", "00100"),
+        price=Decimal("100000.50"),
+        available=date(2022, 1, 1),
+        modified=datetime(2022, 1, 1, 12, 30),
+        rooms=(1, 2),
+        images=[Address("Street 2")],
+        extra={"1": None},
+    )
+
+    assert decode_item(encode_item(item)) == item
+
+
+def test_lazy_translation_is_encoded_as_string():
+    assert encode_item(_("Apartment")) == "Apartment"
+
+
+def test_decoding_refuses_other_classes():
+    with pytest.raises(ValueError):
+        decode_item({"__dataclass__": "subprocess:Popen", "fields": {}})
+    with pytest.raises(ValueError):
+        decode_item({"__enum__": "connections.tests.test_mapping_cache:Item"})
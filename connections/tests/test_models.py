@@ -0,0 +1,45 @@
+import pytest
+import uuid
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from connections.models import MappedApartment
+
+
+@pytest.mark.django_db
+def test_record_mapped_summary():
+    kept = str(uuid.uuid4())
+    dropped = str(uuid.uuid4())
+    added = str(uuid.uuid4())
+    MappedApartment.objects.create(apartment_uuid=kept, mapped_etuovi=True)
+    MappedApartment.objects.create(
+        apartment_uuid=dropped, mapped_etuovi=True, mapped_oikotie=True
+    )
+
+    summary = MappedApartment.objects.record_mapped(
+        "etuovi", {kept: "a" * 64, added: "b" * 64}
+    )
+
+    assert (summary.added, summary.kept, summary.dropped) == (1, 1, 1)
+    assert set(
+        MappedApartment.objects.filter(mapped_etuovi=True).values_list(
+            "apartment_uuid", "etuovi_source_hash"
+        )
+    ) == {(uuid.UUID(kept), "a" * 64), (uuid.UUID(added), "b" * 64)}
+    # the other feed is left as it was
+    assert set(
+        MappedApartment.objects.filter(mapped_oikotie=True).values_list(
+            "apartment_uuid", flat=True
+        )
+    ) == {uuid.UUID(dropped)}
+
+
+@pytest.mark.django_db
+def test_record_mapped_query_count_does_not_depend_on_apartment_count():
+    def count_queries(apartment_count):
+        source_hashes = {str(uuid.uuid4()): "" for _ in range(apartment_count)}
+        with CaptureQueriesContext(connection) as context:
+            MappedApartment.objects.record_mapped("oikotie", source_hashes)
+        return len(context.captured_queries)
+
+    assert count_queries(2) == count_queries(50)
@@ -3,7 +3,7 @@ import pytest
 from django.conf import settings
 from django.core.management import call_command
 from django_etuovi.utils.testing import check_dataclass_typing
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from apartment.tests.factories import ApartmentDocumentFactory
 from connections.models import MappedApartment
@@ -36,6 +36,8 @@ from connections.oikotie.services import (
     create_xml_apartment_file,
     create_xml_housing_company_file,
     fetch_apartments_for_sale,
+    HousingCompanyMapper,
+    merge_housing_companies,
 )
 from connections.tests.factories import ApartmentMinimalFactory
 from connections.tests.utils import (
@@ -64,6 +66,27 @@ class TestOikotieMapper:
         oikotie_housing_company = map_oikotie_housing_company(elastic_apartment)
         check_dataclass_typing(oikotie_housing_company)
 
+    def test_housing_company_is_mapped_once_per_project(self):
+        project_uuid = str(uuid4())
+        elastic_apartments = [
+            ApartmentDocumentFactory(project_uuid=project_uuid) for _ in range(3)
+        ] + [ApartmentDocumentFactory()]
+        mapper = HousingCompanyMapper()
+
+        apartments = [map_oikotie_apartment(a) for a in elastic_apartments]
+        housing_companies = [mapper(a) for a in elastic_apartments]
+        merged = merge_housing_companies(apartments, housing_companies)
+
+        assert housing_companies[0] is housing_companies[2]
+        assert [str(h.key) for h in merged] == [
+            project_uuid,
+            str(elastic_apartments[3].project_uuid),
+        ]
+        assert merged[0].apartment.types == list(
+            dict.fromkeys(apartment.type for apartment in apartments[:3])
+        )
+        check_dataclass_typing(merged[0])
+
     def test_elastic_to_oikotie__address__mapping_types(self):
         elastic_apartment = ApartmentDocumentFactory()
         oikotie_address = map_address(elastic_apartment)
@@ -0,0 +1,37 @@
+import pytest
+from types import SimpleNamespace
+
+from connections import pipeline
+from connections.pipeline import map_apartments, MappingStats
+
+
+def map_number(hit):
+    if hit.number < 0:
+        raise ValueError("negative number")
+    return hit.number
+
+
+def map_double(hit):
+    if hit.number % 3 == 0:
+        raise ValueError("divisible by three")
+    return hit.number * 2
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_map_apartments(monkeypatch, parallel):
+    monkeypatch.setattr(pipeline, "MAPPING_CHUNK_SIZE", 4)
+    if parallel:
+        monkeypatch.setattr(pipeline, "PARALLEL_MAPPING_THRESHOLD", 1)
+        monkeypatch.setattr(pipeline, "PARALLEL_MAPPING_WORKERS", 2)
+    hits = [
+        SimpleNamespace(uuid=f"uuid-{number}", number=number)
+        for number in [1, 2, -1, 3, 4, 5, 6, -2, 7]
+    ]
+    stats = MappingStats()
+
+    items = list(map_apartments(hits, [map_number, map_double], stats))
+
+    assert items == [(1, 2), (2, 4), (4, 8), (5, 10), (7, 14)]
+    assert stats.mapped == 5
+    assert stats.failures == {"map_number": 2, "map_double": 2}
+    assert stats.failed_apartments == ["uuid--1", "uuid-3", "uuid-6", "uuid--2"]
@@ -133,7 +133,8 @@ def get_elastic_apartments_for_sale_project_uuids() -> list:
     scan = s_obj.scan()
     uuids = []
     for hit in scan:
-        uuids.append(str(hit.project_uuid))
+        if str(hit.project_uuid) not in uuids:
+            uuids.append(str(hit.project_uuid))
     return uuids
 
 
@@ -1,9 +1,10 @@
 from django.db import transaction
+from django.db.models import Manager
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from uuid import UUID
 
-from apartment.elastic.queries import get_apartment
+from apartment.elastic.queries import get_apartment, get_apartments_by_uuids
 from apartment_application_service.utils import update_obj
 from application_form.api.serializers import ApartmentReservationSerializerBase
 from application_form.models import ApartmentReservation
@@ -13,6 +14,21 @@ from users.api.sales.serializers import ProfileSerializer
 from users.models import Profile
 
 
+class CustomerApartmentReservationListSerializer(serializers.ListSerializer):
+    """
+    Fetches the apartments of all the reservations with a single Elasticsearch query
+    and stores them to the context, like `prefetch_related()` does for model instances.
+    """
+
+    def to_representation(self, data):
+        reservations = list(data.all() if isinstance(data, Manager) else data)
+        self.context["apartments"] = get_apartments_by_uuids(
+            [reservation.apartment_uuid for reservation in reservations],
+            include_project_fields=True,
+        )
+        return super().to_representation(reservations)
+
+
 class CustomerApartmentReservationSerializer(ApartmentReservationSerializerBase):
     project_uuid = serializers.SerializerMethodField()
     project_housing_company = serializers.SerializerMethodField()
@@ -45,11 +61,15 @@ class CustomerApartmentReservationSerializer(ApartmentReservationSerializerBase)
             "apartment_right_of_occupancy_payment",
             "apartment_installments",
         ) + ApartmentReservationSerializerBase.Meta.fields
+        list_serializer_class = CustomerApartmentReservationListSerializer
 
     def to_representation(self, instance):
-        self.context["apartment"] = get_apartment(
-            instance.apartment_uuid, include_project_fields=True
-        )
+        apartment = self.context.get("apartments", {}).get(str(instance.apartment_uuid))
+        if apartment is None:
+            apartment = get_apartment(
+                instance.apartment_uuid, include_project_fields=True
+            )
+        self.context["apartment"] = apartment
         return super().to_representation(instance)
 
     def get_project_uuid(self, obj) -> UUID:
@@ -110,8 +130,12 @@ class CustomerSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(CustomerApartmentReservationSerializer(many=True))
     def get_apartment_reservations(self, obj):
-        reservations = ApartmentReservation.objects.filter(
-            application_apartment__application__customer=obj
+        reservations = (
+            ApartmentReservation.objects.filter(
+                application_apartment__application__customer=obj
+            )
+            .select_related("application_apartment__lotteryeventresult")
+            .prefetch_related("apartment_installments")
         )
         return CustomerApartmentReservationSerializer(reservations, many=True).data
 
@@ -1,17 +1,19 @@
 from django.db.models import Q
 from rest_framework import permissions
+from rest_framework.response import Response
+from typing import Tuple
 
 from audit_log.viewsets import AuditLoggingModelViewSet
 from customer.api.sales.serializers import CustomerListSerializer, CustomerSerializer
 from customer.models import Customer
+from users.models import Profile
+from users.sorting import get_sort_key
 
 
 class CustomerViewSet(AuditLoggingModelViewSet):
     SEARCH_VALUE_MIN_LENGTH = 2
 
-    queryset = Customer.objects.all().order_by(
-        "primary_profile__last_name", "primary_profile__first_name"
-    )
+    queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     permission_classes = [permissions.AllowAny]
     http_method_names = ["get", "post", "put", "head"]  # disable PATCH
@@ -29,36 +31,46 @@ class CustomerViewSet(AuditLoggingModelViewSet):
             if search_values_less_than_min_length:
                 return Customer.objects.none()
 
-            queryset = Customer.objects.all().order_by(
-                "primary_profile__last_name",
-                "primary_profile__first_name",
-                "secondary_profile__last_name",
-                "secondary_profile__first_name",
+            queryset = Customer.objects.select_related(
+                "primary_profile", "secondary_profile"
             )
-            if first_name:
-                queryset = queryset.filter(
-                    Q(primary_profile__first_name__icontains=first_name)
-                    | Q(secondary_profile__first_name__icontains=first_name)
-                )
-            if last_name:
-                queryset = queryset.filter(
-                    Q(primary_profile__last_name__icontains=last_name)
-                    | Q(secondary_profile__last_name__icontains=last_name)
-                )
-            if phone_number:
-                queryset = queryset.filter(
-                    Q(primary_profile__phone_number__icontains=phone_number)
-                    | Q(secondary_profile__phone_number__icontains=phone_number)
-                )
-            if email:
-                queryset = queryset.filter(
-                    Q(primary_profile__email__icontains=email)
-                    | Q(secondary_profile__email__icontains=email)
-                )
+            search_values = {
+                "first_name": first_name,
+                "last_name": last_name,
+                "phone_number": phone_number,
+                "email": email,
+            }
+            for field, value in search_values.items():
+                if value:
+                    profile_ids = Profile.objects.search(field, value).values("pk")
+                    queryset = queryset.filter(
+                        Q(primary_profile__in=profile_ids)
+                        | Q(secondary_profile__in=profile_ids)
+                    )
             return queryset
         return super().get_queryset()
 
+    def list(self, request, *args, **kwargs):
+        # The names are encrypted, so the customers are sorted by them only once they
+        # have been decrypted. The list is limited to the customers matching a search.
+        customers = sorted(
+            self.filter_queryset(self.get_queryset()), key=_get_customer_sort_key
+        )
+        serializer = self.get_serializer(customers, many=True)
+        return Response(serializer.data)
+
     def get_serializer_class(self):
         if self.action == "list":
             return CustomerListSerializer
         return super().get_serializer_class()
+
+
+def _get_customer_sort_key(customer: Customer) -> Tuple[str, bool, str]:
+    primary = customer.primary_profile
+    secondary = customer.secondary_profile
+    return (
+        get_sort_key(primary.last_name, primary.first_name),
+        # the customers without a secondary profile come last
+        secondary is None,
+        get_sort_key(secondary.last_name, secondary.first_name) if secondary else "",
+    )
@@ -4,7 +4,9 @@ Test cases for customer api of sales.
 import pytest
 from django.urls import reverse
 from rest_framework import status
+from unittest.mock import patch
 
+from apartment.elastic.documents import ApartmentDocument
 from apartment.tests.factories import ApartmentDocumentFactory
 from application_form.tests.factories import ApartmentReservationFactory
 from customer.api.sales.views import CustomerViewSet
@@ -88,6 +90,37 @@ def test_get_customer_api_detail(api_client):
     ]
 
 
+@pytest.mark.django_db
+def test_get_customer_api_detail_fetches_apartments_with_one_query(
+    profile_api_client,
+):
+    customer = CustomerFactory()
+    apartments = ApartmentDocumentFactory.create_batch(3)
+    for apartment in apartments:
+        ApartmentReservationFactory(
+            application_apartment__application__customer=customer,
+            application_apartment__apartment_uuid=apartment.uuid,
+            apartment_uuid=apartment.uuid,
+        )
+
+    with patch.object(
+        ApartmentDocument, "search", wraps=ApartmentDocument.search
+    ) as search:
+        response = profile_api_client.get(
+            reverse("customer:sales-customer-detail", args=(customer.pk,)),
+            format="json",
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert search.call_count == 1
+    assert sorted(
+        (reservation["apartment_uuid"], reservation["apartment_number"])
+        for reservation in response.data["apartment_reservations"]
+    ) == sorted(
+        (apartment.uuid, apartment.apartment_number) for apartment in apartments
+    )
+
+
 @pytest.mark.django_db
 def test_get_customer_api_list_without_any_parameters(profile_api_client):
     CustomerFactory(secondary_profile=None)
@@ -287,3 +320,30 @@ def test_get_customer_api_list_with_parameters(profile_api_client):
     assert len(response.data) == 1
     for item in response.data:
         assert_customer_list_match_data(customers[item["id"]], item)
+
+
+@pytest.mark.django_db
+def test_get_customer_api_list_is_ordered_by_names(profile_api_client):
+    names = [
+        ("Aalto", "Anna"),
+        ("Virtanen", "Anna"),
+        ("Åkerman", "Anna"),
+        ("Öberg", "Anna"),
+    ]
+    for last_name, first_name in reversed(names):
+        CustomerFactory(
+            primary_profile__first_name=first_name,
+            primary_profile__last_name=last_name,
+            secondary_profile=None,
+        )
+
+    response = profile_api_client.get(
+        reverse("customer:sales-customer-list"),
+        data={"first_name": "Anna"},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [
+        (item["primary_last_name"], item["primary_first_name"])
+        for item in response.data
+    ] == names
@@ -1,22 +1,33 @@
+import tempfile
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
-from django.http import Http404, HttpResponse
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.utils.timezone import now
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
-from rest_framework import generics
+from rest_framework import generics, permissions
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.views import APIView
 
-from apartment.elastic.queries import get_apartment
+from apartment.elastic.queries import get_apartment, get_projects
+from apartment_application_service.pdf import create_pdf_response
+from apartment_application_service.utils import stream_zip
 from application_form.models import ApartmentReservation
+from users.permissions import IsSalesperson
 
 from ..api.serializers import (
     ApartmentInstallmentSerializer,
     ProjectInstallmentTemplateSerializer,
 )
 from ..models import ApartmentInstallment, ProjectInstallmentTemplate
-from ..pdf import create_invoice_pdf_from_installments
+from ..pdf import (
+    get_invoice_pdf_data_list,
+    get_project_installments,
+    INVOICE_PDF_TEMPLATE_FILE_NAME,
+    iter_project_invoice_pdfs,
+    write_project_invoices_pdf,
+)
 
 
 class InstallmentAPIViewBase(generics.ListCreateAPIView):
@@ -110,13 +121,69 @@ class ApartmentInstallmentInvoiceAPIView(APIView):
                 for index_param in index_params.split(",")
             ]
 
-        pdf_data = create_invoice_pdf_from_installments(installments)
         apartment = get_apartment(reservation.apartment_uuid)
+        pdf_data_list = get_invoice_pdf_data_list(
+            installments, apartments={str(apartment.uuid): apartment}
+        )
         title = (apartment.title or "").strip().lower().replace(" ", "_")
         filename = f"laskut_{title}" if title else "laskut"
 
-        response = HttpResponse(pdf_data, content_type="application/pdf")
-        response["Content-Disposition"] = f"attachment; filename={filename}"
+        return create_pdf_response(
+            request, INVOICE_PDF_TEMPLATE_FILE_NAME, pdf_data_list, filename
+        )
+
+
+@extend_schema(
+    description="Create the invoices of all the reservations of a project, either as "
+    "a ZIP archive with a PDF for each reservation, or as a single PDF.",
+    parameters=[
+        OpenApiParameter(
+            name="output",
+            description="Either 'zip' (default) or 'pdf'.",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            required=False,
+        )
+    ],
+    responses={
+        (200, "application/zip"): OpenApiTypes.BINARY,
+        (200, "application/pdf"): OpenApiTypes.BINARY,
+    },
+)
+class ProjectInvoiceAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsSalesperson]
+
+    def get(self, request, **kwargs):
+        project_uuid = kwargs["project_uuid"]
+        output = request.query_params.get("output", "zip")
+        if output not in ("zip", "pdf"):
+            raise ValidationError(f"Invalid output {output}")
+
+        try:
+            get_projects(project_uuid)
+        except ObjectDoesNotExist:
+            raise Http404
+        if not get_project_installments(project_uuid).exists():
+            raise Http404
+
+        if output == "pdf":
+            # The merged PDF is written to a temporary file and streamed from there,
+            # since it can be too large to be held in memory
+            file = tempfile.TemporaryFile()
+            write_project_invoices_pdf(project_uuid, file)
+            file.seek(0)
+            return FileResponse(
+                file,
+                as_attachment=True,
+                filename="laskut.pdf",
+                content_type="application/pdf",
+            )
+
+        response = StreamingHttpResponse(
+            stream_zip(iter_project_invoice_pdfs(project_uuid)),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = "attachment; filename=laskut.zip"
 
         return response
 
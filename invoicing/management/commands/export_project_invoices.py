@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apartment_application_service.utils import stream_zip
+from invoicing.pdf import (
+    get_project_installments,
+    iter_project_invoice_pdfs,
+    write_project_invoices_pdf,
+)
+
+
+class Command(BaseCommand):
+    help = "Export the invoices of all the reservations of a project"
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_uuid", help="UUID of the project")
+        parser.add_argument("output_file", help="Path of the file to write")
+        parser.add_argument(
+            "--pdf",
+            action="store_true",
+            help="Write a single PDF instead of a ZIP archive of a PDF per reservation",
+        )
+
+    def handle(self, *args, **options):
+        project_uuid = options["project_uuid"]
+        if not get_project_installments(project_uuid).exists():
+            raise CommandError(f"Project {project_uuid} has no installments")
+
+        with open(options["output_file"], "wb") as f:
+            if options["pdf"]:
+                write_project_invoices_pdf(project_uuid, f)
+            else:
+                for data in stream_zip(iter_project_invoice_pdfs(project_uuid)):
+                    f.write(data)
+
+        self.stdout.write(f"Invoices written to {options['output_file']}")
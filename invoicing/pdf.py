@@ -1,17 +1,30 @@
 import dataclasses
 from datetime import date
 from decimal import Decimal
+from django.db.models import QuerySet
 from django.utils.translation import gettext_lazy as _
 from functools import lru_cache
-from typing import ClassVar, Dict
+from io import BytesIO
+from itertools import groupby
+from operator import attrgetter
+from typing import BinaryIO, ClassVar, Dict, Iterator, List, Optional, Tuple
 from uuid import UUID
 
 from apartment.elastic.documents import ApartmentDocument
-from apartment.elastic.queries import get_apartment, get_projects
-from apartment_application_service.pdf import create_pdf, PDFData
+from apartment.elastic.queries import (
+    get_apartment,
+    get_apartment_uuids,
+    get_apartments,
+    get_projects,
+)
+from apartment_application_service.pdf import create_pdf, PDFData, write_pdf
+from invoicing.models import ApartmentInstallment
 
 INVOICE_PDF_TEMPLATE_FILE_NAME = "invoice_template.pdf"
 
+# Number of installments fetched from the database at a time when exporting invoices
+INVOICE_EXPORT_CHUNK_SIZE = 500
+
 
 @dataclasses.dataclass
 class InvoicePDFData(PDFData):
@@ -34,23 +47,69 @@ class InvoicePDFData(PDFData):
     }
 
 
-def create_invoice_pdf_from_installments(installments):
-    @lru_cache
-    def get_cached_project(project_uuid: UUID):
-        return get_projects(project_uuid)[0]
+def create_invoice_pdf_from_installments(
+    installments,
+    apartments: Optional[Dict[str, ApartmentDocument]] = None,
+    project: Optional[ApartmentDocument] = None,
+):
+    """
+    Creates a single PDF of the invoices of the given installments. Already fetched
+    apartments, keyed by their UUID as a string, and the project of the installments
+    can be given to avoid fetching them again.
+    """
+    return create_pdf(
+        INVOICE_PDF_TEMPLATE_FILE_NAME,
+        get_invoice_pdf_data_list(installments, apartments=apartments, project=project),
+    )
+
+
+def get_invoice_pdf_data_list(
+    installments,
+    apartments: Optional[Dict[str, ApartmentDocument]] = None,
+    project: Optional[ApartmentDocument] = None,
+) -> List[InvoicePDFData]:
+    """
+    Builds the invoice data of the given installments. See
+    `create_invoice_pdf_from_installments()` for the arguments.
+    """
+    return list(
+        iter_invoice_pdf_data(installments, apartments=apartments, project=project)
+    )
+
+
+def iter_invoice_pdf_data(
+    installments,
+    apartments: Optional[Dict[str, ApartmentDocument]] = None,
+    project: Optional[ApartmentDocument] = None,
+) -> Iterator[InvoicePDFData]:
+    """
+    Yields the invoice data of the given installments one at a time. See
+    `create_invoice_pdf_from_installments()` for the arguments.
+    """
+    if project is None:
+
+        @lru_cache
+        def get_project(project_uuid: UUID) -> ApartmentDocument:
+            return get_projects(project_uuid)[0]
+
+    else:
+
+        def get_project(project_uuid: UUID) -> ApartmentDocument:
+            return project
 
     @lru_cache
     def get_cached_apartment(apartment_uuid: UUID) -> ApartmentDocument:
+        if apartments and str(apartment_uuid) in apartments:
+            return apartments[str(apartment_uuid)]
         return get_apartment(apartment_uuid)
 
-    invoice_pdf_data_list = []
     for installment in installments:
         reservation = installment.apartment_reservation
         profile = reservation.application_apartment.application.customer.primary_profile
         apartment = get_cached_apartment(reservation.apartment_uuid)
-        project = get_cached_project(apartment.project_uuid)
-        invoice_pdf_data = InvoicePDFData(
-            recipient=project.project_housing_company,
+        installment_project = get_project(apartment.project_uuid)
+        yield InvoicePDFData(
+            recipient=installment_project.project_housing_company,
             recipient_account_number=installment.account_number,
             payer_name_and_address=f"{profile.first_name} {profile.last_name}\n\n"
             f"{profile.street_address}\n"
@@ -64,5 +123,67 @@ def create_invoice_pdf_from_installments(installments):
             + str(installment.value).replace(".", ",")
             + " €",
         )
-        invoice_pdf_data_list.append(invoice_pdf_data)
-    return create_pdf(INVOICE_PDF_TEMPLATE_FILE_NAME, invoice_pdf_data_list)
+
+
+def get_project_installments(project_uuid: UUID) -> QuerySet:
+    """
+    Returns the installments of all the reservations of the given project ordered by
+    reservation, with everything the invoices need loaded by the same query.
+    """
+    return (
+        ApartmentInstallment.objects.filter(
+            apartment_reservation__apartment_uuid__in=get_apartment_uuids(project_uuid)
+        )
+        .select_related(
+            "apartment_reservation__application_apartment__application__customer__"
+            "primary_profile"
+        )
+        .order_by("apartment_reservation_id", "id")
+    )
+
+
+def iter_project_invoice_pdfs(project_uuid: UUID) -> Iterator[Tuple[str, BytesIO]]:
+    """
+    Yields a file name and an invoice PDF for each reservation of the given project.
+    The installments are fetched in chunks and the invoices are rendered one
+    reservation at a time, so the whole project is never held in memory at once.
+    """
+    project = get_projects(project_uuid)[0]
+    apartments = {
+        str(apartment.uuid): apartment for apartment in get_apartments(project_uuid)
+    }
+    installments = get_project_installments(project_uuid).iterator(
+        chunk_size=INVOICE_EXPORT_CHUNK_SIZE
+    )
+    for reservation_id, reservation_installments in groupby(
+        installments, key=attrgetter("apartment_reservation_id")
+    ):
+        reservation_installments = list(reservation_installments)
+        reservation = reservation_installments[0].apartment_reservation
+        apartment = apartments.get(str(reservation.apartment_uuid))
+        apartment_number = apartment.apartment_number if apartment else ""
+        yield (
+            f"laskut_{apartment_number}_{reservation_id}.pdf".replace(" ", "_"),
+            create_invoice_pdf_from_installments(
+                reservation_installments, apartments=apartments, project=project
+            ),
+        )
+
+
+def write_project_invoices_pdf(project_uuid: UUID, file: BinaryIO) -> None:
+    """
+    Writes a single PDF of the invoices of all the reservations of the given project
+    to the given file. The installments are fetched in chunks and each invoice is
+    added to the PDF as it is built.
+    """
+    apartments = {
+        str(apartment.uuid): apartment for apartment in get_apartments(project_uuid)
+    }
+    pdf_data_list = iter_invoice_pdf_data(
+        get_project_installments(project_uuid).iterator(
+            chunk_size=INVOICE_EXPORT_CHUNK_SIZE
+        ),
+        apartments=apartments,
+        project=get_projects(project_uuid)[0],
+    )
+    write_pdf(INVOICE_PDF_TEMPLATE_FILE_NAME, pdf_data_list, file)
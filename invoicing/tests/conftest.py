@@ -1,7 +1,7 @@
 import pytest
 from rest_framework.test import APIClient
 
-from users.tests.factories import ProfileFactory
+from users.tests.factories import ProfileFactory, SalespersonProfileFactory
 from users.tests.utils import _create_token
 
 
@@ -16,3 +16,10 @@ def profile_api_client(api_client):
     profile = ProfileFactory()
     api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
     return api_client
+
+
+@pytest.fixture
+def salesperson_api_client(api_client):
+    profile = SalespersonProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    return api_client
@@ -1,9 +1,12 @@
 import datetime
 import pytest
 import uuid
+import zipfile
 from decimal import Decimal
 from django.urls import reverse
+from io import BytesIO
 
+from apartment.elastic.queries import get_apartment
 from apartment.tests.factories import ApartmentDocumentFactory
 from application_form.tests.factories import ApartmentReservationFactory
 
@@ -543,6 +546,32 @@ def test_apartment_installment_invoice_pdf(
     )
 
 
+@pytest.mark.django_db
+def test_apartment_installment_invoice_pdf_etag(
+    profile_api_client, reservation_with_installments
+):
+    url = reverse(
+        "application_form:apartment-installment-invoice",
+        kwargs={"apartment_reservation_id": reservation_with_installments.id},
+    )
+
+    response = profile_api_client.get(url)
+    assert response.status_code == 200
+    etag = response["ETag"]
+
+    response = profile_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert not response.content
+
+    installment = reservation_with_installments.apartment_installments.first()
+    installment.value += 1
+    installment.save()
+
+    response = profile_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
 @pytest.mark.django_db
 def test_apartment_installment_invoice_pdf_filtering(
     profile_api_client, reservation_with_installments
@@ -590,3 +619,69 @@ def test_apartment_installment_invoice_pdf_filtering_errors(
 
     assert response.status_code == 400
     assert "Invalid index" in response.data[0]["message"]
+
+
+@pytest.mark.parametrize("output", ("zip", "pdf"))
+@pytest.mark.django_db
+def test_project_invoices(
+    salesperson_api_client, reservation_with_installments, output
+):
+    apartment_uuid = reservation_with_installments.apartment_uuid
+    other_reservation = ApartmentReservationFactory(apartment_uuid=apartment_uuid)
+    ApartmentInstallmentFactory(apartment_reservation=other_reservation)
+    project_uuid = get_apartment(
+        apartment_uuid, include_project_fields=True
+    ).project_uuid
+
+    response = salesperson_api_client.get(
+        reverse("apartment:project-invoices", kwargs={"project_uuid": project_uuid})
+        + f"?output={output}"
+    )
+    assert response.status_code == 200
+    content = (
+        b"".join(response.streaming_content) if response.streaming else response.content
+    )
+
+    if output == "zip":
+        assert response["Content-Type"] == "application/zip"
+        archive = zipfile.ZipFile(BytesIO(content))
+        file_names = archive.namelist()
+        assert len(file_names) == 2
+        assert file_names[0].endswith(f"_{reservation_with_installments.id}.pdf")
+        assert file_names[1].endswith(f"_{other_reservation.id}.pdf")
+    else:
+        assert response["Content-Type"] == "application/pdf"
+        assert (
+            bytes(
+                reservation_with_installments.application_apartment.application.customer.primary_profile.full_name,  # noqa E501
+                encoding="utf-8",
+            )
+            in content
+        )
+
+
+@pytest.mark.django_db
+def test_project_invoices_without_installments(
+    salesperson_api_client, apartment_document
+):
+    response = salesperson_api_client.get(
+        reverse(
+            "apartment:project-invoices",
+            kwargs={"project_uuid": apartment_document.project_uuid},
+        )
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_project_invoices_requires_salesperson(
+    profile_api_client, reservation_with_installments
+):
+    project_uuid = get_apartment(
+        reservation_with_installments.apartment_uuid, include_project_fields=True
+    ).project_uuid
+
+    response = profile_api_client.get(
+        reverse("apartment:project-invoices", kwargs={"project_uuid": project_uuid})
+    )
+    assert response.status_code == 403
@@ -0,0 +1,238 @@
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from decimal import Decimal
+from pikepdf import Pdf
+from types import SimpleNamespace
+
+from apartment_application_service import pdf
+from invoicing import pdf as invoicing_pdf
+from invoicing.pdf import INVOICE_PDF_TEMPLATE_FILE_NAME, InvoicePDFData
+
+
+def _create_invoice_pdf_data(number):
+    return InvoicePDFData(
+        recipient="Asunto Oy Testi",
+        recipient_account_number="FI12 3456 7890 1234 56",
+        payer_name_and_address=f"Payer {number}",
+        reference_number=f"RF{number}",
+        due_date=date(2022, 1, 1),
+        amount=Decimal("100.50"),
+        apartment=f"Apartment {number}",
+    )
+
+
+def _get_field_values(pdf_bytes):
+    document = Pdf.open(pdf_bytes)
+    return {
+        str(annot.T): str(annot.V)
+        for page in document.pages
+        for annot in page.Annots
+        if hasattr(annot, "T") and hasattr(annot, "V")
+    }
+
+
+def _create_installment(apartment_uuid):
+    profile = SimpleNamespace(
+        first_name="First",
+        last_name="Last",
+        street_address="Street 1",
+        postal_code="00100",
+        city="Helsinki",
+    )
+    application = SimpleNamespace(customer=SimpleNamespace(primary_profile=profile))
+    return SimpleNamespace(
+        apartment_reservation=SimpleNamespace(
+            apartment_uuid=apartment_uuid,
+            application_apartment=SimpleNamespace(application=application),
+        ),
+        account_number="FI12 3456 7890 1234 56",
+        reference_number="RF1",
+        due_date=date(2022, 1, 1),
+        value=Decimal("100.50"),
+        type="PAYMENT_1",
+    )
+
+
+def test_invoice_pdf_data_has_project_of_each_installment(monkeypatch):
+    projects = {
+        "project-1": SimpleNamespace(project_housing_company="Asunto Oy 1"),
+        "project-2": SimpleNamespace(project_housing_company="Asunto Oy 2"),
+    }
+    monkeypatch.setattr(
+        invoicing_pdf, "get_projects", lambda project_uuid: [projects[project_uuid]]
+    )
+    apartments = {
+        "apartment-1": SimpleNamespace(project_uuid="project-1", apartment_number="A1"),
+        "apartment-2": SimpleNamespace(project_uuid="project-2", apartment_number="B1"),
+    }
+    installments = [
+        _create_installment("apartment-1"),
+        _create_installment("apartment-2"),
+        _create_installment("apartment-1"),
+    ]
+
+    pdf_data_list = invoicing_pdf.get_invoice_pdf_data_list(
+        installments, apartments=apartments
+    )
+
+    assert [pdf_data.recipient for pdf_data in pdf_data_list] == [
+        "Asunto Oy 1",
+        "Asunto Oy 2",
+        "Asunto Oy 1",
+    ]
+
+
+def test_create_pdfs_renders_each_item_separately():
+    pdf_data_list = [_create_invoice_pdf_data(number) for number in range(3)]
+    pdf_files = pdf.create_pdfs(INVOICE_PDF_TEMPLATE_FILE_NAME, pdf_data_list)
+    assert len(pdf_files) == 3
+    for number, pdf_file in enumerate(pdf_files):
+        assert _get_field_values(pdf_file)["Viitenumero"] == f"RF{number}"
+
+
+def test_create_pdfs_in_parallel_keeps_order(monkeypatch):
+    monkeypatch.setattr(pdf, "PARALLEL_RENDER_THRESHOLD", 2)
+    monkeypatch.setattr(pdf, "PARALLEL_RENDER_WORKERS", 2)
+    pdf_data_list = [_create_invoice_pdf_data(number) for number in range(5)]
+    pdf_files = pdf.create_pdfs(INVOICE_PDF_TEMPLATE_FILE_NAME, pdf_data_list)
+    assert [_get_field_values(pdf_file)["Viitenumero"] for pdf_file in pdf_files] == [
+        f"RF{number}" for number in range(5)
+    ]
+
+
+def test_create_pdfs_replaces_broken_pool(monkeypatch):
+    executors = []
+
+    class Executor:
+        def __init__(self, max_workers):
+            # the first pool has a dead worker
+            self.broken = not executors
+            executors.append(self)
+
+        def map(self, fn, *iterables, chunksize=1):
+            if self.broken:
+                raise BrokenProcessPool()
+            return map(fn, *iterables)
+
+        def shutdown(self, wait=True):
+            pass
+
+    monkeypatch.setattr(pdf, "ProcessPoolExecutor", Executor)
+    monkeypatch.setattr(pdf, "_render_executor", None)
+    monkeypatch.setattr(pdf, "PARALLEL_RENDER_THRESHOLD", 2)
+    monkeypatch.setattr(pdf, "PARALLEL_RENDER_WORKERS", 2)
+    pdf_data_list = [_create_invoice_pdf_data(number) for number in range(2)]
+
+    pdf_files = pdf.create_pdfs(INVOICE_PDF_TEMPLATE_FILE_NAME, pdf_data_list)
+
+    assert [_get_field_values(pdf_file)["Viitenumero"] for pdf_file in pdf_files] == [
+        "RF0",
+        "RF1",
+    ]
+    assert len(executors) == 2
+    assert pdf._render_executor is executors[1]
+
+
+def test_create_pdfs_in_threads():
+    def render(number):
+        pdf_data_list = [_create_invoice_pdf_data(number)] * 10
+        return pdf.create_pdfs(INVOICE_PDF_TEMPLATE_FILE_NAME, pdf_data_list)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(render, range(8)))
+
+    for number, pdf_files in enumerate(results):
+        for pdf_file in pdf_files:
+            assert _get_field_values(pdf_file)["Viitenumero"] == f"RF{number}"
+
+
+def test_create_pdfs_parses_template_once(monkeypatch):
+    pdf.create_pdfs(INVOICE_PDF_TEMPLATE_FILE_NAME, [_create_invoice_pdf_data(0)])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The template should not have been parsed again")
+
+    monkeypatch.setattr(pdf.Pdf, "open", fail)
+    pdf_files = pdf.create_pdfs(
+        INVOICE_PDF_TEMPLATE_FILE_NAME,
+        [_create_invoice_pdf_data(number) for number in range(2)],
+    )
+    monkeypatch.undo()
+    assert [_get_field_values(pdf_file)["Viitenumero"] for pdf_file in pdf_files] == [
+        "RF0",
+        "RF1",
+    ]
+
+
+def test_create_pdf_fills_every_item():
+    pdf_data_list = [_create_invoice_pdf_data(number) for number in range(2)]
+    document = Pdf.open(pdf.create_pdf(INVOICE_PDF_TEMPLATE_FILE_NAME, pdf_data_list))
+    template = Pdf.open(
+        f"{pdf.PDF_TEMPLATE_DIRECTORY}/{INVOICE_PDF_TEMPLATE_FILE_NAME}"
+    )
+    assert len(document.pages) == 2 * len(template.pages)
+    # each document has its own fields
+    assert [
+        str(annot.V)
+        for page in document.pages
+        for annot in page.Annots
+        if str(annot.get("/T")) == "Viitenumero"
+    ] == ["RF0", "RF1"]
+
+
+def test_create_pdf_is_served_from_cache(settings, tmp_path, monkeypatch):
+    settings.PDF_CACHE_DIRECTORY = str(tmp_path)
+    pdf_data = _create_invoice_pdf_data(1)
+    content = pdf.create_pdf(INVOICE_PDF_TEMPLATE_FILE_NAME, pdf_data).getvalue()
+    assert len(list(tmp_path.iterdir())) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The PDF should have been served from the cache")
+
+    monkeypatch.setattr(pdf, "_create_pdf", fail)
+    assert (
+        pdf.create_pdf(INVOICE_PDF_TEMPLATE_FILE_NAME, pdf_data).getvalue() == content
+    )
+
+
+def test_cached_pdf_is_encrypted(settings, tmp_path):
+    settings.PDF_CACHE_DIRECTORY = str(tmp_path)
+    pdf.create_pdf(INVOICE_PDF_TEMPLATE_FILE_NAME, _create_invoice_pdf_data(1))
+
+    (cached_file,) = tmp_path.iterdir()
+    content = cached_file.read_bytes()
+    assert b"Payer 1" not in content
+    assert not content.startswith(b"%PDF")
+
+
+def test_pdf_cache_evicts_least_recently_used(settings, tmp_path):
+    settings.PDF_CACHE_DIRECTORY = str(tmp_path)
+    first = pdf.create_pdf(
+        INVOICE_PDF_TEMPLATE_FILE_NAME, _create_invoice_pdf_data(1)
+    ).getvalue()
+    settings.PDF_CACHE_MAX_SIZE = 2 * len(first)
+    for number in range(2, 5):
+        pdf.create_pdf(INVOICE_PDF_TEMPLATE_FILE_NAME, _create_invoice_pdf_data(number))
+
+    cached_files = list(tmp_path.iterdir())
+    assert 0 < len(cached_files) <= 2
+    assert sum(path.stat().st_size for path in cached_files) <= 2 * len(first)
+
+
+def test_pdf_cache_index_in_threads(tmp_path):
+    index = pdf._PDFCacheIndex(str(tmp_path))
+
+    def use_index(thread_number):
+        for number in range(200):
+            name = f"{thread_number}-{number}.pdf"
+            (tmp_path / name).write_bytes(b"x")
+            index.add(name, 1)
+            index.touch(f"{thread_number}-{number // 2}.pdf")
+            index.evict(50)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(use_index, range(4)))
+
+    assert index.total_size == sum(index.files.values()) <= 50
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(index.files)
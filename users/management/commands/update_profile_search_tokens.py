@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search tokens of all profiles. Needed after PROFILE_SEARCH_KEY "
+        "has been changed."
+    )
+
+    def handle(self, *args, **kwargs):
+        count = 0
+        for profile in Profile.objects.iterator():
+            with transaction.atomic():
+                profile.update_search_tokens()
+            count += 1
+        self.stdout.write(f"Updated the search tokens of {count} profiles")
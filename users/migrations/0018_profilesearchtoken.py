@@ -0,0 +1,59 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+from users.search import get_index_grams, make_token, SEARCH_FIELDS
+
+
+def create_search_tokens(apps, schema_editor):
+    Profile = apps.get_model("users", "Profile")
+    ProfileSearchToken = apps.get_model("users", "ProfileSearchToken")
+    for profile in Profile.objects.iterator():
+        ProfileSearchToken.objects.bulk_create(
+            ProfileSearchToken(profile=profile, field=field, token=token)
+            for field in SEARCH_FIELDS
+            for token in {
+                make_token(field, gram)
+                for gram in get_index_grams(getattr(profile, field) or "")
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0017_add_salesperson_group"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProfileSearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("field", models.CharField(max_length=32)),
+                ("token", models.CharField(max_length=32)),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to="users.profile",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="profilesearchtoken",
+            index=models.Index(
+                fields=["field", "token"], name="profile_search_token_idx"
+            ),
+        ),
+        migrations.RunPython(create_search_tokens, migrations.RunPython.noop),
+    ]
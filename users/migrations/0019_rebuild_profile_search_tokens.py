@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from users.search import get_index_grams, make_token, SEARCH_FIELDS
+
+
+def rebuild_search_tokens(apps, schema_editor):
+    Profile = apps.get_model("users", "Profile")
+    ProfileSearchToken = apps.get_model("users", "ProfileSearchToken")
+    ProfileSearchToken.objects.all().delete()
+    for profile in Profile.objects.iterator():
+        ProfileSearchToken.objects.bulk_create(
+            ProfileSearchToken(profile=profile, field=field, token=token)
+            for field in SEARCH_FIELDS
+            for token in {
+                make_token(field, gram)
+                for gram in get_index_grams(getattr(profile, field) or "")
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0018_profilesearchtoken"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_tokens, migrations.RunPython.noop),
+    ]
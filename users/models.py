@@ -1,7 +1,7 @@
 import logging
 from django.conf import settings
-from django.db import models
-from django.db.models import UUIDField
+from django.db import models, transaction
+from django.db.models import Count, UUIDField
 from django.utils.translation import gettext_lazy as _
 from helusers.models import AbstractUser
 from pgcrypto.fields import (
@@ -13,6 +13,13 @@ from uuid import uuid4
 
 from apartment_application_service.models import TimestampedModel
 from users.enums import Roles
+from users.search import (
+    get_index_grams,
+    get_query_grams,
+    make_token,
+    normalize,
+    SEARCH_FIELDS,
+)
 
 _logger = logging.getLogger(__name__)
 
@@ -23,6 +30,37 @@ class User(AbstractUser):
         verbose_name_plural = _("users")
 
 
+class ProfileQuerySet(models.QuerySet):
+    def search(self, field: str, value: str) -> "ProfileQuerySet":
+        """
+        Returns the profiles whose given field contains the value, ignoring case.
+
+        The candidates are looked up from the search tokens. A field containing every
+        piece of the value doesn't necessarily contain the whole value, so only the
+        decrypted field values of the candidates are checked. A value too short to be
+        looked up from the tokens is checked against every profile.
+        """
+        if field not in SEARCH_FIELDS:
+            raise ValueError(f"Profiles can't be searched by {field}")
+        tokens = {make_token(field, gram) for gram in get_query_grams(value)}
+        candidates = self
+        if tokens:
+            candidates = self.filter(
+                pk__in=ProfileSearchToken.objects.filter(field=field, token__in=tokens)
+                .values("profile_id")
+                .annotate(token_count=Count("token", distinct=True))
+                .filter(token_count=len(tokens))
+                .values("profile_id")
+            )
+        value = normalize(value)
+        matching_ids = [
+            pk
+            for pk, field_value in candidates.values_list("pk", field)
+            if value in normalize(field_value or "")
+        ]
+        return self.filter(pk__in=matching_ids)
+
+
 class Profile(TimestampedModel):
     CONTACT_LANGUAGE_CHOICES = [
         ("fi", _("Finnish")),
@@ -65,6 +103,8 @@ class Profile(TimestampedModel):
         choices=CONTACT_LANGUAGE_CHOICES,
     )
 
+    objects = ProfileQuerySet.as_manager()
+
     @property
     def ssn_suffix(cls):
         if cls.national_identification_number:
@@ -81,7 +121,26 @@ class Profile(TimestampedModel):
         return result
 
     def save(self, *args, **kwargs):
-        super(Profile, self).save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        with transaction.atomic():
+            super(Profile, self).save(*args, **kwargs)
+            if update_fields is None or set(update_fields) & set(SEARCH_FIELDS):
+                self.update_search_tokens()
+
+    def update_search_tokens(self) -> None:
+        """
+        Replaces the search tokens of the profile with ones built from its current
+        field values.
+        """
+        self.search_tokens.all().delete()
+        ProfileSearchToken.objects.bulk_create(
+            ProfileSearchToken(profile=self, field=field, token=token)
+            for field in SEARCH_FIELDS
+            for token in {
+                make_token(field, gram)
+                for gram in get_index_grams(getattr(self, field) or "")
+            }
+        )
 
     def is_salesperson(self) -> bool:
         return self.user.groups.filter(name__iexact=Roles.SALESPERSON.name).exists()
@@ -96,3 +155,21 @@ class Profile(TimestampedModel):
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
+
+
+class ProfileSearchToken(models.Model):
+    """
+    Keyed hash of a piece of an encrypted profile field, used for searching the
+    profiles without decrypting them. See `users.search`.
+    """
+
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="search_tokens"
+    )
+    field = models.CharField(max_length=32)
+    token = models.CharField(max_length=32)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["field", "token"], name="profile_search_token_idx")
+        ]
@@ -0,0 +1,62 @@
+"""
+Blind index for searching profiles by parts of their encrypted fields.
+
+The searchable fields are split into all their two and three character pieces, and
+a keyed hash of each piece is stored as a `ProfileSearchToken`. A search value is
+split the same way, so the profiles containing it can be found by an index lookup
+of the hashes. The hashes can't be reversed without the key, so the data stays
+encrypted at rest.
+"""
+import hashlib
+import hmac
+from django.conf import settings
+from typing import Set
+
+SEARCH_FIELDS = ("first_name", "last_name", "email", "phone_number")
+
+TOKEN_LENGTH = 32
+
+# Shorter values can't be looked up from the index. Single characters aren't indexed,
+# since their hashes would only reveal the letter frequencies of the fields.
+MIN_QUERY_LENGTH = 2
+
+
+def normalize(value: str) -> str:
+    return str(value).lower()
+
+
+def get_index_grams(value: str) -> Set[str]:
+    """
+    Returns the pieces of the value to be stored in the index: every piece of two and
+    three characters.
+    """
+    value = normalize(value)
+    return _get_grams(value, 2) | _get_grams(value, 3)
+
+
+def get_query_grams(value: str) -> Set[str]:
+    """
+    Returns the pieces of the search value that all have to be found from a field
+    containing the value, or an empty set if the value is too short to be looked up
+    from the index.
+    """
+    value = normalize(value)
+    if len(value) < MIN_QUERY_LENGTH:
+        return set()
+    if len(value) <= 3:
+        return {value}
+    return _get_grams(value, 3)
+
+
+def make_token(field: str, gram: str) -> str:
+    key = (settings.PROFILE_SEARCH_KEY or settings.SECRET_KEY).encode()
+    digest = hmac.new(key, f"{field}:{gram}".encode(), hashlib.sha256).hexdigest()
+    return digest[:TOKEN_LENGTH]
+
+
+def _get_grams(value: str, length: int) -> Set[str]:
+    grams = set()
+    for start in range(len(value) - length + 1):
+        end = start + length
+        grams.add(value[start:end])
+    return grams
@@ -0,0 +1,31 @@
+"""
+Sort keys for ordering profiles by their names.
+
+The names are encrypted in the database, so the profiles are sorted by them in Python
+once they have been decrypted. The key is the case folded names with the accents
+removed, except that Å, Ä and Ö are kept apart and sorted after Z as in the Finnish
+alphabet.
+"""
+import unicodedata
+
+# The characters right after "z", in the order of Å, Ä and Ö
+_FINNISH_LETTERS = str.maketrans({"å": "{", "ä": "|", "ö": "}"})
+
+# Sorts before every other character, so that a shorter name comes first
+_SEPARATOR = "\x01"
+
+
+def get_sort_key(*names: str) -> str:
+    """
+    Returns a key that sorts by the given names in order.
+    """
+    return _SEPARATOR.join(_fold(name or "") for name in names)
+
+
+def _fold(name: str) -> str:
+    name = unicodedata.normalize("NFC", name.casefold()).translate(_FINNISH_LETTERS)
+    return "".join(
+        character
+        for character in unicodedata.normalize("NFKD", name)
+        if not unicodedata.combining(character)
+    )
@@ -1,5 +1,7 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework_simplejwt.tokens import RefreshToken
 from unittest.mock import patch
@@ -52,6 +54,21 @@ def test_profile_get_detail_writes_audit_log(profile, api_client):
     assert audit_event["status"] == "SUCCESS"
 
 
+@pytest.mark.django_db
+def test_profile_get_detail_audit_log_reuses_loaded_profile(profile, api_client):
+    # The profile loaded by the view should be the audit log target, instead of
+    # fetching it again
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    with CaptureQueriesContext(connection) as context:
+        api_client.get(reverse("users:profile-detail", args=(mask_uuid(profile.pk),)))
+    profile_lookups = [
+        query
+        for query in context.captured_queries
+        if 'WHERE "users_profile"."id" =' in query["sql"]
+    ]
+    assert len(profile_lookups) == 1
+
+
 @pytest.mark.django_db
 def test_profile_get_detail_fails_if_not_own_profile(
     profile, other_profile, api_client
@@ -1,6 +1,8 @@
 import pytest
 
 from users.models import Profile
+from users.search import get_index_grams, get_query_grams, make_token
+from users.sorting import get_sort_key
 from users.tests.factories import ProfileFactory
 
 
@@ -12,3 +14,68 @@ def test_profile_exist_after_user_is_deleted():
 
     assert Profile.objects.all().count() == 1
     assert Profile.objects.first().user is None
+
+
+@pytest.mark.django_db
+def test_profile_search_tokens_are_updated_on_save():
+    profile = ProfileFactory(first_name="Maija")
+    tokens = set(profile.search_tokens.values_list("field", "token"))
+    assert ("first_name", make_token("first_name", "aij")) in tokens
+
+    profile.first_name = "Matti"
+    profile.save()
+
+    tokens = set(profile.search_tokens.values_list("field", "token"))
+    assert ("first_name", make_token("first_name", "att")) in tokens
+    assert ("first_name", make_token("first_name", "aij")) not in tokens
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "value,found",
+    [
+        # too short to be looked up from the tokens
+        ("N", True),
+        ("x", False),
+        ("na", True),
+        ("ANN", True),
+        ("anna", True),
+        ("nanna", True),
+        # contains only pieces of the first name
+        ("nannan", False),
+        ("matti", False),
+    ],
+)
+def test_profile_search(value, found):
+    profile = ProfileFactory(first_name="Nanna")
+    ProfileFactory(first_name="Matti")
+
+    result = list(Profile.objects.search("first_name", value))
+
+    assert (profile in result) is found
+
+
+def test_index_grams_are_two_and_three_characters_long():
+    assert get_index_grams("Anna") == {"an", "nn", "na", "ann", "nna"}
+    assert get_index_grams("A") == set()
+
+
+def test_query_grams():
+    assert get_query_grams("a") == set()
+    assert get_query_grams("An") == {"an"}
+    assert get_query_grams("Anna") == {"ann", "nna"}
+
+
+def test_sort_key_orders_names():
+    names = [
+        ("Aalto", "Anna"),
+        ("Aalto", "Bertta"),
+        ("Aaltonen", "Aino"),
+        ("Émile", "Zola"),
+        ("Virtanen", "Matti"),
+        ("Åkerman", "Eva"),
+        ("Äijälä", "Pekka"),
+        ("Öberg", "Liisa"),
+    ]
+
+    assert sorted(reversed(names), key=lambda name: get_sort_key(*name)) == names
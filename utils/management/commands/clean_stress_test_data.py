@@ -15,10 +15,9 @@ class Command(BaseCommand):
         # Gather the test data to remove
         profiles = Profile.objects.filter(email__startswith="TestUser-")
         users = User.objects.filter(profile__in=profiles)
-        profile_ids = map(str, profiles.values_list("pk", flat=True))
+        profile_ids = [str(pk) for pk in profiles.values_list("pk", flat=True)]
         audit_logs = AuditLog.objects.filter(
-            Q(message__audit_event__actor__profile_id__in=profile_ids)
-            | Q(message__audit_event__target__id__in=profile_ids)
+            Q(actor_profile_id__in=profile_ids) | Q(target_id__in=profile_ids)
         )
         customers = Customer.objects.filter(
             Q(primary_profile__in=profiles) | Q(secondary_profile__in=profiles)